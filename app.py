@@ -6,6 +6,9 @@ Implementation based on PRD requirements for simple Flask web app
 import os
 import sys
 import json
+import base64
+import hashlib
+import hmac
 import threading
 import time
 from datetime import datetime
@@ -15,7 +18,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Flask core imports
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
@@ -49,10 +52,24 @@ except ImportError as e:
     print("    Using fallback WAR implementation.")
     CONTROLLER_AVAILABLE = False
 
+from src.log_sink import BufferedLogSink
+from src.log_retention import LogRetention
+from src.stop_signal import get_stop_channel
+from src.progress_publisher import ProgressPublisher
+from src.fair_scheduler import get_fair_scheduler
+from src.run_lock import get_run_lock
+from src.queue_metrics import get_queue_metrics
+from src.course_catalog import get_course_catalog, format_course_label
+from src.bundled_catalog import get_bundled_catalog, parse_course_list_md
+from src.course_search import get_course_search
+from src.status_events import get_status_events, format_sse
+from src.status_store import get_status_store, RUNNING_STATUSES
+from src.dashboard_view import get_dashboard_provider
+
 # Import Celery for background tasks (with error handling)
 try:
     from celery_app import celery_app
-    from tasks.war_tasks import run_war_task, stop_war_task
+    from tasks.war_tasks import run_war_task, run_war_cycle_task, stop_war_task
     CELERY_AVAILABLE = True
     print("✅ Celery task system imported successfully")
 except ImportError as e:
@@ -155,9 +172,9 @@ if not ENCRYPTION_KEY:
 
 cipher_suite = Fernet(ENCRYPTION_KEY)
 
-# Global variable to track active WAR sessions
+# WAR threads running in this process (stop flags); status shared across
+# processes lives in src.status_store
 active_sessions = {}
-celery_tasks = {}  # Track Celery task IDs for users
 
 # Database Models
 class User(UserMixin, db.Model):
@@ -209,10 +226,15 @@ class UserSettings(db.Model):
 
 class WarSession(db.Model):
     __tablename__ = 'war_sessions'
+    __table_args__ = (
+        db.Index('ix_war_sessions_user_status', 'user_id', 'status'),  # Active session lookups
+        db.Index('ix_war_sessions_user_created', 'user_id', 'created_at'),  # Latest session
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(db.String(20), default='stopped')  # active, stopped, completed, error
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     started_at = db.Column(db.DateTime)
     stopped_at = db.Column(db.DateTime)
     courses_obtained = db.Column(db.Text)  # JSON string
@@ -220,11 +242,38 @@ class WarSession(db.Model):
     successful_attempts = db.Column(db.Integer, default=0)
     last_activity = db.Column(db.DateTime)
     
+    # Bandwidth accounting (SIAKAD response bodies)
+    http_requests = db.Column(db.Integer, default=0)
+    bytes_compressed = db.Column(db.BigInteger, default=0)  # Bytes received on the wire
+    bytes_decompressed = db.Column(db.BigInteger, default=0)  # Bytes after gzip/br decoding
+    decompress_ms = db.Column(db.Float, default=0.0)
+    
+    # Controller state between cycle tasks (JSON, cycle-per-task execution mode)
+    checkpoint = db.Column(db.Text)
+    
+    # Set when the per-cycle activity logs were rolled up into a summary row
+    logs_rolled_up_at = db.Column(db.DateTime)
+    
+    def set_transfer_totals(self, totals):
+        """Persist bandwidth totals reported by SiakadSession.transfer_stats"""
+        if not totals:
+            return
+        self.http_requests = totals.get('requests', 0)
+        self.bytes_compressed = totals.get('bytes_compressed', 0)
+        self.bytes_decompressed = totals.get('bytes_decompressed', 0)
+        self.decompress_ms = totals.get('decompress_ms', 0.0)
+    
     # Relationships
     activity_logs = db.relationship('ActivityLog', backref='war_session')
 
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
+    __table_args__ = (
+        db.Index('ix_activity_logs_user_timestamp', 'user_id', 'timestamp'),  # Newest logs per user
+        db.Index('ix_activity_logs_user_session_ts', 'user_id', 'session_id', 'timestamp', 'id'),  # Log view: session filter
+        db.Index('ix_activity_logs_user_level_ts', 'user_id', 'level', 'timestamp', 'id'),  # Log view: level filter
+        db.Index('ix_activity_logs_level_timestamp', 'level', 'timestamp'),  # Retention: expired rows per level
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -233,8 +282,28 @@ class ActivityLog(db.Model):
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+class RunLease(db.Model):
+    """Per-user WAR run lease (database fallback for src.run_lock when Redis is down)"""
+    __tablename__ = 'run_leases'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)  # Lease token of the running process
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class RunStatus(db.Model):
+    """Latest WAR run status snapshot per user (database fallback for src.status_store when Redis is down)"""
+    __tablename__ = 'run_status'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    session_id = db.Column(db.Integer, nullable=False)  # Run the snapshot belongs to
+    data = db.Column(db.Text, nullable=False)  # JSON snapshot
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Course(db.Model):
     __tablename__ = 'courses'
+    __table_args__ = (
+        db.Index('ix_courses_active_code_class', 'is_active', 'course_code', 'class_type'),  # Catalog listing
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     course_code = db.Column(db.String(30), nullable=False)  # e.g., AR25-11001
@@ -303,7 +372,8 @@ class CourseForm(FlaskForm):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Settings are read on almost every page: load them in the same query
+    return User.query.options(db.joinedload(User.settings)).filter_by(id=int(user_id)).first()
 
 # Helper functions
 def encrypt_password(password):
@@ -337,298 +407,283 @@ def decrypt_cookie(encrypted_cookie):
         print(f"⚠️ Warning: Failed to decrypt cookie: {e}")
         return encrypted_cookie  # Return as-is if decryption fails (might be unencrypted)
 
+def write_activity_logs(rows):
+    """Write a batch of activity log rows with one bulk insert"""
+    with app.app_context():
+        db.session.execute(db.insert(ActivityLog), rows)
+        db.session.commit()
+    return len(rows)
+
+activity_log_sink = BufferedLogSink(
+    write_activity_logs,
+    batch_size=app.config.get('ACTIVITY_LOG_BATCH_SIZE', 50),
+    flush_interval_ms=app.config.get('ACTIVITY_LOG_FLUSH_MS', 500),
+    max_queue=app.config.get('ACTIVITY_LOG_MAX_QUEUE', 5000),
+    name='activity-log-sink'
+)
+
+# Retention job (run by the Celery beat schedule, see tasks/maintenance_tasks.py)
+activity_log_retention = LogRetention(
+    ttl_days=app.config.get('ACTIVITY_LOG_RETENTION_DAYS'),
+    rollup_after_hours=app.config.get('ACTIVITY_LOG_ROLLUP_AFTER_HOURS', 1.0),
+    # Relative paths are resolved against the app, not the worker's CWD
+    archive_dir=(os.path.join(app.root_path, app.config['ACTIVITY_LOG_ARCHIVE_DIR'])
+                 if app.config.get('ACTIVITY_LOG_ARCHIVE_DIR') else None),
+    batch_size=app.config.get('ACTIVITY_LOG_RETENTION_BATCH', 1000)
+)
+
 def log_activity(user_id, message, level='INFO', session_id=None):
-    """Log user activity"""
-    log = ActivityLog(
-        user_id=user_id,
-        session_id=session_id,
-        level=level,
-        message=message
-    )
-    db.session.add(log)
-    db.session.commit()
+    """Log user activity (buffered, written in batches by activity_log_sink) and push it to open status streams"""
+    row = {
+        'user_id': user_id,
+        'session_id': session_id,
+        'level': level,
+        'message': message,
+        'timestamp': datetime.utcnow()
+    }
+    if activity_log_sink.submit(row):
+        get_status_events().publish(user_id, 'log', row)
+
+def load_catalog_rows():
+    """Load active courses for the catalog cache (only called on a cache miss)"""
+    rows = [
+        {
+            'id': course.id,
+            'course_code': course.course_code,
+            'course_name': course.course_name,
+            'class_type': course.class_type,
+            'class_id': course.class_id,
+            'sks': course.sks or 0,
+            'faculty': course.faculty or 'Lainnya',
+            'department': course.department or '',
+            'semester': course.semester or ''
+        }
+        for course in Course.query.filter_by(is_active=True).order_by(Course.course_code, Course.class_type)
+    ]
+    print(f"✅ Loaded {len(rows)} courses from database")
+    return rows
+
+get_course_catalog().loader = load_catalog_rows
 
 def load_course_list():
-    """Load available courses from database with fallback to COURSE_LIST.md"""
+    """Load available courses from the catalog cache with fallback to the bundled catalog"""
     try:
-        # First, try to load from database
-        courses_from_db = Course.query.filter_by(is_active=True).order_by(Course.course_code, Course.class_type).all()
-        
-        if courses_from_db:
-            # Convert database courses to form choices format
-            courses = []
-            for course in courses_from_db:
-                course_label = f"{course.course_code} ({course.class_type}) - {course.course_name}"
-                if course.sks:
-                    course_label += f" [{course.sks} SKS]"
-                courses.append((course.class_id, course_label))
-            
-            print(f"✅ Loaded {len(courses)} courses from database")
-            return courses
+        # First, try the cached database catalog
+        catalog = get_course_catalog().get()
+        if catalog.choices:
+            return list(catalog.choices)
         
-        # If no courses in database, try to migrate from COURSE_LIST.md
-        print("⚠️  No courses found in database, attempting to migrate from COURSE_LIST.md...")
+        # If no courses in database, seed it from the bundled catalog
+        print("⚠️  No courses found in database, importing the bundled course catalog...")
         migrate_courses_from_md()
         
-        # Try database again after migration
-        courses_from_db = Course.query.filter_by(is_active=True).order_by(Course.course_code, Course.class_type).all()
-        if courses_from_db:
-            courses = []
-            for course in courses_from_db:
-                course_label = f"{course.course_code} ({course.class_type}) - {course.course_name}"
-                if course.sks:
-                    course_label += f" [{course.sks} SKS]"
-                courses.append((course.class_id, course_label))
-            print(f"✅ Loaded {len(courses)} courses from database after migration")
-            return courses
+        # Try database again after migration (migration bumps the catalog version)
+        catalog = get_course_catalog().get()
+        if catalog.choices:
+            print(f"✅ Loaded {len(catalog.choices)} courses from database after migration")
+            return list(catalog.choices)
         
-        # If migration failed, fallback to MD file parsing
-        print("⚠️  Migration failed, falling back to direct MD parsing...")
-        return load_course_list_from_md()
+        # If migration failed, serve the bundled catalog directly
+        print("⚠️  Migration failed, falling back to the bundled catalog...")
+        return load_course_list_from_bundle()
             
     except Exception as e:
         print(f"⚠️  Error loading courses from database: {e}")
-        print("   Falling back to MD file parsing...")
-        # Fallback to original MD file parsing
-        return load_course_list_from_md()
+        print("   Falling back to the bundled catalog...")
+        return load_course_list_from_bundle()
     
-def migrate_courses_from_md():
-    """Migrate courses from GitHub COURSE_LIST.md URL to database, with support for faculty/department and auto semester."""
-    try:
-        import requests
+# Remote COURSE_LIST.md, only fetched by the optional refresh job
+COURSE_LIST_URL = "https://raw.githubusercontent.com/EgiStr/itera-warkrs-siakad-flask/refs/heads/main/COURSE_LIST.md"
+
+def get_current_semester():
+    """Academic semester of today, e.g. 2025/2026-1 (odd: Aug-Jan, even: Feb-Jul)"""
+    now = datetime.now()
+    year = now.year
+    month = now.month
+    if month >= 8 or month <= 1:
+        # Odd semester (Ganjil)
+        if month == 1:
+            year -= 1  # Jan is still previous academic year
+        return f"{year}/{year+1}-1"
+    # Even semester (Genap)
+    return f"{year-1}/{year}-2"
 
-        def get_current_semester():
-            now = datetime.now()
-            year = now.year
-            month = now.month
-            # Assume semester 1: Aug-Jan, semester 2: Feb-Jul
-            if month >= 8 or month <= 1:
-                # Odd semester (Ganjil)
-                sem = 1
-                if month == 1:
-                    year -= 1  # Jan is still previous academic year
-            else:
-                # Even semester (Genap)
-                sem = 2
-            if sem == 1:
-                return f"{year}/{year+1}-1"
-            else:
-                return f"{year-1}/{year}-2"
-
-        # Load course data from GitHub URL
-        course_url = "https://raw.githubusercontent.com/EgiStr/itera-warkrs-siakad-flask/refs/heads/main/COURSE_LIST.md"
-        print(f"📚 Loading course data from GitHub: {course_url}")
+def get_system_user_id():
+    """ID of the user recorded as creator of imported courses (created if missing)"""
+    system_user = User.query.filter_by(nim='SYSTEM').first() or User.query.first()
+    if not system_user:
+        system_user = User(
+            nim='SYSTEM',
+            name='System User',
+            password_hash=bcrypt.generate_password_hash('system_password').decode('utf-8')
+        )
+        db.session.add(system_user)
+        db.session.flush()  # Get the ID
+    return system_user.id
+
+def bulk_insert_courses(rows, batch_size=500):
+    """
+    Insert course rows, skipping class_ids that already exist
+    
+    PostgreSQL and SQLite get INSERT ... ON CONFLICT (class_id) DO NOTHING, so
+    a concurrent import (another worker starting up) cannot fail the batch;
+    other databases get a plain multi-row insert of the diffed rows. Either
+    way a batch is one statement.
+    
+    Args:
+        rows: Course column dicts (without the conflicting class_ids)
+        batch_size: Rows per statement
+    
+    Returns:
+        Number of rows inserted
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+    
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if dialect_insert is not None:
+            statement = dialect_insert(Course).values(batch).on_conflict_do_nothing(index_elements=['class_id'])
+        else:
+            statement = db.insert(Course).values(batch)
+        result = db.session.execute(statement)
+        inserted += result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(batch)
+    return inserted
+
+def migrate_courses_from_md(content=None):
+    """
+    Import COURSE_LIST.md into the courses table (new class_ids only)
+    
+    Pipeline: load (bundled catalog, or parse the given markdown) -> load
+    existing class_ids (one query) -> diff -> bulk insert (one statement per
+    500 rows) -> commit, with the time of each stage printed and returned.
+    No network access: the remote list is only read by refresh_courses_from_remote.
+    
+    Args:
+        content: Markdown text (default: the bundled catalog compiled from the repo's COURSE_LIST.md)
+    
+    Returns:
+        Dict with parsed, added and timings_ms (None if the import failed)
+    """
+    timings = {}
+    started = time.perf_counter()
+    
+    def stage(name):
+        nonlocal started
+        now = time.perf_counter()
+        timings[name] = round((now - started) * 1000, 1)
+        started = now
+    
+    try:
+        if content is None:
+            bundled = get_bundled_catalog()
+            rows = bundled.get_rows()
+            source = f"bundled catalog {bundled.version}"
+        else:
+            rows = parse_course_list_md(content)
+            source = "COURSE_LIST.md"
+        stage('load')
         
-        response = requests.get(course_url, timeout=30)
-        response.raise_for_status()
-        content = response.text
-            
-        lines = content.split('\n')
-        in_table = False
-        courses_added = 0
-        current_department = None
-        current_faculty = None
-        semester = get_current_semester()
+        existing = set(db.session.execute(db.select(Course.class_id)).scalars())
+        stage('existing')
         
-        for line in lines:
-            line = line.strip()
-            
-            # Detect department/faculty section (e.g., ## 📊 SAINS DATA (SD))
-            if line.startswith('##'):
-                # Set department/faculty for following courses
-                current_department = line.replace('##', '').strip()
-                # Optionally, parse faculty from department name if needed
-                # Example: "📊 SAINS DATA (SD)" -> department: "SAINS DATA (SD)"
-                # You can set current_faculty here if you want to map by section
-                continue
-
-            # Skip empty lines and headers
-            if not line or line.startswith('#') or line.startswith('-') or line.startswith('**'):
-                continue
-            
-            # Detect table start (header row)
-            if 'Kode Mata Kuliah' in line and 'Nama Mata Kuliah' in line:
-                in_table = True
-                continue
-            
-            # Skip table separator row
-            if in_table and line.startswith('|--'):
-                continue
-            
-            # Parse table rows
-            if in_table and line.startswith('|') and line.endswith('|'):
-                parts = [part.strip() for part in line.split('|')]
-                
-                # Table format: | Kode | Nama | Kelas | Class ID |
-                if len(parts) >= 5:
-                    kode = parts[1].strip()
-                    nama = parts[2].strip()
-                    kelas = parts[3].strip()
-                    class_id = parts[4].strip()
-                    
-                    if kode and nama and kelas and class_id:
-                        # Check if course already exists
-                        existing_course = Course.query.filter_by(class_id=class_id).first()
-                        if not existing_course:
-                            # Create new course - need a default user for created_by
-                            system_user = User.query.filter_by(nim='SYSTEM').first()
-                            if not system_user:
-                                system_user = User.query.first()
-                            
-                            # If still no user, create a system user
-                            if not system_user:
-                                system_user = User(
-                                    nim='SYSTEM',
-                                    name='System User',
-                                    password_hash=bcrypt.generate_password_hash('system_password').decode('utf-8')
-                                )
-                                db.session.add(system_user)
-                                db.session.flush()  # Get the ID
-                            
-                            # Determine faculty from course code
-                            faculty_code = kode[:2] if kode else ''
-                            faculty_map = {
-                                'AR': 'Fakultas Teknik - Arsitektur',
-                                'IF': 'Fakultas Teknik - Informatika', 
-                                'TK': 'Fakultas Teknik - Teknik Kimia',
-                                'TS': 'Fakultas Teknik - Teknik Sipil',
-                                'TI': 'Fakultas Teknik - Teknik Industri',
-                                'TM': 'Fakultas Teknik - Teknik Mesin',
-                                'TL': 'Fakultas Teknik - Teknik Lingkungan',
-                                'TE': 'Fakultas Teknik - Teknik Elektro',
-                                'GL': 'Fakultas Teknik - Teknik Geologi',
-                                'PW': 'Fakultas Teknik - Perencanaan Wilayah',
-                                'SD': 'Fakultas Teknik - Sains Data',
-                                'BT': 'Fakultas Teknobiologi',
-                                'KP': 'Fakultas Teknik - Kepengurusan'
-                            }
-                            
-                            faculty = faculty_map.get(faculty_code, current_faculty or 'Lainnya')
-                            
-                            new_course = Course(
-                                course_code=kode,
-                                course_name=nama,
-                                class_type=kelas,
-                                class_id=class_id,
-                                created_by=system_user.id,
-                                department=current_department,
-                                faculty=faculty,
-                                semester=semester
-                            )
-                            db.session.add(new_course)
-                            courses_added += 1
-            
-            # Stop parsing if we hit end of table section
-            if in_table and line.startswith('---'):
-                break
+        new_rows = [row for row in rows if row['class_id'] not in existing]
+        stage('diff')
         
-        if courses_added > 0:
+        courses_added = 0
+        if new_rows:
+            created_by = get_system_user_id()
+            semester = get_current_semester()
+            courses_added = bulk_insert_courses([
+                {**row, 'semester': semester, 'created_by': created_by} for row in new_rows
+            ])
             db.session.commit()
-            print(f"✅ Migrated {courses_added} courses from COURSE_LIST.md to database")
+        stage('write')
+        
+        if courses_added > 0:
+            get_course_catalog().bump()
+            get_course_search().rebuild()
+            stage('reindex')
+            print(f"✅ Migrated {courses_added} courses from {source} to database")
+        elif rows:
+            print(f"✅ {source} already imported ({len(rows)} courses)")
         else:
-            print("⚠️  No courses found in COURSE_LIST.md to migrate")
-            
-    except requests.RequestException as e:
-        print(f"⚠️  Failed to load course data from GitHub: {e}")
-        print("⚠️  Using fallback courses due to network error")
-    except FileNotFoundError:
-        print("⚠️  COURSE_LIST.md not found for migration")
+            print(f"⚠️  No courses found in {source} to migrate")
+        print(f"⏱️  Course import: {len(rows)} parsed, {len(new_rows)} new | "
+              + ', '.join(f"{name} {ms}ms" for name, ms in timings.items()))
+        
+        return {'parsed': len(rows), 'added': courses_added, 'timings_ms': timings}
+    
     except Exception as e:
-        print(f"⚠️  Error migrating courses from GitHub: {e}")
+        print(f"⚠️  Error migrating courses from {'COURSE_LIST.md' if content else 'bundled catalog'}: {e}")
         db.session.rollback()
+    return None
 
-def load_course_list_from_md():
-    """Fallback function to load courses from GitHub COURSE_LIST.md URL"""
+def refresh_courses_from_remote(url=COURSE_LIST_URL, timeout=30):
+    """
+    Optional job: import courses added to the remote COURSE_LIST.md since the bundled build
+    
+    Args:
+        url: COURSE_LIST.md URL (default: the GitHub repository)
+        timeout: Download timeout in seconds
+    
+    Returns:
+        migrate_courses_from_md result, or None if the download or import failed
+    """
+    import requests
+    
+    print(f"📚 Refreshing course data from {url}")
     try:
-        import requests
-        
-        # Load course data from GitHub URL
-        course_url = "https://raw.githubusercontent.com/EgiStr/itera-warkrs-siakad-flask/refs/heads/main/COURSE_LIST.md"
-        print(f"📚 Loading course data from GitHub: {course_url}")
-        
-        response = requests.get(course_url, timeout=30)
+        response = requests.get(url, timeout=timeout)
         response.raise_for_status()
-        content = response.text
-        
-        courses = []
-        
-        # Parse markdown table format
-        lines = content.split('\n')
-        in_table = False
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines and headers
-            if not line or line.startswith('#') or line.startswith('-') or line.startswith('**'):
-                continue
-            
-            # Detect table start (header row)
-            if 'Kode Mata Kuliah' in line and 'Nama Mata Kuliah' in line:
-                in_table = True
-                continue
-            
-            # Skip table separator row
-            if in_table and line.startswith('|--'):
-                continue
-            
-            # Parse table rows
-            if in_table and line.startswith('|') and line.endswith('|'):
-                parts = [part.strip() for part in line.split('|')]
-                
-                # Table format: | Kode | Nama | Kelas | Class ID |
-                if len(parts) >= 5:  # Including empty first and last parts from split
-                    kode = parts[1].strip()
-                    nama = parts[2].strip()
-                    kelas = parts[3].strip()
-                    class_id = parts[4].strip()
-                    
-                    if kode and nama and kelas and class_id:
-                        # Create course identifier with class
-                        course_label = f"{kode} ({kelas}) - {nama}"
-                        courses.append((class_id, course_label))
-            
-            # Stop parsing if we hit end of table section
-            if in_table and line.startswith('---'):
-                break
-        
-        # Sort courses by name for better UX
-        courses.sort(key=lambda x: x[1])
-        return courses
-        
     except requests.RequestException as e:
-        print(f"⚠️  Failed to load course data from GitHub: {e}")
-        print("⚠️  Using fallback courses due to network error")
-        # Fallback to some default courses
-        return [
-            ('37053', 'AR25-11001 (RA) - Studio Dasar 1'),
-            ('37055', 'AR25-11001 (RB) - Studio Dasar 1'),
-            ('37056', 'AR25-11001 (RC) - Studio Dasar 1'),
-            ('35998', 'IF25-40033 - Algoritma dan Pemrograman'),
-            ('36847', 'TK25-40001 - Teknik Kimia Dasar')
-        ]
-    except FileNotFoundError:
-        print("⚠️  COURSE_LIST.md not found, using fallback courses")
-        # Fallback to some default courses
-        return [
-            ('37053', 'AR25-11001 (RA) - Studio Dasar 1'),
-            ('37055', 'AR25-11001 (RB) - Studio Dasar 1'),
-            ('37056', 'AR25-11001 (RC) - Studio Dasar 1'),
-            ('35998', 'IF25-40033 - Algoritma dan Pemrograman'),
-            ('36847', 'TK25-40001 - Teknik Kimia Dasar')
-        ]
+        print(f"⚠️  Failed to load course data from {url}: {e}")
+        return None
+    return migrate_courses_from_md(content=response.text)
+
+def load_course_list_from_bundle():
+    """Fallback course choices from the bundled catalog (no database, no network)"""
+    courses = [(row['class_id'], format_course_label(row)) for row in get_bundled_catalog().get_rows()]
+    
+    # Sort courses by name for better UX
+    courses.sort(key=lambda x: x[1])
+    return courses
+
+def resolve_target_courses(class_ids):
+    """Convert selected class_ids to the controller format (course_code -> class_id)"""
+    try:
+        by_class_id = get_course_catalog().get().by_class_id
     except Exception as e:
-        print(f"⚠️  Error parsing course data from GitHub: {e}")
-        return [
-            ('fallback1', 'Error loading courses - please check network connection'),
-            ('fallback2', 'Using fallback course list')
-        ]
+        print(f"⚠️  Error loading course catalog: {e}")
+        by_class_id = {}
+    labels = {} if by_class_id else dict(load_course_list())
+    
+    target_courses_dict = {}
+    for class_id in class_ids:
+        if class_id in by_class_id:
+            target_courses_dict[by_class_id[class_id]['course_code']] = class_id
+        elif class_id in labels:
+            # Extract course code from label (e.g., "AR25-11001 (RA) - Studio Dasar 1")
+            target_courses_dict[labels[class_id].split(' ')[0]] = class_id
+        else:
+            # Fallback: use class_id as both key and value
+            target_courses_dict[class_id] = class_id
+    return target_courses_dict
 
 # WAR KRS Background Process
-def run_war_process(user_id, session_id):
+def run_war_process(user_id, session_id, lease_token=None):
     """Run WAR KRS process in background thread - simplified version"""
     global active_sessions
     
+    # Renew the run lease in the background while this thread runs
+    heartbeat = get_run_lock().heartbeat(user_id, lease_token)
+    
     # CRITICAL: Set up Flask application context for database access
     with app.app_context():
         try:
@@ -682,6 +737,17 @@ def run_war_process(user_id, session_id):
             
             log_activity(user_id, f"Session {user_id} marked as active in active_sessions", "INFO", session_id)
             
+            # Shared status for every web worker, then progress to it and to open
+            # status streams (no throttling: one update per cycle)
+            get_status_store().start(user_id, session_id, task_type='threading', status='initializing',
+                                     started_at=active_sessions[user_id]['started_at'])
+            progress = ProgressPublisher(session_id, user_id, min_interval=0)
+            progress.publish(status='running', cycle=0, successful_courses=[], last_activity=datetime.utcnow())
+            
+            def stop_requested_elsewhere():
+                """Stop requested through another web worker (checked when Redis is down)"""
+                return (get_status_store().get(user_id) or {}).get('status') == 'stopping'
+            
             # Try to use existing controller with fallback to simplified approach
             try:
                 # Attempt to use existing business logic
@@ -694,21 +760,7 @@ def run_war_process(user_id, session_id):
                 
                 # target_courses_list now contains class_ids (from the form)
                 # Convert to format expected by existing controller (course_code -> class_id)
-                target_courses_dict = {}
-                
-                # Load course list to get mapping
-                available_courses = load_course_list()
-                course_id_to_info = {class_id: label for class_id, label in available_courses}
-                
-                for class_id in target_courses_list:
-                    if class_id in course_id_to_info:
-                        # Extract course code from label (e.g., "AR25-11001 (RA) - Studio Dasar 1")
-                        course_info = course_id_to_info[class_id]
-                        course_code = course_info.split(' ')[0]  # Get "AR25-11001"
-                        target_courses_dict[course_code] = class_id
-                    else:
-                        # Fallback: use class_id as both key and value
-                        target_courses_dict[class_id] = class_id
+                target_courses_dict = resolve_target_courses(target_courses_list)
                 
                 log_activity(user_id, f"Target courses configured: {list(target_courses_dict.keys())}", "INFO", session_id)
                 
@@ -735,6 +787,14 @@ def run_war_process(user_id, session_id):
                 
                 log_activity(user_id, f"Controller initialized successfully. Remaining targets: {len(controller.remaining_targets)}", "SUCCESS", session_id)
                 
+                # Warm up DNS, pooled connections and cookies before the first cycle
+                if default_settings.get('warmup_enabled', True) and hasattr(controller, 'warm_up'):
+                    try:
+                        warmup_report = controller.warm_up()
+                        log_activity(user_id, f"Session warm-up completed in {warmup_report['total_ms']}ms (dns: {warmup_report['dns_ms']}ms, connect: {warmup_report['connect_ms']}ms, probe: {warmup_report['probe_ms']}ms, authenticated: {warmup_report['authenticated']})", "INFO" if warmup_report['authenticated'] else "WARNING", session_id)
+                    except Exception as warmup_error:
+                        log_activity(user_id, f"Session warm-up failed: {str(warmup_error)}", "WARNING", session_id)
+                
                 # Send Telegram start notification
                 if telegram_config:
                     try:
@@ -768,6 +828,11 @@ def run_war_process(user_id, session_id):
                         log_activity(user_id, "Stop requested - breaking WAR loop", "INFO", session_id)
                         break
                     
+                    # Another process owning the run lease means this run must end
+                    if heartbeat.lost.is_set():
+                        log_activity(user_id, "Run lease taken by another WAR process - stopping", "WARNING", session_id)
+                        break
+                    
                     try:
                         log_activity(user_id, f"Starting cycle {controller.cycle_count + 1}", "INFO", session_id)
                         
@@ -840,33 +905,50 @@ def run_war_process(user_id, session_id):
                                 
                                 break
                         
-                        # Update courses obtained
+                        # Update courses obtained and bandwidth totals
                         war_session.courses_obtained = json.dumps(successful_courses)
+                        if hasattr(controller, 'session') and hasattr(controller.session, 'transfer_stats'):
+                            war_session.set_transfer_totals(controller.session.transfer_stats.totals())
                         db.session.commit()
+                        progress.publish(
+                            cycle=controller.cycle_count,
+                            successful_courses=successful_courses,
+                            remaining_targets=controller.remaining_targets,
+                            last_activity=war_session.last_activity
+                        )
                         
                         # Check if all courses obtained
                         if not controller.remaining_targets:
                             log_activity(user_id, "All target courses obtained! WAR process completed.", "SUCCESS", session_id)
                             break
                         
-                        # Wait before next cycle
+                        # Wait before next cycle (returns early on stop request)
                         log_activity(user_id, f"Waiting {cycle_delay} seconds before next cycle", "INFO", session_id)
-                        time.sleep(cycle_delay)
+                        if get_stop_channel().wait(session_id, cycle_delay, stop_requested_elsewhere):
+                            log_activity(user_id, "Stop requested - breaking WAR loop", "INFO", session_id)
+                            break
                         
                     except Exception as e:
                         log_activity(user_id, f"Error in cycle {controller.cycle_count}: {str(e)}", "ERROR", session_id)
                         
                         # Continue to next cycle after error
-                        time.sleep(10)  # Wait longer after error
+                        if get_stop_channel().wait(session_id, 10, stop_requested_elsewhere):  # Wait longer after error
+                            break
                 
                 # Update final session status
                 war_session.status = 'completed' if not controller.remaining_targets else 'stopped'
                 war_session.stopped_at = datetime.utcnow()
                 db.session.commit()
+                progress.close(status=war_session.status, cycle=controller.cycle_count,
+                               successful_courses=successful_courses, last_activity=war_session.stopped_at)
                 
                 final_message = f"WAR process ended. Obtained {len(successful_courses)} courses in {controller.cycle_count} cycles."
                 log_activity(user_id, final_message, "INFO", session_id)
                 
+                if hasattr(controller, 'session') and hasattr(controller.session, 'get_transfer_stats'):
+                    bandwidth = controller.session.get_transfer_stats()
+                    log_activity(user_id, f"Bandwidth: {bandwidth['totals']['bytes_compressed']} bytes received ({bandwidth['totals']['bytes_decompressed']} decompressed) over {bandwidth['totals']['requests']} requests | Details: {json.dumps(bandwidth['endpoints'])}", "INFO", session_id)
+                
                 # Send Telegram completion notification
                 if telegram_config:
                     try:
@@ -890,6 +972,7 @@ def run_war_process(user_id, session_id):
                 
                 # Simplified WAR process as fallback
                 run_simplified_war_process(user_id, session_id, target_courses_list, cookies, telegram_config)
+                progress.close(status=WarSession.query.get(session_id).status)
             
         except Exception as e:
             # Handle any unexpected errors
@@ -899,11 +982,15 @@ def run_war_process(user_id, session_id):
             db.session.commit()
             
             log_activity(user_id, f"WAR process failed with error: {str(e)}", "ERROR", session_id)
+            ProgressPublisher(session_id, user_id).close(status='error', status_message=str(e))
         
         finally:
             # Always remove from active sessions
             if user_id in active_sessions:
                 del active_sessions[user_id]
+            get_stop_channel().clear(session_id)
+            heartbeat.stop()
+            get_run_lock().release(user_id, lease_token)
 
 def run_simplified_war_process(user_id, session_id, target_courses_list, cookies, telegram_config=None):
     """Simplified WAR process as fallback"""
@@ -1010,7 +1097,8 @@ def run_simplified_war_process(user_id, session_id, target_courses_list, cookies
                 break
             
             # Wait before next cycle
-            time.sleep(5)
+            if get_stop_channel().wait(session_id, 5):
+                break
         
         # Update final session status
         war_session.status = 'completed' if len(successful_courses) >= len(target_courses_list) else 'stopped'
@@ -1043,46 +1131,16 @@ def run_simplified_war_process(user_id, session_id, target_courses_list, cookies
 @login_required
 def dashboard():
     """Main dashboard showing WAR status and controls"""
-    # Get current WAR session
-    current_session = WarSession.query.filter_by(
-        user_id=current_user.id,
-        status='active'
-    ).first()
-    
-    # Get recent activity logs
-    recent_logs = ActivityLog.query.filter_by(
-        user_id=current_user.id
-    ).order_by(ActivityLog.timestamp.desc()).limit(10).all()
+    # Active session, recent logs and parsed courses in one query (cached briefly)
+    view = get_dashboard_provider().get(current_user)
     
-    # Get session status
-    session_status = active_sessions.get(current_user.id, {})
-    
-    # Get user settings
-    settings = current_user.settings
-    
-    # Parse JSON data for template
-    target_courses = []
-    obtained_courses = []
-    
-    if settings and settings.target_courses:
-        try:
-            target_courses = json.loads(settings.target_courses)
-        except (json.JSONDecodeError, TypeError):
-            target_courses = []
+    # Get session status (shared by every web worker)
+    run_status = get_run_status(current_user.id) or {}
+    run_state = run_status.get('status')
+    session_status = {'status': run_state if run_state == 'stopping' else
+                      'active' if run_state in RUNNING_STATUSES else run_state}
     
-    if current_session and current_session.courses_obtained:
-        try:
-            obtained_courses = json.loads(current_session.courses_obtained)
-        except (json.JSONDecodeError, TypeError):
-            obtained_courses = []
-    
-    return render_template('dashboard.html',
-                         current_session=current_session,
-                         recent_logs=recent_logs,
-                         session_status=session_status,
-                         settings=settings,
-                         target_courses=target_courses,
-                         obtained_courses=obtained_courses)
+    return render_template('dashboard.html', session_status=session_status, **view)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -1158,6 +1216,7 @@ def settings():
         settings.updated_at = datetime.utcnow()
         
         db.session.commit()
+        get_dashboard_provider().invalidate(current_user.id)
         
         log_activity(current_user.id, "Settings updated successfully (cookies encrypted)")
         flash('Pengaturan berhasil disimpan! Cookies telah dienkripsi untuk keamanan.', 'success')
@@ -1172,14 +1231,29 @@ def settings():
         if current_user.settings.target_courses:
             form.target_courses.data = json.loads(current_user.settings.target_courses)
     
-    return render_template('settings.html', form=form)
+    # Only the selected courses are rendered; the page pages through /api/courses
+    selected_ids = form.target_courses.data or []
+    labels = dict(form.target_courses.choices)
+    try:
+        by_class_id = get_course_catalog().get().by_class_id
+    except Exception:
+        by_class_id = {}
+    selected_courses = []
+    for class_id in selected_ids:
+        if class_id in by_class_id:
+            selected_courses.append(course_api_record(by_class_id[class_id], labels.get(class_id, class_id)))
+        elif class_id in labels:
+            selected_courses.append({'value': class_id, 'label': labels[class_id]})
+    form.target_courses.choices = [choice for choice in form.target_courses.choices if choice[0] in selected_ids]
+    
+    return render_template('settings.html', form=form, selected_courses=selected_courses)
 
 @app.route('/war/start', methods=['POST'])
 @login_required
 def start_war():
     """Start WAR process"""
-    # Check if already running
-    if current_user.id in active_sessions:
+    # Check if already running (this process, then any process via the run lease)
+    if current_user.id in active_sessions or get_run_lock().is_held(current_user.id):
         flash('WAR process sudah berjalan!', 'warning')
         return redirect(url_for('dashboard'))
     
@@ -1193,10 +1267,22 @@ def start_war():
         flash('Harap pilih mata kuliah target terlebih dahulu.', 'error')
         return redirect(url_for('settings'))
     
-    # Create new WAR session
-    war_session = WarSession(user_id=current_user.id)
-    db.session.add(war_session)
-    db.session.commit()
+    # Take the user's run lease atomically before recording anything; the run
+    # renews and releases it
+    lease_token = get_run_lock().acquire(current_user.id)
+    if not lease_token:
+        flash('WAR process sudah berjalan!', 'warning')
+        return redirect(url_for('dashboard'))
+    
+    try:
+        # Create new WAR session
+        war_session = WarSession(user_id=current_user.id)
+        db.session.add(war_session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        get_run_lock().release(current_user.id, lease_token)
+        raise
     
     # Log start attempt
     log_activity(current_user.id, "User initiated WAR KRS process from dashboard", "INFO", war_session.id)
@@ -1208,6 +1294,7 @@ def start_war():
             settings = current_user.settings
             
             if not settings:
+                get_run_lock().release(current_user.id, lease_token)
                 flash('User settings not found', 'error')
                 return redirect(url_for('settings'))
             
@@ -1218,6 +1305,7 @@ def start_war():
             }
             
             if not cookies['ci_session'] or not cookies['cf_clearance']:
+                get_run_lock().release(current_user.id, lease_token)
                 flash('SIAKAD cookies tidak valid atau gagal didekripsi', 'error')
                 return redirect(url_for('settings'))
             
@@ -1231,21 +1319,12 @@ def start_war():
             target_courses_list = json.loads(settings.target_courses) if settings.target_courses else []
             
             if not target_courses_list:
+                get_run_lock().release(current_user.id, lease_token)
                 flash('No target courses selected', 'error')
                 return redirect(url_for('settings'))
             
             # Convert target courses to expected format
-            available_courses = load_course_list()
-            course_id_to_info = {class_id: label for class_id, label in available_courses}
-            
-            target_courses_dict = {}
-            for class_id in target_courses_list:
-                if class_id in course_id_to_info:
-                    course_info = course_id_to_info[class_id]
-                    course_code = course_info.split(' ')[0]  # Get course code
-                    target_courses_dict[course_code] = class_id
-                else:
-                    target_courses_dict[class_id] = class_id
+            target_courses_dict = resolve_target_courses(target_courses_list)
             
             # Setup Telegram configuration
             telegram_config = None
@@ -1255,44 +1334,34 @@ def start_war():
                     'chat_id': settings.telegram_chat_id
                 }
             
-            # Submit task to Celery
-            task = run_war_task.delay(
+            # Submit task to Celery (one long task, or one short task per cycle)
+            war_task = run_war_cycle_task if default_settings.get('execution_mode') == 'cycle' else run_war_task
+            task = war_task.delay(
                 user_id=current_user.id,
                 session_id=war_session.id,
                 cookies=cookies,
                 urls=urls,
                 target_courses=target_courses_dict,
                 settings=default_settings,
-                telegram_config=telegram_config
+                telegram_config=telegram_config,
+                lease_token=lease_token
             )
             
-            # Track task
-            celery_tasks[current_user.id] = {
-                'task_id': task.id,
-                'session_id': war_session.id,
-                'started_at': datetime.utcnow(),
-                'status': 'queued'
-            }
-            
-            # Update session status  
-            active_sessions[current_user.id] = {
-                'session_id': war_session.id,
-                'status': 'active',
-                'started_at': datetime.utcnow(),
-                'stop_requested': False,
-                'task_id': task.id
-            }
+            # Track task where every web worker can see it
+            get_status_store().start(current_user.id, war_session.id, task_type='celery', task_id=task.id,
+                                     status='queued', started_at=datetime.utcnow())
             
             flash(f'WAR KRS process berhasil dimulai dengan Celery! Task ID: {task.id[:8]}...', 'success')
             log_activity(current_user.id, f"Celery WAR task started with ID {task.id}", "SUCCESS", war_session.id)
             
         except Exception as e:
+            get_run_lock().release(current_user.id, lease_token)
             flash(f'Gagal memulai WAR process dengan Celery: {str(e)}', 'error')
             log_activity(current_user.id, f"Celery WAR task failed: {str(e)}", "ERROR", war_session.id)
     else:
         # Use traditional background thread approach for local development
         # Start background thread
-        thread = threading.Thread(target=run_war_process, args=(current_user.id, war_session.id))
+        thread = threading.Thread(target=run_war_process, args=(current_user.id, war_session.id, lease_token))
         thread.daemon = True
         thread.start()
         
@@ -1306,6 +1375,7 @@ def start_war():
             flash('Gagal memulai WAR process. Periksa logs untuk detail.', 'error')
             log_activity(current_user.id, "WAR KRS background thread failed to become active", "ERROR", war_session.id)
     
+    get_dashboard_provider().invalidate(current_user.id)
     return redirect(url_for('dashboard'))
 
 @app.route('/war/stop', methods=['POST'])
@@ -1313,22 +1383,27 @@ def start_war():
 def stop_war():
     """Stop WAR process"""
     
-    if CELERY_AVAILABLE and current_user.id in celery_tasks:
+    run_status = get_run_status(current_user.id)
+    running = bool(run_status) and run_status.get('status') in RUNNING_STATUSES
+    
+    if CELERY_AVAILABLE and running and run_status.get('task_type') == 'celery':
         # Stop Celery task
         try:
-            task_info = celery_tasks[current_user.id]
-            task_id = task_info['task_id']
+            task_id = run_status['task_id']
+            session_id = run_status['session_id']
+            
+            # Signal the running task directly; it exits at the next wait point
+            # and records its final status itself
+            get_stop_channel().request_stop(session_id)
             
-            # Revoke the task
-            celery_app.control.revoke(task_id, terminate=True)
+            # Revoke the task in case it is still queued
+            celery_app.control.revoke(task_id)
             
-            # Send stop signal via Celery task
-            stop_task = stop_war_task.delay(current_user.id)
+            # Send stop signal via Celery task (marks the DB row as fallback)
+            stop_task = stop_war_task.delay(current_user.id, session_id)
             
-            # Clean up tracking
-            del celery_tasks[current_user.id]
-            if current_user.id in active_sessions:
-                del active_sessions[current_user.id]
+            # Every web worker reports the run as stopping until the task finishes
+            ProgressPublisher(session_id, current_user.id).publish(status='stopping')
                 
             flash(f'WAR process berhasil dihentikan! Stop task ID: {stop_task.id[:8]}...', 'success')
             log_activity(current_user.id, f"Celery WAR task stopped: {task_id}", "INFO")
@@ -1337,15 +1412,22 @@ def stop_war():
             flash(f'Error menghentikan Celery task: {str(e)}', 'error')
             log_activity(current_user.id, f"Error stopping Celery task: {str(e)}", "ERROR")
             
-    elif current_user.id in active_sessions:
-        # Stop threading-based task
-        active_sessions[current_user.id]['stop_requested'] = True
-        active_sessions[current_user.id]['status'] = 'stopping'
+    elif current_user.id in active_sessions or running:
+        # Stop threading-based task (its thread may live in another web worker)
+        if current_user.id in active_sessions:
+            session_id = active_sessions[current_user.id]['session_id']
+            active_sessions[current_user.id]['stop_requested'] = True
+            active_sessions[current_user.id]['status'] = 'stopping'
+        else:
+            session_id = run_status['session_id']
+        get_stop_channel().request_stop(session_id)
+        ProgressPublisher(session_id, current_user.id).publish(status='stopping')
         flash('WAR process sedang dihentikan...', 'info')
         log_activity(current_user.id, "Threading WAR process stop requested", "INFO")
     else:
         flash('Tidak ada WAR process yang sedang berjalan.', 'warning')
     
+    get_dashboard_provider().invalidate(current_user.id)
     return redirect(url_for('dashboard'))
 
 # API endpoints for Vercel compatibility
@@ -1354,8 +1436,8 @@ def stop_war():
 def api_start_war():
     """API endpoint to start WAR process (Vercel-compatible)"""
     try:
-        # Check if already running
-        if current_user.id in active_sessions:
+        # Check if already running (this process, then any process via the run lease)
+        if current_user.id in active_sessions or get_run_lock().is_held(current_user.id):
             return jsonify({"error": "WAR process already running"}), 400
         
         # Check settings
@@ -1366,14 +1448,21 @@ def api_start_war():
         if not current_user.settings.target_courses:
             return jsonify({"error": "No target courses selected"}), 400
         
-        # Create new WAR session
-        war_session = WarSession(user_id=current_user.id)
-        db.session.add(war_session)
-        db.session.commit()
-        
-        # Run serverless WAR process
-        from vercel_war import run_war_process_serverless
-        result = run_war_process_serverless(current_user.id, war_session.id, app, db)
+        # Hold the user's run lease for the whole serverless run
+        lease_token = get_run_lock().acquire(current_user.id)
+        if not lease_token:
+            return jsonify({"error": "WAR process already running"}), 409
+        try:
+            # Create new WAR session
+            war_session = WarSession(user_id=current_user.id)
+            db.session.add(war_session)
+            db.session.commit()
+            
+            # Run serverless WAR process
+            from vercel_war import run_war_process_serverless
+            result = run_war_process_serverless(current_user.id, war_session.id, app, db)
+        finally:
+            get_run_lock().release(current_user.id, lease_token)
         
         return jsonify(result)
         
@@ -1403,90 +1492,298 @@ def api_war_status():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+LOG_LEVELS = ('INFO', 'SUCCESS', 'WARNING', 'ERROR')
+LOG_PAGE_SIZE = 50
+LOG_COUNT_CAP = 10000  # Totals above this are shown as "10000+" instead of counting the whole history
+
+def encode_log_cursor(log):
+    """Opaque keyset cursor: (timestamp, id) of a log row"""
+    return base64.urlsafe_b64encode(f"{log.timestamp.isoformat()}|{log.id}".encode()).decode().rstrip('=')
+
+def decode_log_cursor(cursor):
+    """Decode a log cursor into (timestamp, id); raises ValueError if malformed"""
+    timestamp, log_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+    return datetime.fromisoformat(timestamp), int(log_id)
+
+def query_log_page(user_id, before=None, after=None, session_id=None, level=None, limit=LOG_PAGE_SIZE):
+    """
+    One page of a user's activity logs, newest first, by keyset on (timestamp, id)
+    
+    Every page is an index range scan of `limit + 1` rows, however deep it is;
+    the total is a count capped at LOG_COUNT_CAP rows.
+    
+    Args:
+        user_id: User ID
+        before: (timestamp, id) cursor; return the logs older than it
+        after: (timestamp, id) cursor; return the logs newer than it
+        session_id: Only logs of this WAR session
+        level: Only logs of this level
+        limit: Page size
+    
+    Returns:
+        Dict with items, next_cursor (older page), prev_cursor (newer page),
+        approx_total and total_capped
+    """
+    query = ActivityLog.query.filter(ActivityLog.user_id == user_id)
+    if session_id is not None:
+        query = query.filter(ActivityLog.session_id == session_id)
+    if level:
+        query = query.filter(ActivityLog.level == level)
+    position = db.tuple_(ActivityLog.timestamp, ActivityLog.id)
+    
+    if after is not None:
+        rows = query.filter(position > tuple(after)).order_by(
+            ActivityLog.timestamp.asc(), ActivityLog.id.asc()
+        ).limit(limit + 1).all()
+        has_newer, has_older = len(rows) > limit, True
+        items = list(reversed(rows[:limit]))
+    else:
+        if before is not None:
+            query_page = query.filter(position < tuple(before))
+        else:
+            query_page = query
+        rows = query_page.order_by(
+            ActivityLog.timestamp.desc(), ActivityLog.id.desc()
+        ).limit(limit + 1).all()
+        has_newer, has_older = before is not None, len(rows) > limit
+        items = rows[:limit]
+    
+    counted = db.session.execute(
+        db.select(db.func.count()).select_from(
+            query.with_entities(ActivityLog.id).limit(LOG_COUNT_CAP + 1).subquery()
+        )
+    ).scalar()
+    
+    return {
+        'items': items,
+        'next_cursor': encode_log_cursor(items[-1]) if items and has_older else None,
+        'prev_cursor': encode_log_cursor(items[0]) if items and has_newer else None,
+        'approx_total': min(counted, LOG_COUNT_CAP),
+        'total_capped': counted > LOG_COUNT_CAP
+    }
+
+def parse_log_filters(args):
+    """
+    Read before/after/session_id/level/limit from request args
+    
+    Returns:
+        (filters dict for query_log_page, error message or None)
+    """
+    filters = {
+        'session_id': args.get('session_id', type=int),
+        'level': args.get('level', '', type=str).upper() or None,
+        'limit': min(max(args.get('limit', LOG_PAGE_SIZE, type=int), 1), 200)
+    }
+    if filters['level'] and filters['level'] not in LOG_LEVELS:
+        return filters, f"level must be one of {', '.join(LOG_LEVELS)}"
+    for name in ('before', 'after'):
+        cursor = args.get(name, '', type=str)
+        if cursor:
+            try:
+                filters[name] = decode_log_cursor(cursor)
+            except ValueError:
+                return filters, f"Invalid {name} cursor"
+    return filters, None
+
+def log_api_record(log):
+    """Serialize one activity log row for /api/logs"""
+    return {
+        'id': log.id,
+        'session_id': log.session_id,
+        'level': log.level,
+        'message': log.message,
+        'timestamp': log.timestamp.isoformat() if log.timestamp else None
+    }
+
 @app.route('/logs')
 @login_required
 def logs():
     """View activity logs"""
-    page = request.args.get('page', 1, type=int)
-    logs = ActivityLog.query.filter_by(
-        user_id=current_user.id
-    ).order_by(ActivityLog.timestamp.desc()).paginate(
-        page=page, per_page=50, error_out=False
-    )
-    
-    return render_template('logs.html', logs=logs)
+    filters, error = parse_log_filters(request.args)
+    if error:
+        flash(error, 'warning')
+        filters = {'session_id': filters['session_id'], 'limit': filters['limit'],
+                   'level': filters['level'] if filters['level'] in LOG_LEVELS else None}
+    logs = query_log_page(current_user.id, **filters)
+    
+    # Recent sessions for the session filter
+    sessions = db.session.execute(
+        db.select(WarSession.id, WarSession.created_at)
+        .where(WarSession.user_id == current_user.id)
+        .order_by(WarSession.created_at.desc())
+        .limit(20)
+    ).all()
+    
+    return render_template('logs.html', logs=logs, sessions=sessions, levels=LOG_LEVELS,
+                           session_filter=filters['session_id'], level_filter=filters['level'])
 
-@app.route('/api/status')
+@app.route('/api/logs')
 @login_required
-def api_status():
-    """API endpoint for real-time status updates"""
-    
-    # Check Celery task status if available
-    if CELERY_AVAILABLE and current_user.id in celery_tasks:
-        try:
-            task_info = celery_tasks[current_user.id]
-            task_id = task_info['task_id']
-            
-            # Get task result from Celery
-            task = celery_app.AsyncResult(task_id)
-            
-            if task.state == 'PENDING':
-                celery_status = 'queued'
-                celery_info = {'message': 'Task is waiting to be processed'}
-            elif task.state == 'PROGRESS':
-                celery_status = 'active'
-                celery_info = task.info or {}
-            elif task.state == 'SUCCESS':
-                celery_status = 'completed'
-                celery_info = task.result or {}
-            elif task.state == 'FAILURE':
-                celery_status = 'error'
-                celery_info = {'error': str(task.info)}
-            else:
-                celery_status = task.state.lower()
-                celery_info = task.info or {}
-                
-            # Enhanced response with Celery information
-            response = {
-                'status': celery_status,
-                'task_type': 'celery',
-                'task_id': task_id,
-                'session_active': celery_status in ['queued', 'active'],
-                'celery_info': celery_info,
-                'started_at': task_info.get('started_at').isoformat() if task_info.get('started_at') else None,
-                'total_attempts': celery_info.get('cycle', 0),
-                'successful_attempts': len(celery_info.get('successful_courses', [])),
-                'obtained_courses': celery_info.get('successful_courses', []),
-                'remaining_targets': celery_info.get('remaining_targets', []),
-                'last_activity': celery_info.get('last_activity', '')
-            }
-            
-            return jsonify(response)
-            
-        except Exception as e:
-            # Fallback to database if Celery check fails
-            pass
-    
-    # Fallback to existing logic
-    session_status = active_sessions.get(current_user.id, {'status': 'stopped'})
-    
-    # Get current session from database
+def api_logs():
+    """
+    API endpoint for incremental activity log loading
+    
+    Query args:
+        before: next_cursor of a page (older logs)
+        after: prev_cursor of a page, or of the newest loaded log (newer logs)
+        session_id, level: Filters
+        limit: Page size (default 50, max 200)
+    """
+    filters, error = parse_log_filters(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    page = query_log_page(current_user.id, **filters)
+    return jsonify({
+        'logs': [log_api_record(log) for log in page['items']],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+        'approx_total': page['approx_total'],
+        'total_capped': page['total_capped']
+    })
+
+def get_run_status(user_id):
+    """Latest run snapshot of a user from the shared status store (None if never started)"""
+    snapshot = get_status_store().get(user_id)
+    if snapshot and snapshot.get('status') in RUNNING_STATUSES:
+        # A runner that died cannot record its final status: once the snapshot is
+        # older than the run lease lifetime, the lease decides whether it still runs
+        run_lock = get_run_lock()
+        if time.time() - snapshot.get('updated_at', 0) > run_lock.ttl and not run_lock.is_held(user_id):
+            snapshot['status'] = 'stopped'
+    return snapshot
+
+def build_status_payload(user_id):
+    """Current WAR status of a user (shared by /api/status and the status stream)"""
+    
+    # One read of the shared snapshot, correct in any web worker
+    snapshot = get_run_status(user_id)
+    if snapshot:
+        snapshot_status = snapshot.get('status', 'queued')
+        status = 'active' if snapshot_status in ['initializing', 'running'] else snapshot_status
+        response = {
+            'status': status,
+            'task_type': snapshot.get('task_type', 'celery'),
+            'task_id': snapshot.get('task_id'),
+            'session_id': snapshot.get('session_id'),
+            'session_active': snapshot_status in RUNNING_STATUSES,
+            'celery_info': snapshot,
+            'started_at': snapshot.get('started_at'),
+            'total_attempts': snapshot.get('cycle', 0),
+            'successful_attempts': len(snapshot.get('successful_courses', [])),
+            'obtained_courses': snapshot.get('successful_courses', []),
+            'remaining_targets': snapshot.get('remaining_targets', []),
+            'last_activity': snapshot.get('last_activity', '')
+        }
+        if response['task_type'] == 'celery' and response['session_active']:
+            response['scheduling'] = get_fair_scheduler().get_wait_metrics(user_id)
+            response['cycle_lag'] = get_queue_metrics().get_session_lag(snapshot.get('session_id'))
+        return response
+    
+    # No recorded run: fall back to the database (an 'active' row only counts while its lease is held)
     current_session = WarSession.query.filter_by(
-        user_id=current_user.id,
+        user_id=user_id,
         status='active'
     ).first()
+    running = current_session is not None and get_run_lock().is_held(user_id)
     
     response = {
-        'status': session_status.get('status', 'stopped'),
+        'status': 'active' if running else 'stopped',
         'task_type': 'threading',
-        'session_active': current_session is not None,
+        'session_active': running,
+        'started_at': current_session.started_at.isoformat() if current_session and current_session.started_at else None,
         'total_attempts': current_session.total_attempts if current_session else 0,
         'successful_attempts': current_session.successful_attempts if current_session else 0,
         'courses_obtained': json.loads(current_session.courses_obtained) if current_session and current_session.courses_obtained else [],
         'last_activity': current_session.last_activity.isoformat() if current_session and current_session.last_activity else None
     }
     
-    return jsonify(response)
+    return response
+
+@app.route('/api/status')
+@login_required
+def api_status():
+    """API endpoint for real-time status updates"""
+    return jsonify(build_status_payload(current_user.id))
+
+@app.route('/api/status/stream')
+@login_required
+def api_status_stream():
+    """Server-Sent Events stream of WAR progress, new activity logs and obtained courses
+
+    Starts with the full status, then pushes 'progress' (changed snapshot
+    fields) and 'log' events as they are published. All of a user's tabs share
+    the process-wide fan-out in src/status_events. The stream ends after
+    STATUS_STREAM_MAX_SECONDS and the browser reconnects on its own.
+    """
+    user_id = current_user.id
+    hub = get_status_events()
+    # Subscribe before reading the status so nothing published in between is lost
+    subscription = hub.subscribe(user_id)
+    try:
+        status = build_status_payload(user_id)
+        status['live'] = hub.is_live() or status.get('task_type') == 'threading'
+    except Exception:
+        hub.unsubscribe(subscription)
+        raise
+    max_seconds = app.config.get('STATUS_STREAM_MAX_SECONDS', 300)
+    heartbeat = app.config.get('STATUS_STREAM_HEARTBEAT_SECONDS', 15)
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            yield format_sse('status', status)
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0.1)))
+                if subscription.overflowed:
+                    # The client fell behind: replace the lost events with a fresh status
+                    break
+                if item is None:
+                    yield ': keepalive\n\n'
+                    continue
+                event, data = item
+                yield format_sse(event, data)
+            yield format_sse('reconnect', {})
+        finally:
+            hub.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def metrics_authorized():
+    """Autoscalers/monitoring authenticate with METRICS_TOKEN; users must be admins (ADMIN_NIMS)"""
+    metrics_token = os.getenv('METRICS_TOKEN')
+    supplied_token = request.headers.get('X-Metrics-Token')
+    if metrics_token and supplied_token and hmac.compare_digest(supplied_token.encode(), metrics_token.encode()):
+        return True
+    return current_user.is_authenticated and current_user.nim in app.config.get('ADMIN_NIMS', [])
+
+def metrics_denied():
+    """401 without credentials, 403 for logged-in users who are not admins"""
+    if current_user.is_authenticated:
+        return jsonify({"error": "Admin access required"}), 403
+    return jsonify({"error": "Authentication required"}), 401
+
+@app.route('/api/metrics/queues')
+def api_queue_metrics():
+    """Queue depth, start delay, cycle lag, worker utilization and scaling signal"""
+    if not metrics_authorized():
+        return metrics_denied()
+    
+    if not CELERY_AVAILABLE:
+        return jsonify({"error": "Celery not available"}), 503
+    
+    from tasks.queue_monitor import collect_queue_report
+    return jsonify(collect_queue_report())
+
+@app.route('/api/metrics/catalog')
+def api_catalog_metrics():
+    """Course catalog cache hit/miss statistics"""
+    if not metrics_authorized():
+        return metrics_denied()
+    return jsonify(get_course_catalog().get_stats())
 
 @app.route('/courses')
 @login_required
@@ -1499,15 +1796,8 @@ def courses():
     query = Course.query.filter_by(is_active=True)
     
     if search:
-        query = query.filter(
-            db.or_(
-                Course.course_code.ilike(f'%{search}%'),
-                Course.course_name.ilike(f'%{search}%'),
-                Course.class_type.ilike(f'%{search}%'),
-                Course.faculty.ilike(f'%{search}%'),
-                Course.department.ilike(f'%{search}%')
-            )
-        )
+        # Indexed search over code, name, class, faculty and department
+        query = query.filter(Course.id.in_(get_course_search().search(search)))
     
     courses = query.order_by(Course.course_code, Course.class_type).paginate(
         page=page, per_page=20, error_out=False
@@ -1544,6 +1834,8 @@ def add_course():
         
         db.session.add(course)
         db.session.commit()
+        get_course_catalog().bump()
+        get_course_search().index_courses([course])
         
         log_activity(current_user.id, f"Added new course: {course.course_code} ({course.class_type}) - {course.course_name}")
         flash(f'Course {course.course_code} ({course.class_type}) berhasil ditambahkan!', 'success')
@@ -1584,6 +1876,8 @@ def edit_course(course_id):
         course.updated_at = datetime.utcnow()
         
         db.session.commit()
+        get_course_catalog().bump()
+        get_course_search().index_courses([course])
         
         log_activity(current_user.id, f"Edited course: {course.course_code} ({course.class_type}) - {course.course_name}")
         flash(f'Course {course.course_code} ({course.class_type}) berhasil diupdate!', 'success')
@@ -1608,59 +1902,116 @@ def delete_course(course_id):
     course.is_active = False
     course.updated_at = datetime.utcnow()
     db.session.commit()
+    get_course_catalog().bump()
+    get_course_search().index_courses([course])
     
     log_activity(current_user.id, f"Deleted course: {course.course_code} ({course.class_type}) - {course.course_name}")
     flash(f'Course {course.course_code} ({course.class_type}) berhasil dihapus!', 'success')
     
     return redirect(url_for('courses'))
 
+# Fields served by /api/courses (selectable with ?fields=)
+COURSE_API_FIELDS = ('value', 'label', 'course_code', 'course_name', 'faculty',
+                     'department', 'sks', 'semester', 'class_id')
+
+def course_api_record(row, label):
+    """Format a catalog row for /api/courses and the settings page"""
+    return {
+        'value': row['class_id'],
+        'label': label,
+        'course_code': f"{row['course_code']} ({row['class_type']})",
+        'course_name': row['course_name'],
+        'faculty': row['faculty'],
+        'department': row['department'],
+        'sks': row['sks'],
+        'semester': row['semester'],
+        'class_id': row['class_id']
+    }
+
+def encode_course_cursor(digest, offset):
+    """Opaque cursor: catalog content digest + position of the next row"""
+    return base64.urlsafe_b64encode(f"{digest}:{offset}".encode()).decode().rstrip('=')
+
+def decode_course_cursor(cursor):
+    """Decode a cursor into (digest, offset); raises ValueError if malformed"""
+    digest, offset = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+    return digest, int(offset)
+
 @app.route('/api/courses')
 @login_required
 def api_courses():
-    """API endpoint for course data with search and filtering"""
+    """
+    API endpoint for course data with search and filtering
+    
+    Query args:
+        search, faculty: Filters
+        limit: Page size (default 50, max 500)
+        cursor: next_cursor of the previous page
+        fields: Comma-separated subset of COURSE_API_FIELDS
+        format: 'objects' (default) or 'compact' (field list + array of arrays)
+    
+    Responses carry a strong ETag derived from the catalog content and the
+    query, so unchanged pages are answered with 304.
+    """
     search = request.args.get('search', '', type=str)
     faculty = request.args.get('faculty', '', type=str)
-    
-    # Build query
-    query = Course.query.filter_by(is_active=True)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    cursor = request.args.get('cursor', '', type=str)
+    response_format = request.args.get('format', 'objects', type=str)
+    fields = [field.strip() for field in request.args.get('fields', '', type=str).split(',') if field.strip()]
+    fields = fields or list(COURSE_API_FIELDS)
+    
+    unknown_fields = [field for field in fields if field not in COURSE_API_FIELDS]
+    if unknown_fields:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown_fields)}"}), 400
+    if response_format not in ('objects', 'compact'):
+        return jsonify({"error": "format must be 'objects' or 'compact'"}), 400
+    
+    catalog = get_course_catalog().get()
+    
+    # Answer revalidations before doing any search work
+    etag = hashlib.sha1(
+        f"{catalog.digest}|{search}|{faculty}|{limit}|{cursor}|{','.join(fields)}|{response_format}".encode('utf-8')
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    offset = 0
+    if cursor:
+        try:
+            cursor_digest, offset = decode_course_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+        if cursor_digest != catalog.digest:
+            return jsonify({"error": "Course catalog changed, restart from the first page"}), 409
     
     if search:
-        query = query.filter(
-            db.or_(
-                Course.course_code.ilike(f'%{search}%'),
-                Course.course_name.ilike(f'%{search}%'),
-                Course.class_type.ilike(f'%{search}%')
-            )
-        )
-    
-    if faculty:
-        query = query.filter(Course.faculty.ilike(f'%{faculty}%'))
-    
-    courses = query.order_by(Course.course_code, Course.class_type).all()
+        # Ranked, indexed search; rows come from the cached catalog
+        course_ids = get_course_search().search(search, faculty=faculty or None)
+        rows = [catalog.by_id[course_id] for course_id in course_ids if course_id in catalog.by_id]
+    elif faculty:
+        rows = [row for row in catalog.rows if faculty.lower() in row['faculty'].lower()]
+    else:
+        rows = catalog.rows
     
     # Format response
-    course_data = []
-    for course in courses:
-        course_label = f"{course.course_code} ({course.class_type}) - {course.course_name}"
-        if course.sks:
-            course_label += f" [{course.sks} SKS]"
-        
-        course_data.append({
-            'value': course.class_id,
-            'label': course_label,
-            'course_code': f"{course.course_code} ({course.class_type})",
-            'course_name': course.course_name,
-            'faculty': course.faculty or 'Lainnya',
-            'department': course.department or '',
-            'sks': course.sks or 0,
-            'semester': course.semester or '',
-            'class_id': course.class_id
-        })
-    
-    return jsonify({
-        'courses': course_data,
-        'total': len(course_data)
-    })
+    page_rows = rows[offset:offset + limit]
+    records = [course_api_record(row, catalog.labels[row['class_id']]) for row in page_rows]
+    if response_format == 'compact':
+        body = {'fields': fields, 'rows': [[record[field] for field in fields] for record in records]}
+    else:
+        body = {'courses': [{field: record[field] for field in fields} for record in records]}
+    body['total'] = len(rows)
+    body['next_cursor'] = (encode_course_cursor(catalog.digest, offset + limit)
+                           if offset + limit < len(rows) else None)
+    
+    response = jsonify(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/api/faculties')
 @login_required
@@ -1799,15 +2150,61 @@ This is a test message from WAR KRS automation system.
             'message': f'Unexpected error: {str(e)}'
         }), 500
 
+# Values for rows that predate a column added by upgrade_schema
+COLUMN_BACKFILLS = {
+    ('war_sessions', 'created_at'): 'COALESCE(started_at, last_activity, CURRENT_TIMESTAMP)',
+}
+
+def upgrade_schema():
+    """Add columns and indexes that exist on the models but not yet in the database tables"""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+            if backfill:
+                db.session.execute(db.text(f'UPDATE {table.name} SET {column.name} = {backfill}'))
+            print(f"✅ Schema upgrade: added {table.name}.{column.name}")
+        
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            index.create(db.session.connection())
+            print(f"✅ Schema upgrade: added index {index.name}")
+    
+    db.session.commit()
+
 # Initialize database (called from run_web.py)
 def init_db():
     """Initialize database tables"""
     db.create_all()
     
-    # Try to migrate courses from GitHub if database is empty
+    try:
+        upgrade_schema()
+    except Exception as e:
+        print(f"⚠️  Error during schema upgrade: {e}")
+        db.session.rollback()
+    
+    # Create (or catch up) the course search index
+    try:
+        print(f"🔎 Course search backend: {get_course_search().ensure()}")
+    except Exception as e:
+        print(f"⚠️  Error preparing course search index: {e}")
+    
+    # Seed an empty course table from the bundled catalog (no network access)
     try:
         if Course.query.count() == 0:
-            print("📚 No courses found in database, attempting migration from GitHub...")
+            print("📚 No courses found in database, importing the bundled course catalog...")
             migrate_courses_from_md()
     except Exception as e:
         print(f"⚠️  Error during course migration: {e}")
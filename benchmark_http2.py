@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+HTTP/1.1 keep-alive vs HTTP/2 benchmark for SiakadSession
+
+Starts a local TLS server that simulates SIAKAD (ALPN h2 and http/1.1, a
+fixed server latency per request, a ~30 KB enrollment page and small
+registration responses). It then runs the request pattern of one batch
+cycle through SiakadSession with each transport: one enrollment GET
+followed by N registration POSTs. Three scenarios are measured:
+
+- sequential: the order the controller sends today, on a warm session
+- parallel: the N POSTs sent at once, on a warm session
+- cold: a new session per cycle, so connection setup is included
+
+For each scenario it reports the median and p95 cycle time and the TCP
+connections the server accepted. Requires the HTTP/2 extra:
+pip install -r requirements-http2.txt
+
+Usage: python benchmark_http2.py [--cycles 20] [--courses 6] [--latency-ms 40]
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.http2_transport import HTTP2_AVAILABLE
+
+if not HTTP2_AVAILABLE:
+    print("❌ httpx/h2 not installed: pip install -r requirements-http2.txt")
+    sys.exit(1)
+
+import h2.config  # noqa: E402
+import h2.connection  # noqa: E402
+import h2.events  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+ENROLLMENT_PAGE = (b'<html><body><table>' + b'<tr><td>IF25-40033</td><td>RA</td><td>35998</td></tr>' * 560
+                   + b'</table></body></html>')
+REGISTRATION_RESPONSE = b'{"status":"ok","message":"Berhasil"}'
+
+
+def create_certificate(directory):
+    """Self-signed certificate for localhost/127.0.0.1; returns (cert_path, key_path)"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName('localhost'), x509.IPAddress(ipaddress.ip_address('127.0.0.1'))
+        ]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, 'cert.pem')
+    key_path = os.path.join(directory, 'key.pem')
+    with open(cert_path, 'wb') as handle:
+        handle.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as handle:
+        handle.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                       serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class SimulatedSiakad:
+    """Local TLS server speaking HTTP/2 and HTTP/1.1 keep-alive, in a background thread"""
+
+    def __init__(self, cert_path, key_path, latency_ms):
+        self.latency = latency_ms / 1000.0
+        self.context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.context.load_cert_chain(cert_path, key_path)
+        self.context.set_alpn_protocols(['h2', 'http/1.1'])
+        self.connections = {'h2': 0, 'http/1.1': 0}
+        self.port = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0, ssl=self.context)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        loop.run_forever()
+
+    def _body(self, method):
+        return ENROLLMENT_PAGE if method == 'GET' else REGISTRATION_RESPONSE
+
+    async def _handle(self, reader, writer):
+        protocol = writer.get_extra_info('ssl_object').selected_alpn_protocol() or 'http/1.1'
+        self.connections[protocol] += 1
+        try:
+            if protocol == 'h2':
+                await self._serve_h2(reader, writer)
+            else:
+                await self._serve_http1(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_http1(self, reader, writer):
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method = request_line.split(b' ', 1)[0].decode()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(self.latency)
+            body = self._body(method)
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: keep-alive\r\n'
+                + f'Content-Length: {len(body)}\r\n\r\n'.encode()
+                + (b'' if method == 'HEAD' else body)
+            )
+            await writer.drain()
+
+    async def _serve_h2(self, reader, writer):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        methods = {}
+
+        async def respond(stream_id, method):
+            await asyncio.sleep(self.latency)
+            body = self._body(method)
+            conn.send_headers(stream_id, [
+                (':status', '200'), ('content-type', 'text/html'), ('content-length', str(len(body)))
+            ], end_stream=method == 'HEAD')
+            if method == 'HEAD':
+                writer.write(conn.data_to_send())
+                return
+            while True:
+                window = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                if body and window <= 0:
+                    await asyncio.sleep(0.001)  # Wait for the client's WINDOW_UPDATE
+                    continue
+                chunk, body = body[:window], body[window:]
+                conn.send_data(stream_id, chunk, end_stream=not body)
+                writer.write(conn.data_to_send())
+                if not body:
+                    return
+
+        while True:
+            data = await reader.read(65535)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    methods[event.stream_id] = dict(event.headers)[b':method'].decode()
+                elif isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                if isinstance(event, (h2.events.RequestReceived, h2.events.DataReceived)) and event.stream_ended:
+                    asyncio.ensure_future(respond(event.stream_id, methods.pop(event.stream_id)))
+            writer.write(conn.data_to_send())
+            await writer.drain()
+
+
+def run_cycle(session, base_url, courses, parallel):
+    """One batch cycle: enrollment fetch, then the registration POSTs"""
+    started = time.perf_counter()
+    session.get(f"{base_url}/mahasiswa/krsbaru/pilihmk")
+    post = lambda n: session.post(f"{base_url}/mahasiswa/krsbaru/simpan", data={'kelas': str(35998 + n)})
+    if parallel:
+        with ThreadPoolExecutor(max_workers=courses) as executor:
+            list(executor.map(post, range(courses)))
+    else:
+        for n in range(courses):
+            post(n)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_scenario(server, base_url, http2, cycles, courses, scenario):
+    """Run `cycles` cycles; returns (cycle times in ms, connections accepted)"""
+    from src.session import SiakadSession
+
+    protocol = 'h2' if http2 else 'http/1.1'
+    before = server.connections[protocol]
+    session = None
+    timings = []
+    for _ in range(cycles + 1):
+        if session is None or scenario == 'cold':
+            session = SiakadSession({'ci_session': 'benchmark'}, timeout=20, http2=http2)
+            if scenario != 'cold':
+                run_cycle(session, base_url, courses, parallel=False)  # Warm the connection
+        timings.append(run_cycle(session, base_url, courses, parallel=scenario == 'parallel'))
+    return timings[1:], server.connections[protocol] - before
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cycles', type=int, default=20, help='Measured cycles per scenario')
+    parser.add_argument('--courses', type=int, default=6, help='Registration POSTs per cycle')
+    parser.add_argument('--latency-ms', type=float, default=40.0, help='Simulated server latency per request')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='warkrs_h2_')
+    cert_path, key_path = create_certificate(directory)
+    # Trust the self-signed certificate in both transports (OpenSSL default paths and requests)
+    os.environ['SSL_CERT_FILE'] = cert_path
+    os.environ['REQUESTS_CA_BUNDLE'] = cert_path
+
+    server = SimulatedSiakad(cert_path, key_path, args.latency_ms)
+    base_url = f"https://localhost:{server.port}"
+    print(f"🧪 Simulated SIAKAD on {base_url}: {args.latency_ms:.0f}ms latency, "
+          f"1 GET ({len(ENROLLMENT_PAGE)} bytes) + {args.courses} POSTs per cycle, {args.cycles} cycles")
+    print(f"{'scenario':<12}{'transport':<11}{'median ms':>11}{'p95 ms':>10}{'connections':>13}")
+
+    for scenario in ('sequential', 'parallel', 'cold'):
+        for http2 in (False, True):
+            timings, connections = run_scenario(server, base_url, http2, args.cycles, args.courses, scenario)
+            print(f"{scenario:<12}{'HTTP/2' if http2 else 'HTTP/1.1':<11}"
+                  f"{statistics.median(timings):>11.1f}{percentile(timings, 0.95):>10.1f}{connections:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Prefork vs gevent worker pool memory benchmark for WAR sessions
+
+Starts a real `celery worker -P prefork` and a real `celery worker -P gevent`
+(one after the other) and runs the unmodified run_war_task in them: N WAR
+sessions per pool against a local HTTP server that simulates SIAKAD (a KRS
+page that never lists the target course, so every session keeps cycling).
+The broker and result backend live in a temporary directory (kombu
+filesystem transport, file:// results) with a SQLite database, so neither
+Redis nor PostgreSQL is needed.
+
+Once all sessions of a pool are cycling, memory of the worker process tree
+is sampled from /proc (Linux only). PSS splits pages shared by prefork
+children fairly; RSS counts them once per process. Capacity per 1 GB is
+fixed cost + N x per-session cost:
+
+- prefork: fixed = parent process, per session = one child process
+- gevent: fixed = idle worker, per session = growth once N sessions run
+
+Usage: python benchmark_worker_pool.py [--prefork 4] [--gevent 100] [--latency-ms 40]
+Requires gevent (pip install gevent).
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR_ENV = 'WARKRS_POOL_BENCH_DIR'
+
+KRS_PAGE = (b'<html><head><title>KRS</title></head><body><table id="tabelkrs">'
+            + b'<tr><td>IF25-40033</td><td>Kelas RA</td><td>3 SKS</td></tr>' * 8
+            + b'</table></body></html>')
+
+
+def configure_celery(celery_app, bench_dir):
+    """Point the app at the benchmark's filesystem broker and result folder"""
+    queue_dir = os.path.join(bench_dir, 'queue')
+    celery_app.conf.update(
+        broker_url='filesystem://',
+        broker_transport_options={
+            'data_folder_in': queue_dir,
+            'data_folder_out': queue_dir,
+            'control_folder': os.path.join(bench_dir, 'control'),
+        },
+        result_backend=f"file://{os.path.join(bench_dir, 'results')}",
+        worker_disable_rate_limits=True,  # run_war_task is limited to 50 starts/min
+    )
+
+
+if os.getenv(BENCH_DIR_ENV):
+    # Imported by the benchmark's worker (celery -A benchmark_worker_pool worker ...)
+    from celery_app import celery_app
+    configure_celery(celery_app, os.environ[BENCH_DIR_ENV])
+
+
+class SimulatedSiakad:
+    """Threaded HTTP/1.1 server answering KRS pages after a fixed latency"""
+
+    def __init__(self, latency_ms):
+        simulator = self
+        self.latency = latency_ms / 1000.0
+        self.last_seen = {}
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                with simulator._lock:
+                    simulator.last_seen[self.headers.get('Cookie', '')] = time.monotonic()
+                time.sleep(simulator.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(KRS_PAGE)))
+                self.end_headers()
+                self.wfile.write(KRS_PAGE)
+
+            do_GET = do_POST = do_HEAD = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.handle_error = lambda request, client_address: None  # Resets from killed workers
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def active_sessions(self, prefix, within=30.0):
+        """Sessions whose cookie starts with prefix that sent a request recently"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for cookie, seen in self.last_seen.items()
+                       if cookie.startswith(prefix) and now - seen < within)
+
+
+def process_tree(root_pid):
+    """PIDs of a process and all of its descendants"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as handle:
+                parent = int(handle.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def memory_mb(pids):
+    """Summed (rss, pss) of processes in MB, from /proc/<pid>/smaps_rollup"""
+    rss = pss = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as handle:
+                for line in handle:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1])
+        except OSError:
+            continue
+    return rss / 1024, pss / 1024
+
+
+def start_worker(pool, concurrency, env, log_path):
+    command = [sys.executable, '-m', 'celery', '-A', 'benchmark_worker_pool', 'worker',
+               '-P', pool, '-c', str(concurrency), '-Q', 'war_queue', '-l', 'warning',
+               '--without-gossip', '--without-mingle', '--without-heartbeat']
+    log = open(log_path, 'w')
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+
+def wait_for_workers(worker, expected_processes, timeout=120):
+    """Wait until the pool processes exist and memory has settled after imports"""
+    deadline = time.monotonic() + timeout
+    previous = None
+    while time.monotonic() < deadline:
+        if worker.poll() is not None:
+            raise RuntimeError(f"worker exited with status {worker.returncode}")
+        pids = process_tree(worker.pid)
+        current = memory_mb(pids)[1]
+        if len(pids) >= expected_processes and previous and abs(current - previous) < 1:
+            return
+        previous = current
+        time.sleep(2)
+    raise RuntimeError('worker did not start in time')
+
+
+def sample_memory(worker, seconds):
+    """Peak (rss, pss) of the worker tree over a few seconds"""
+    peak = (0.0, 0.0)
+    for _ in range(max(1, int(seconds))):
+        current = memory_mb(process_tree(worker.pid))
+        peak = max(peak, current, key=lambda value: value[1])
+        time.sleep(1)
+    return peak
+
+
+def run_pool(pool, sessions, simulator, env, bench_dir, args):
+    """Measure one pool; returns a result dict"""
+    import app as flask_app
+    from tasks.war_tasks import run_war_task
+
+    base_url = f"http://127.0.0.1:{simulator.port}"
+    session_ids = []
+    with flask_app.app.app_context():
+        for number in range(sessions):
+            user = flask_app.User(nim=f'{pool}{number}', name=f'{pool} {number}', password_hash='benchmark')
+            flask_app.db.session.add(user)
+            flask_app.db.session.flush()
+            war_session = flask_app.WarSession(user_id=user.id)
+            flask_app.db.session.add(war_session)
+            flask_app.db.session.flush()
+            session_ids.append((user.id, war_session.id))
+        flask_app.db.session.commit()
+
+    # prefork runs one session per child process; gevent runs all in one process
+    worker = start_worker(pool, sessions, env, os.path.join(bench_dir, f'worker-{pool}.log'))
+    try:
+        wait_for_workers(worker, sessions + 1 if pool == 'prefork' else 1)
+        idle = memory_mb(process_tree(worker.pid))
+        parent = memory_mb([worker.pid])
+
+        for number, (user_id, session_id) in enumerate(session_ids):
+            run_war_task.apply_async(kwargs={
+                'user_id': user_id,
+                'session_id': session_id,
+                'cookies': {'ci_session': f'{pool}-{number}'},
+                'urls': {'pilih_mk': f'{base_url}/mahasiswa/krsbaru/pilihmk',
+                         'simpan_krs': f'{base_url}/mahasiswa/krsbaru/simpan'},
+                'target_courses': {'IF25-99999': '99999'},
+                'settings': {'cycle_delay': args.cycle_delay, 'inter_request_delay': 0,
+                             'verification_delay': 1, 'max_cycles': 100000,
+                             'warmup_enabled': False}
+            }, queue='war_queue')
+
+        deadline = time.monotonic() + args.timeout
+        while simulator.active_sessions(f'ci_session={pool}-') < sessions:
+            if time.monotonic() > deadline or worker.poll() is not None:
+                raise RuntimeError(f"only {simulator.active_sessions(f'ci_session={pool}-')} of "
+                                   f"{sessions} {pool} sessions started (see worker-{pool}.log)")
+            time.sleep(1)
+        loaded = sample_memory(worker, args.sample_seconds)
+    finally:
+        os.killpg(worker.pid, signal.SIGKILL)
+        worker.wait()
+
+    if pool == 'prefork':
+        fixed = parent[1]
+        per_session = (loaded[1] - parent[1]) / sessions
+    else:
+        fixed = idle[1]
+        per_session = max(loaded[1] - idle[1], 0.1) / sessions
+    return {
+        'pool': pool,
+        'sessions': sessions,
+        'idle_pss': idle[1],
+        'loaded_rss': loaded[0],
+        'loaded_pss': loaded[1],
+        'fixed': fixed,
+        'per_session': per_session,
+        'per_gb': int((1024 - fixed) / per_session)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--prefork', type=int, default=4, help='Sessions (= processes) for the prefork worker')
+    parser.add_argument('--gevent', type=int, default=100, help='Sessions (= greenlets) for the gevent worker')
+    parser.add_argument('--latency-ms', type=float, default=40.0, help='Simulated SIAKAD latency per request')
+    parser.add_argument('--cycle-delay', type=int, default=5, help='Seconds between cycles of a session')
+    parser.add_argument('--sample-seconds', type=int, default=10, help='Memory sampling window once loaded')
+    parser.add_argument('--timeout', type=int, default=180, help='Seconds to wait for all sessions to start')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("❌ /proc/<pid>/smaps_rollup is required (Linux 4.14+)")
+        return 1
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        print("❌ gevent not installed: pip install gevent")
+        return 1
+
+    bench_dir = tempfile.mkdtemp(prefix='warkrs_pool_')
+    for folder in ('queue', 'control', 'results'):
+        os.makedirs(os.path.join(bench_dir, folder))
+    env = dict(os.environ)
+    env.update({
+        BENCH_DIR_ENV: bench_dir,
+        'DATABASE_URL': f"sqlite:///{os.path.join(bench_dir, 'warkrs.db')}",
+        'PYTHONPATH': os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')])),
+    })
+    os.environ.update(env)
+
+    from celery_app import celery_app
+    configure_celery(celery_app, bench_dir)
+    import app as flask_app
+    with flask_app.app.app_context():
+        flask_app.db.create_all()
+
+    simulator = SimulatedSiakad(args.latency_ms)
+    print(f"🧪 Simulated SIAKAD on 127.0.0.1:{simulator.port}: {args.latency_ms:.0f}ms latency, "
+          f"{args.cycle_delay}s cycle delay; work dir {bench_dir}")
+    print(f"{'pool':<9}{'sessions':>9}{'idle PSS':>10}{'loaded RSS':>12}{'loaded PSS':>12}"
+          f"{'fixed MB':>10}{'MB/session':>12}{'per 1 GB':>10}")
+    try:
+        for pool, sessions in (('prefork', args.prefork), ('gevent', args.gevent)):
+            result = run_pool(pool, sessions, simulator, env, bench_dir, args)
+            print(f"{result['pool']:<9}{result['sessions']:>9}{result['idle_pss']:>10.1f}"
+                  f"{result['loaded_rss']:>12.1f}{result['loaded_pss']:>12.1f}{result['fixed']:>10.1f}"
+                  f"{result['per_session']:>12.2f}{result['per_gb']:>10}")
+    except RuntimeError as e:
+        print(f"❌ {e}; worker logs kept in {bench_dir}")
+        return 1
+    shutil.rmtree(bench_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Compile COURSE_LIST.md into the bundled course catalog (data/course_catalog.json)
+
+Run after editing COURSE_LIST.md and commit the result. The app loads the
+artifact at startup instead of downloading COURSE_LIST.md from GitHub.
+
+Usage: python build_course_catalog.py [--check]
+    --check  Exit with status 1 if the artifact is missing or out of date
+"""
+
+import json
+import sys
+
+from src.bundled_catalog import ARTIFACT_PATH, SOURCE_PATH, compile_catalog, write_artifact
+
+
+def main(check=False):
+    with open(SOURCE_PATH, encoding='utf-8') as handle:
+        artifact = compile_catalog(handle.read())
+
+    if check:
+        try:
+            with open(ARTIFACT_PATH, encoding='utf-8') as handle:
+                current = json.load(handle)
+        except (OSError, ValueError):
+            current = None
+        if current != artifact:
+            print(f"❌ {ARTIFACT_PATH} is out of date, run: python build_course_catalog.py")
+            return 1
+        print(f"✅ Course catalog artifact is up to date (version {artifact['version']})")
+        return 0
+
+    size = write_artifact(artifact)
+    print(f"✅ Compiled {len(artifact['rows'])} courses into {ARTIFACT_PATH}")
+    print(f"   version {artifact['version']}, {size} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(check='--check' in sys.argv[1:]))
@@ -5,11 +5,15 @@ Implementation following existing code style and patterns
 
 import os
 from celery import Celery
+from celery.schedules import crontab
 from kombu import Queue
 
 # Create Celery app instance
 celery_app = Celery('warkrs_celery')
 
+# Hard time limit of the long-running WAR task (seconds)
+WAR_TASK_TIME_LIMIT = 7200
+
 # Configuration
 celery_app.conf.update(
     # Broker configuration (Redis)
@@ -24,15 +28,25 @@ celery_app.conf.update(
     enable_utc=True,
     
     # Worker configuration for VPS 1GB
-    worker_concurrency=2,  # Max 2 concurrent tasks per worker
+    # Prefork default; green pools are selected on the command line
+    # (celery -A celery_app worker -P gevent -c 200), never via worker_pool
+    worker_concurrency=int(os.getenv('CELERY_WORKER_CONCURRENCY', 2)),  # Max 2 concurrent tasks per worker
     worker_prefetch_multiplier=1,  # One task at a time per worker
     task_acks_late=True,  # Acknowledge task after completion
+    # Redis redelivers unacknowledged tasks after the visibility timeout, so it
+    # must outlast the longest task or a still-running WAR task gets a twin
+    broker_transport_options={
+        'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', WAR_TASK_TIME_LIMIT + 1800))
+    },
     worker_disable_rate_limits=False,
     
     # Task routing
     task_routes={
         'tasks.war_tasks.run_war_task': {'queue': 'war_queue'},
+        'tasks.war_tasks.run_war_cycle_task': {'queue': 'war_queue'},
         'tasks.war_tasks.stop_war_task': {'queue': 'control_queue'},
+        'tasks.maintenance_tasks.prune_activity_logs': {'queue': 'default'},
+        'tasks.maintenance_tasks.refresh_course_catalog': {'queue': 'default'},
     },
     
     # Queue configuration
@@ -47,11 +61,24 @@ celery_app.conf.update(
     task_annotations={
         'tasks.war_tasks.run_war_task': {
             'rate_limit': '50/m',  # Max 50 new tasks per minute
-            'time_limit': 7200,    # 2 hours max (safety)
+            'time_limit': WAR_TASK_TIME_LIMIT,  # 2 hours max (safety)
             'soft_time_limit': 6900,  # Warning at 1h 55m
+        },
+        'tasks.war_tasks.run_war_cycle_task': {
+            'time_limit': 600,     # One cycle only
+            'soft_time_limit': 540,
         }
     },
     
+    # Periodic jobs (run `celery -A celery_app beat` next to the workers)
+    beat_schedule={
+        'prune-activity-logs': {
+            'task': 'tasks.maintenance_tasks.prune_activity_logs',
+            'schedule': crontab(hour=3, minute=15),  # Daily, outside WAR hours (Asia/Jakarta)
+            'options': {'expires': 3600},
+        },
+    },
+    
     # Result expiration
     result_expires=3600,  # Results expire after 1 hour
     
@@ -60,6 +87,15 @@ celery_app.conf.update(
     task_ignore_result=False,
 )
 
+# Optional: pull the remote COURSE_LIST.md every N hours (startup never needs it)
+COURSE_REMOTE_REFRESH_HOURS = float(os.getenv('COURSE_REMOTE_REFRESH_HOURS', 0))
+if COURSE_REMOTE_REFRESH_HOURS > 0:
+    celery_app.conf.beat_schedule['refresh-course-catalog'] = {
+        'task': 'tasks.maintenance_tasks.refresh_course_catalog',
+        'schedule': COURSE_REMOTE_REFRESH_HOURS * 3600,
+        'options': {'expires': 600},
+    }
+
 # Auto-discover tasks
 celery_app.autodiscover_tasks(['tasks'])
 
@@ -70,5 +106,11 @@ try:
 except ImportError as e:
     print(f"⚠️  Warning: Could not import WAR tasks: {e}")
 
+try:
+    from tasks import maintenance_tasks
+    print("✅ Maintenance tasks imported successfully")
+except ImportError as e:
+    print(f"⚠️  Warning: Could not import maintenance tasks: {e}")
+
 if __name__ == '__main__':
     celery_app.start()
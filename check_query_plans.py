@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the hot dashboard/status/log/course queries
+
+Seeds a throwaway SQLite database (100k activity logs by default), then
+verifies with EXPLAIN QUERY PLAN that every hot query is answered from its
+composite index without a full table scan or a separate sort step, and
+counts the statements a dashboard page load issues.
+
+Usage: python check_query_plans.py [log_count]
+"""
+
+import os
+import sys
+import tempfile
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+_db_dir = tempfile.mkdtemp(prefix='warkrs_plans_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'plans.db')}"
+
+from app import app, db, User, UserSettings, WarSession, ActivityLog, Course  # noqa: E402
+from src.dashboard_view import get_dashboard_provider  # noqa: E402
+from src.redis_client import get_redis_client  # noqa: E402
+
+USERS = 200
+SESSIONS_PER_USER = 10
+COURSES = 3000
+
+
+def seed(log_count):
+    """Insert users, sessions, courses and activity logs in bulk"""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [
+        {'id': uid, 'nim': f"{120000000 + uid}", 'name': f"User {uid}", 'password_hash': 'x'}
+        for uid in range(1, USERS + 1)
+    ])
+    db.session.execute(db.insert(WarSession), [
+        {'user_id': uid, 'status': 'active' if n == SESSIONS_PER_USER - 1 else 'completed',
+         'created_at': now - timedelta(hours=SESSIONS_PER_USER - n)}
+        for uid in range(1, USERS + 1) for n in range(SESSIONS_PER_USER)
+    ])
+    db.session.execute(db.insert(UserSettings), [
+        {'user_id': uid, 'ci_session': 'x', 'target_courses': json.dumps(['30001', '30002'])}
+        for uid in range(1, USERS + 1)
+    ])
+    db.session.execute(db.insert(Course), [
+        {'course_code': f"IF25-{10000 + n // 4}", 'course_name': f"Course {n // 4}",
+         'class_type': 'R' + 'ABCD'[n % 4], 'class_id': str(30000 + n),
+         'is_active': n % 10 != 0, 'created_by': 1}
+        for n in range(COURSES)
+    ])
+    levels = ['INFO', 'INFO', 'SUCCESS', 'WARNING', 'ERROR']
+    batch = 10000
+    for start in range(0, log_count, batch):
+        db.session.execute(db.insert(ActivityLog), [
+            {'user_id': n % USERS + 1, 'level': levels[n % len(levels)],
+             'session_id': (n % USERS) * SESSIONS_PER_USER + (n // USERS) % SESSIONS_PER_USER + 1,
+             'message': f"Cycle {n} completed", 'timestamp': now - timedelta(seconds=log_count - n)}
+            for n in range(start, min(start + batch, log_count))
+        ])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+
+
+def hot_queries(user_id):
+    """The queries issued by dashboard, logs, api_status, api_war_status and load_course_list"""
+    position = db.tuple_(ActivityLog.timestamp, ActivityLog.id)
+    cursor = db.session.execute(
+        db.select(ActivityLog.timestamp, ActivityLog.id).where(ActivityLog.user_id == user_id)
+        .order_by(ActivityLog.timestamp.desc()).limit(1).offset(50)
+    ).first()
+    newest_first = (ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+    return {
+        'api_status fallback: active session': (
+            WarSession.query.filter_by(user_id=user_id, status='active').limit(1),
+            'ix_war_sessions_user_status'
+        ),
+        'api_war_status: latest session': (
+            WarSession.query.filter_by(user_id=user_id).order_by(WarSession.created_at.desc()).limit(1),
+            'ix_war_sessions_user_created'
+        ),
+        'logs: older page (keyset)': (
+            ActivityLog.query.filter(ActivityLog.user_id == user_id, position < tuple(cursor))
+            .order_by(*newest_first).limit(51),
+            'ix_activity_logs_user_timestamp'
+        ),
+        'logs: newer page (keyset)': (
+            ActivityLog.query.filter(ActivityLog.user_id == user_id, position > tuple(cursor))
+            .order_by(ActivityLog.timestamp.asc(), ActivityLog.id.asc()).limit(51),
+            'ix_activity_logs_user_timestamp'
+        ),
+        'logs: session filter': (
+            ActivityLog.query.filter(ActivityLog.user_id == user_id,
+                                     ActivityLog.session_id == (user_id - 1) * SESSIONS_PER_USER + 3,
+                                     position < tuple(cursor))
+            .order_by(*newest_first).limit(51),
+            'ix_activity_logs_user_session_ts'
+        ),
+        'logs: level filter': (
+            ActivityLog.query.filter(ActivityLog.user_id == user_id, ActivityLog.level == 'ERROR')
+            .order_by(*newest_first).limit(51),
+            'ix_activity_logs_user_level_ts'
+        ),
+        'retention: session rollup page (keyset)': (
+            ActivityLog.query.filter(ActivityLog.user_id == user_id,
+                                     ActivityLog.session_id == (user_id - 1) * SESSIONS_PER_USER + 3,
+                                     ActivityLog.level == 'INFO', position > tuple(cursor))
+            .order_by(ActivityLog.timestamp, ActivityLog.id).limit(1000),
+            'ix_activity_logs_user_session_ts'
+        ),
+        'retention: expired INFO rows': (
+            ActivityLog.query.filter(ActivityLog.level == 'INFO',
+                                     ActivityLog.timestamp < datetime.utcnow() - timedelta(hours=1))
+            .order_by(ActivityLog.timestamp).limit(1000),
+            'ix_activity_logs_level_timestamp'
+        ),
+        'dashboard: active session + recent logs': (
+            get_dashboard_provider().statement(user_id),
+            'ix_activity_logs_user_timestamp'
+        ),
+        'load_course_list: active courses': (
+            Course.query.filter_by(is_active=True).order_by(Course.course_code, Course.class_type),
+            'ix_courses_active_code_class'
+        ),
+    }
+
+
+def check_plans():
+    """Print each plan and timing; return True if every query uses its index without sorting"""
+    ok = True
+    for name, (query, index_name) in hot_queries(user_id=USERS // 2).items():
+        statement = getattr(query, 'statement', query)
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+        started = time.perf_counter()
+        rows = len(db.session.execute(statement).all())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        uses_index = any(index_name in step for step in plan)
+        # Scanning a materialized LIMIT subquery (anon_N) reads only its few rows
+        full_scan = any(step.startswith('SCAN') and 'INDEX' not in step and not step.startswith('SCAN anon_')
+                        for step in plan)
+        sorts = any('TEMP B-TREE' in step for step in plan)
+        passed = uses_index and not full_scan and not sorts
+        ok = ok and passed
+
+        print(f"{'✅' if passed else '❌'} {name}: {rows} rows in {elapsed_ms:.1f}ms")
+        for step in plan:
+            print(f"     {step}")
+    return ok
+
+
+def check_dashboard_queries():
+    """Count statements per dashboard load: user + view on a miss, user only on a cache hit"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # The shared run status is a database read only when Redis is unavailable
+    status_reads = 0 if get_redis_client() is not None else 1
+    expected = {'miss': 2 + status_reads, 'hit': 1 + status_reads}
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(USERS // 2)
+        session['_fresh'] = True
+
+    with app.app_context():
+        engine = db.engine
+
+    ok = True
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        get_dashboard_provider().invalidate(USERS // 2)
+        for name in ('miss', 'hit'):
+            statements.clear()
+            response = client.get('/')
+            passed = response.status_code == 200 and len(statements) <= expected[name]
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} dashboard ({name}): {len(statements)} statements "
+                  f"(expected <= {expected[name]})")
+            for statement in statements:
+                print(f"     {' '.join(statement.split())[:110]}")
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return ok
+
+
+if __name__ == '__main__':
+    log_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with app.app_context():
+        db.create_all()
+        print(f"🌱 Seeding {log_count} activity logs into {app.config['SQLALCHEMY_DATABASE_URI']}...")
+        started = time.perf_counter()
+        seed(log_count)
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+
+        if not check_plans():
+            print("❌ Some hot queries are not served by their composite index")
+            sys.exit(1)
+        print("✅ All hot queries use their composite indexes")
+
+    if not check_dashboard_queries():
+        print("❌ The dashboard issues more statements than expected")
+        sys.exit(1)
+    print("✅ Dashboard loads within its statement budget")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Utilization check for src.queue_metrics
+
+Replays a worker holding long-running WAR tasks for longer than worker_ttl
+(scaled down to seconds, in-process state) and verifies that the worker
+stays registered through its heartbeat and its tasks keep counting as busy,
+and that running entries are only dropped after max_task_age.
+
+Usage: python check_queue_metrics.py
+"""
+
+import sys
+import time
+
+import src.queue_metrics as queue_metrics
+from src.queue_metrics import QueueMetrics
+
+queue_metrics.get_redis_client = lambda: None  # Check the in-process state only
+
+WORKER_TTL = 0.6
+MAX_TASK_AGE = 3.0
+
+
+def check(name, utilization, expected):
+    actual = {key: utilization[key] for key in expected}
+    passed = actual == expected
+    print(f"{'✅' if passed else '❌'} {name}: {actual}" + ('' if passed else f" (expected {expected})"))
+    return passed
+
+
+def main():
+    metrics = QueueMetrics(worker_ttl=WORKER_TTL, max_task_age=MAX_TASK_AGE)
+    stop = metrics.start_heartbeat('w1', 2, interval=WORKER_TTL / 3)
+    metrics.task_started('t1', 'w1', 'war_queue')
+    metrics.task_started('t2', 'w1', 'war_queue')
+    saturated = {'workers': 1, 'capacity': 2, 'running': 2, 'utilization': 1.0}
+
+    ok = check('busy worker at start', metrics.get_utilization(), saturated)
+    time.sleep(WORKER_TTL * 2)
+    ok &= check(f'busy worker after {WORKER_TTL * 2:.1f}s without task events',
+                metrics.get_utilization(), saturated)
+
+    stop.set()
+    time.sleep(WORKER_TTL * 2)
+    ok &= check('worker without heartbeat: tasks still running',
+                metrics.get_utilization(), {'workers': 0, 'capacity': 0, 'running': 2})
+
+    time.sleep(MAX_TASK_AGE)
+    ok &= check('entries older than max_task_age dropped',
+                metrics.get_utilization(), {'workers': 0, 'running': 0})
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -72,6 +72,12 @@ class Config:
             config["settings"]["delay_seconds"] = int(os.getenv("DELAY_SECONDS"))
         if os.getenv("REQUEST_TIMEOUT"):
             config["settings"]["request_timeout"] = int(os.getenv("REQUEST_TIMEOUT"))
+        if os.getenv("HTTP2_ENABLED"):
+            config["settings"]["http2_enabled"] = os.getenv("HTTP2_ENABLED").lower() in ('1', 'true', 'yes')
+        if os.getenv("PROGRESS_DB_INTERVAL"):
+            config["settings"]["progress_db_interval"] = float(os.getenv("PROGRESS_DB_INTERVAL"))
+        if os.getenv("WAR_EXECUTION_MODE"):
+            config["settings"]["execution_mode"] = os.getenv("WAR_EXECUTION_MODE").lower()
         
         # Add Telegram configuration
         if "telegram" not in config:
@@ -176,5 +182,12 @@ class Config:
             'cycle_delay': self.settings.get('delay_seconds', 45),
             'inter_request_delay': self.settings.get('inter_request_delay', 2),
             'request_timeout': self.settings.get('request_timeout', 20),
-            'verification_delay': self.settings.get('verification_delay', 2)
+            'verification_delay': self.settings.get('verification_delay', 2),
+            'warmup_enabled': self.settings.get('warmup_enabled', True),
+            'warmup_connections': self.settings.get('warmup_connections', 2),
+            'http2_enabled': self.settings.get('http2_enabled', False),
+            'execution_mode': self.settings.get('execution_mode', 'long_running'),  # or 'cycle'
+            'progress_min_interval': self.settings.get('progress_min_interval', 1.0),
+            'progress_state_interval': self.settings.get('progress_state_interval', 60.0),
+            'progress_db_interval': self.settings.get('progress_db_interval', 120.0)
         }
@@ -22,13 +22,13 @@ class Config:
     
     # Engine options based on database type
     if database_url and database_url.startswith('postgresql://'):
-        # PostgreSQL-specific options
+        # PostgreSQL-specific options (raise DB_POOL_SIZE for gevent/eventlet workers)
         SQLALCHEMY_ENGINE_OPTIONS = {
             'pool_timeout': 20,
             'pool_recycle': -1,
             'pool_pre_ping': True,
-            'pool_size': 5,
-            'max_overflow': 10
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10))
         }
     else:
         # SQLite-specific options (no pool options)
@@ -53,6 +53,32 @@ class Config:
     MAX_WAR_SESSIONS_PER_USER = 1
     DEFAULT_CYCLE_DELAY = 5  # seconds
     DEFAULT_REQUEST_TIMEOUT = 20  # seconds
+    
+    # Activity log batching (ACTIVITY_LOG_BATCH_SIZE=1 writes every row synchronously)
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 50))
+    ACTIVITY_LOG_FLUSH_MS = int(os.environ.get('ACTIVITY_LOG_FLUSH_MS', 500))
+    ACTIVITY_LOG_MAX_QUEUE = int(os.environ.get('ACTIVITY_LOG_MAX_QUEUE', 5000))
+    
+    # Activity log retention: days kept per level, rollup of per-cycle rows of
+    # finished sessions, and gzip JSONL archive of deleted rows (empty = no archive)
+    ACTIVITY_LOG_RETENTION_DAYS = {
+        'INFO': int(os.environ.get('ACTIVITY_LOG_TTL_INFO_DAYS', 30)),
+        'WARNING': int(os.environ.get('ACTIVITY_LOG_TTL_WARNING_DAYS', 90)),
+        'ERROR': int(os.environ.get('ACTIVITY_LOG_TTL_ERROR_DAYS', 180)),
+        'SUCCESS': int(os.environ.get('ACTIVITY_LOG_TTL_SUCCESS_DAYS', 365))
+    }
+    ACTIVITY_LOG_ROLLUP_AFTER_HOURS = float(os.environ.get('ACTIVITY_LOG_ROLLUP_AFTER_HOURS', 1))
+    ACTIVITY_LOG_ARCHIVE_DIR = os.environ.get('ACTIVITY_LOG_ARCHIVE_DIR', 'archive/activity_logs')
+    ACTIVITY_LOG_RETENTION_BATCH = int(os.environ.get('ACTIVITY_LOG_RETENTION_BATCH', 1000))
+    
+    # Operational endpoints (/api/metrics/*): METRICS_TOKEN for monitoring,
+    # otherwise only the users whose NIM is listed here (comma-separated)
+    ADMIN_NIMS = [nim.strip() for nim in os.environ.get('ADMIN_NIMS', '').split(',') if nim.strip()]
+    
+    # Status event stream (/api/status/stream): streams close after this many
+    # seconds and the browser reconnects, so long-lived requests never pile up
+    STATUS_STREAM_MAX_SECONDS = int(os.environ.get('STATUS_STREAM_MAX_SECONDS', 300))
+    STATUS_STREAM_HEARTBEAT_SECONDS = int(os.environ.get('STATUS_STREAM_HEARTBEAT_SECONDS', 15))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -106,6 +132,7 @@ class TestingConfig(Config):
             'pool_pre_ping': True
         }
     WTF_CSRF_ENABLED = False
+    ACTIVITY_LOG_BATCH_SIZE = 1  # Deterministic writes in tests
 
 # Configuration mapping
 config = {
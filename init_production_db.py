@@ -51,6 +51,10 @@ def init_production_db():
             db.create_all()
             print("✅ Database tables created successfully")
             
+            # Add columns introduced after the tables were first created
+            from app import upgrade_schema
+            upgrade_schema()
+            
             # Check if we can connect and query
             user_count = User.query.count()
             course_count = Course.query.count()
@@ -0,0 +1,259 @@
+"""
+Bundled Course Catalog
+COURSE_LIST.md compiled at build time into a compact artifact that ships with the app
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.path.join(REPO_ROOT, 'COURSE_LIST.md')
+ARTIFACT_PATH = os.path.join(REPO_ROOT, 'data', 'course_catalog.json')
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_FIELDS = ('course_code', 'course_name', 'class_type', 'class_id', 'department')
+
+# Faculty by course code prefix
+COURSE_FACULTY_MAP = {
+    'AR': 'Fakultas Teknik - Arsitektur',
+    'IF': 'Fakultas Teknik - Informatika',
+    'TK': 'Fakultas Teknik - Teknik Kimia',
+    'TS': 'Fakultas Teknik - Teknik Sipil',
+    'TI': 'Fakultas Teknik - Teknik Industri',
+    'TM': 'Fakultas Teknik - Teknik Mesin',
+    'TL': 'Fakultas Teknik - Teknik Lingkungan',
+    'TE': 'Fakultas Teknik - Teknik Elektro',
+    'GL': 'Fakultas Teknik - Teknik Geologi',
+    'PW': 'Fakultas Teknik - Perencanaan Wilayah',
+    'SD': 'Fakultas Teknik - Sains Data',
+    'BT': 'Fakultas Teknobiologi',
+    'KP': 'Fakultas Teknik - Kepengurusan'
+}
+
+
+def source_version(content: str) -> str:
+    """Version of a COURSE_LIST.md text (content hash)"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_course_list_md(content: str) -> List[Dict]:
+    """
+    Parse the COURSE_LIST.md tables into course rows
+
+    Args:
+        content: Markdown text
+
+    Returns:
+        List of course dicts (course_code, course_name, class_type, class_id,
+        department, faculty), first occurrence of each class_id
+    """
+    rows = {}
+    in_table = False
+    current_department = None
+
+    for line in content.split('\n'):
+        line = line.strip()
+
+        # Department section (e.g., ## 📊 SAINS DATA (SD)) applies to the following courses
+        if line.startswith('##'):
+            current_department = line.replace('##', '').strip()
+            continue
+
+        # Skip empty lines and headers
+        if not line or line.startswith('#') or line.startswith('-') or line.startswith('**'):
+            continue
+
+        # Detect table start (header row)
+        if 'Kode Mata Kuliah' in line and 'Nama Mata Kuliah' in line:
+            in_table = True
+            continue
+
+        # Skip table separator row
+        if in_table and line.startswith('|--'):
+            continue
+
+        # Table format: | Kode | Nama | Kelas | Class ID |
+        if in_table and line.startswith('|') and line.endswith('|'):
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) < 5:
+                continue
+            kode, nama, kelas, class_id = parts[1:5]
+            if kode and nama and kelas and class_id and class_id not in rows:
+                rows[class_id] = {
+                    'course_code': kode,
+                    'course_name': nama,
+                    'class_type': kelas,
+                    'class_id': class_id,
+                    'department': current_department,
+                    'faculty': COURSE_FACULTY_MAP.get(kode[:2], 'Lainnya')
+                }
+
+    return list(rows.values())
+
+
+def compile_catalog(content: str) -> Dict:
+    """
+    Compile COURSE_LIST.md into the artifact document
+
+    Rows are stored as arrays in ARTIFACT_FIELDS order (departments interned
+    in a separate list), sorted like the catalog listing, with a class_id ->
+    row position index.
+
+    Args:
+        content: Markdown text
+
+    Returns:
+        Artifact dict (format, version, fields, departments, rows, class_index)
+    """
+    rows = sorted(parse_course_list_md(content), key=lambda row: (row['course_code'], row['class_type']))
+    departments = sorted({row['department'] for row in rows if row['department']})
+    department_ids = {name: position for position, name in enumerate(departments)}
+    return {
+        'format': ARTIFACT_FORMAT,
+        'version': source_version(content),
+        'source': os.path.basename(SOURCE_PATH),
+        'fields': list(ARTIFACT_FIELDS),
+        'departments': departments,
+        'rows': [
+            [row['course_code'], row['course_name'], row['class_type'], row['class_id'],
+             department_ids.get(row['department'])]
+            for row in rows
+        ],
+        'class_index': {row['class_id']: position for position, row in enumerate(rows)}
+    }
+
+
+def write_artifact(artifact: Dict, path: str = ARTIFACT_PATH) -> int:
+    """
+    Write an artifact atomically
+
+    Returns:
+        Size in bytes
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = json.dumps(artifact, ensure_ascii=False, separators=(',', ':'))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+    return len(data.encode('utf-8'))
+
+
+class BundledCatalog:
+    """
+    Course catalog shipped with the app, loaded on first use without network
+
+    The artifact (data/course_catalog.json, built by build_course_catalog.py)
+    is read once per process. If it is missing, unreadable or older than the
+    COURSE_LIST.md next to it, the markdown is compiled in memory instead and
+    a warning asks for a rebuild, so a stale artifact never hides catalog
+    edits. Startup seeding, the course list fallback and class_id lookups all
+    read from here; fetching the remote COURSE_LIST.md is a separate, optional
+    refresh job.
+    """
+
+    def __init__(self, artifact_path: str = ARTIFACT_PATH, source_path: str = SOURCE_PATH):
+        """
+        Initialize catalog
+
+        Args:
+            artifact_path: Compiled artifact path
+            source_path: COURSE_LIST.md used to check (or replace) the artifact
+        """
+        self.artifact_path = artifact_path
+        self.source_path = source_path
+
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.origin: Optional[str] = None
+        self.rows: List[Dict] = []
+        self._class_index: Dict[str, int] = {}
+        self.stats = {'load_ms': 0.0}
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            started = time.perf_counter()
+            artifact, origin = self._read()
+            if artifact is not None:
+                departments = artifact['departments']
+                self.rows = []
+                for values in artifact['rows']:
+                    row = dict(zip(artifact['fields'], values))
+                    row['department'] = departments[row['department']] if row['department'] is not None else None
+                    row['faculty'] = COURSE_FACULTY_MAP.get(row['course_code'][:2], 'Lainnya')
+                    self.rows.append(row)
+                self._class_index = artifact['class_index']
+                self.version = artifact['version']
+                self.origin = origin
+            self.stats['load_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            self._loaded = True
+            logger.info(f"Bundled course catalog {self.version} loaded from {self.origin}: "
+                        f"{len(self.rows)} courses in {self.stats['load_ms']}ms")
+
+    def _read(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """Load the artifact, falling back to compiling the local markdown"""
+        artifact = None
+        try:
+            with open(self.artifact_path, encoding='utf-8') as handle:
+                artifact = json.load(handle)
+            if artifact.get('format') != ARTIFACT_FORMAT:
+                logger.warning(f"Course catalog artifact format {artifact.get('format')} is not supported")
+                artifact = None
+        except FileNotFoundError:
+            logger.warning(f"Course catalog artifact not found: {self.artifact_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Course catalog artifact unreadable: {e}")
+
+        try:
+            with open(self.source_path, encoding='utf-8') as handle:
+                content = handle.read()
+        except OSError:
+            return artifact, 'artifact' if artifact is not None else None
+
+        if artifact is not None and artifact.get('version') == source_version(content):
+            return artifact, 'artifact'
+        if artifact is not None:
+            logger.warning("Course catalog artifact is older than COURSE_LIST.md; "
+                           "run `python build_course_catalog.py` to rebuild it")
+        return compile_catalog(content), 'markdown'
+
+    def get_rows(self) -> List[Dict]:
+        """All bundled courses (ordered by course_code, class_type)"""
+        self._ensure_loaded()
+        return self.rows
+
+    def get_by_class_id(self, class_id: str) -> Optional[Dict]:
+        """Bundled course of a class ID, or None"""
+        self._ensure_loaded()
+        position = self._class_index.get(str(class_id))
+        return self.rows[position] if position is not None else None
+
+    def get_stats(self) -> Dict:
+        """Get version, origin, course count and load time"""
+        return {
+            **self.stats,
+            'loaded': self._loaded,
+            'version': self.version,
+            'origin': self.origin,
+            'courses': len(self.rows)
+        }
+
+
+_default_catalog = BundledCatalog()
+
+
+def get_bundled_catalog() -> BundledCatalog:
+    """Get the process-wide bundled course catalog"""
+    return _default_catalog
@@ -39,11 +39,15 @@ class WARKRSController:
         self.target_courses = target_courses.copy()
         self.settings = settings
         self.debug_mode = debug_mode
-        self.start_time = datetime.now()
+        self.start_time = datetime.utcnow()
         self.successful_courses = []
         
         # Initialize session and service
-        self.session = SiakadSession(cookies, settings.get('request_timeout', 20))
+        self.session = SiakadSession(
+            cookies,
+            settings.get('request_timeout', 20),
+            http2=settings.get('http2_enabled', False)
+        )
         self.krs_service = KRSService(self.session, urls)
         
         # Initialize Telegram notifier
@@ -61,6 +65,61 @@ class WARKRSController:
         self.last_activity = None
         self.session_warnings_count = 0
         self.last_heartbeat_cycle = 0
+        self.warmup_report = None
+    
+    def warm_up(self) -> dict:
+        """
+        Warm up the SIAKAD session ahead of the first cycle
+        
+        Returns:
+            Warm-up report with timings (see SiakadSession.warm_up)
+        """
+        self.warmup_report = self.session.warm_up(
+            self.krs_service.urls['pilih_mk'],
+            self.settings.get('warmup_connections', 2)
+        )
+        return self.warmup_report
+    
+    def export_state(self) -> dict:
+        """
+        Export progress so the next cycle can run in another process
+        
+        Returns:
+            JSON-serializable controller state
+        """
+        return {
+            'cycle_count': self.cycle_count,
+            'remaining_targets': sorted(self.remaining_targets),
+            'successful_courses': list(self.successful_courses),
+            'start_time': self.start_time.isoformat(),
+            'session_warnings_count': self.session_warnings_count,
+            'last_heartbeat_cycle': self.last_heartbeat_cycle,
+            'consecutive_session_failures': getattr(self, 'consecutive_session_failures', 0),
+            'consecutive_cycle_errors': getattr(self, 'consecutive_cycle_errors', 0)
+        }
+    
+    def restore_state(self, state: dict) -> None:
+        """
+        Restore progress exported by export_state()
+        
+        Args:
+            state: Controller state dictionary
+        """
+        state = state or {}
+        self.cycle_count = state.get('cycle_count', 0)
+        if 'remaining_targets' in state:
+            self.remaining_targets = set(state['remaining_targets']) & set(self.target_courses)
+        self.successful_courses = list(state.get('successful_courses', []))
+        if state.get('start_time'):
+            self.start_time = datetime.fromisoformat(state['start_time'])
+        self.session_warnings_count = state.get('session_warnings_count', 0)
+        self.last_heartbeat_cycle = state.get('last_heartbeat_cycle', 0)
+        self.consecutive_session_failures = state.get('consecutive_session_failures', 0)
+        self.consecutive_cycle_errors = state.get('consecutive_cycle_errors', 0)
+    
+    def get_cookies(self) -> Dict[str, str]:
+        """Get current session cookies (SIAKAD may rotate ci_session)"""
+        return {cookie.name: cookie.value for cookie in self.session.session.cookies}
     
     def clear_screen(self) -> None:
         """Clear terminal screen"""
@@ -303,6 +362,12 @@ class WARKRSController:
         
         delay_seconds = self.settings.get('delay_seconds', 45)
         
+        if self.settings.get('warmup_enabled', True):
+            report = self.warm_up()
+            print(f"🔥 Warm-up selesai dalam {report['total_ms']}ms "
+                  f"({report['connections_opened']} koneksi, autentikasi: "
+                  f"{'OK' if report['authenticated'] else 'GAGAL'})")
+        
         try:
             while self.remaining_targets:
                 try:
@@ -315,7 +380,7 @@ class WARKRSController:
                         break
                     
                     # Calculate elapsed time
-                    elapsed = datetime.now() - self.start_time
+                    elapsed = datetime.utcnow() - self.start_time
                     elapsed_str = str(elapsed).split('.')[0]  # Remove microseconds
                     
                     # Send cycle notifications if appropriate
@@ -365,7 +430,7 @@ class WARKRSController:
             
             # Success completion
             if not self.remaining_targets:
-                elapsed = datetime.now() - self.start_time
+                elapsed = datetime.utcnow() - self.start_time
                 hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
                 minutes, seconds = divmod(remainder, 60)
                 time_str = f"{hours}h {minutes}m {seconds}s" if hours > 0 else f"{minutes}m {seconds}s"
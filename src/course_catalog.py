@@ -0,0 +1,165 @@
+"""
+Course Catalog Cache
+Process-wide, versioned snapshot of the active course catalog
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'warkrs:catalog:version'
+
+
+def format_course_label(row: Dict) -> str:
+    """Build the display label used by the settings form and /api/courses"""
+    label = f"{row['course_code']} ({row['class_type']}) - {row['course_name']}"
+    if row.get('sks'):
+        label += f" [{row['sks']} SKS]"
+    return label
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the active catalog at one version
+
+    Attributes:
+        version: Catalog version the rows were loaded at
+        digest: Content hash of the rows (identical in every process, used for ETags/cursors)
+        rows: Course dicts ordered by course_code, class_type
+        choices: (class_id, label) pairs for form choices
+        labels: class_id -> label
+        by_class_id: class_id -> course dict
+        by_id: course id -> course dict
+    """
+
+    def __init__(self, version: int, rows: List[Dict]):
+        self.version = version
+        self.loaded_at = time.time()
+        self.rows = rows
+        self.digest = hashlib.sha1(
+            json.dumps(rows, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:16]
+        self.choices: List[Tuple[str, str]] = [(row['class_id'], format_course_label(row)) for row in rows]
+        self.labels: Dict[str, str] = dict(self.choices)
+        self.by_class_id: Dict[str, Dict] = {row['class_id']: row for row in rows}
+        self.by_id: Dict[int, Dict] = {row['id']: row for row in rows}
+
+
+class CourseCatalogCache:
+    """
+    Caches the active course catalog for every request and WAR start
+
+    The catalog is read on every settings page, WAR start and course API call
+    but changes only when a course is added, edited, deleted or migrated. Those
+    writers call `bump()`, which increments a version counter shared through
+    Redis (so every web and worker process drops its copy) and locally. Readers
+    compare the shared version with their snapshot and reload only when it
+    moved. Without Redis a snapshot is also reloaded after `max_age` seconds, so
+    other processes converge even though they cannot see the counter.
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[Dict]]] = None, max_age: float = 300.0):
+        """
+        Initialize cache
+
+        Args:
+            loader: Returns the active course rows (ordered) from the database
+            max_age: Seconds a snapshot may be served when the shared version is unavailable
+        """
+        self.loader = loader
+        self.max_age = max_age
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._local_version = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'last_load_ms': 0.0
+        }
+
+    def _current_version(self) -> Tuple[int, bool]:
+        """Get (version, shared) where shared tells whether Redis answered"""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return int(client.get(VERSION_KEY) or 0) + self._local_version, True
+            except Exception as e:
+                logger.debug(f"Catalog version read failed: {e}")
+        return self._local_version, False
+
+    def get(self) -> CatalogSnapshot:
+        """
+        Get the catalog snapshot, reloading it if the version changed
+
+        Returns:
+            Current CatalogSnapshot
+        """
+        version, shared = self._current_version()
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, version, shared):
+            self.stats['hits'] += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, version, shared):
+                self.stats['hits'] += 1
+                return snapshot
+
+            # The version is read before loading: a bump during the load makes
+            # the next reader reload instead of keeping stale rows
+            started = time.perf_counter()
+            snapshot = CatalogSnapshot(version, self.loader())
+            self._snapshot = snapshot
+            self.stats['misses'] += 1
+            self.stats['last_load_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"Course catalog v{version} loaded: {len(snapshot.rows)} courses "
+                        f"in {self.stats['last_load_ms']}ms")
+            return snapshot
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot], version: int, shared: bool) -> bool:
+        if snapshot is None or snapshot.version != version:
+            return False
+        return shared or time.time() - snapshot.loaded_at < self.max_age
+
+    def bump(self) -> None:
+        """Invalidate the catalog in every process (call after committing course changes)"""
+        with self._lock:
+            self._local_version += 1
+            self._snapshot = None
+            self.stats['invalidations'] += 1
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.incr(VERSION_KEY)
+            except Exception as e:
+                logger.warning(f"Catalog version bump failed, other processes refresh within "
+                               f"{self.max_age:.0f}s: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters and the cached version"""
+        snapshot = self._snapshot
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            'version': snapshot.version if snapshot else None,
+            'courses': len(snapshot.rows) if snapshot else 0
+        }
+
+
+_default_cache = CourseCatalogCache()
+
+
+def get_course_catalog() -> CourseCatalogCache:
+    """Get the process-wide course catalog cache (loader is set by the app)"""
+    return _default_cache
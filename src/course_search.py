@@ -0,0 +1,246 @@
+"""
+Course Search
+Indexed course search: SQLite FTS5, PostgreSQL trigram, or in-memory fallback
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'course_search'
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Case- and accent-fold text the same way for documents and queries"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def search_tokens(term: str) -> List[str]:
+    """Split a search term into normalized word tokens"""
+    return re.findall(r'\w+', normalize_search_text(term))
+
+
+class CourseSearch:
+    """
+    Search index over active courses, kept in a side table next to `courses`
+
+    - sqlite: FTS5 table (rowid = course id, unicode61 tokenizer with
+      diacritics removed), every query token is a prefix match, ranked by
+      bm25 with course code weighted above name and faculty/department
+    - postgresql: table of normalized documents with a pg_trgm GIN index,
+      so '%token%' matches use the index; ranked by course code prefix then
+      word similarity
+    - memory: scans the cached catalog when neither is available
+
+    The course CRUD routes call `index_courses` after committing and
+    migrations call `rebuild`; `ensure` creates the table and rebuilds it if
+    it is out of step with the active course count.
+    """
+
+    def __init__(self):
+        self.backend: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def ensure(self) -> str:
+        """
+        Create the search table for this database if needed
+
+        Returns:
+            Backend in use: 'fts5', 'trigram' or 'memory'
+        """
+        if self.backend is not None:
+            return self.backend
+        with self._lock:
+            if self.backend is not None:
+                return self.backend
+            from app import db
+            dialect = db.engine.dialect.name
+            backend = 'memory'
+            try:
+                if dialect == 'sqlite':
+                    with db.engine.begin() as conn:
+                        conn.execute(db.text(
+                            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                            f"code, name, extra, tokenize = 'unicode61 remove_diacritics 2')"
+                        ))
+                    backend = 'fts5'
+                elif dialect == 'postgresql':
+                    with db.engine.begin() as conn:
+                        conn.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                        conn.execute(db.text(
+                            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+                            f"course_id INTEGER PRIMARY KEY REFERENCES courses(id) ON DELETE CASCADE, "
+                            f"code TEXT NOT NULL, document TEXT NOT NULL)"
+                        ))
+                        conn.execute(db.text(
+                            f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_document_trgm "
+                            f"ON {TABLE} USING gin (document gin_trgm_ops)"
+                        ))
+                    backend = 'trigram'
+            except Exception as e:
+                logger.warning(f"Course search index unavailable on {dialect}, scanning the catalog instead: {e}")
+            self.backend = backend
+
+        if backend != 'memory' and self._indexed_count() != self._active_count():
+            self.rebuild()
+        return backend
+
+    def _indexed_count(self) -> int:
+        from app import db
+        with db.engine.connect() as conn:
+            return conn.execute(db.text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+
+    def _active_count(self) -> int:
+        from app import db, Course
+        with db.engine.connect() as conn:
+            return conn.execute(
+                db.select(db.func.count()).select_from(Course).where(Course.is_active == True)
+            ).scalar()
+
+    def rebuild(self) -> int:
+        """
+        Re-index every active course (after bulk imports/migrations)
+
+        Returns:
+            Number of courses indexed
+        """
+        if self.ensure() == 'memory':
+            return 0
+        from app import db, Course
+        with db.engine.begin() as conn:
+            conn.execute(db.text(f"DELETE FROM {TABLE}"))
+            courses = conn.execute(db.select(
+                Course.id, Course.course_code, Course.course_name, Course.class_type,
+                Course.faculty, Course.department
+            ).where(Course.is_active == True)).all()
+            self._insert(conn, courses)
+        logger.info(f"Course search index rebuilt: {len(courses)} courses ({self.backend})")
+        return len(courses)
+
+    def index_courses(self, courses: Iterable) -> None:
+        """
+        Update the index for changed courses (inactive courses are removed)
+
+        Args:
+            courses: Course objects that were added, edited or deleted
+        """
+        if self.ensure() == 'memory':
+            return
+        from app import db
+        courses = list(courses)
+        key = 'rowid' if self.backend == 'fts5' else 'course_id'
+        with db.engine.begin() as conn:
+            for course in courses:
+                conn.execute(db.text(f"DELETE FROM {TABLE} WHERE {key} = :id"), {'id': course.id})
+            self._insert(conn, [course for course in courses if course.is_active])
+
+    def _insert(self, conn, courses) -> None:
+        from app import db
+        rows = [{
+            'id': course.id,
+            'code': normalize_search_text(f"{course.course_code} {course.class_type}"),
+            'name': normalize_search_text(course.course_name),
+            'extra': normalize_search_text(f"{course.faculty or ''} {course.department or ''}")
+        } for course in courses]
+        if not rows:
+            return
+        if self.backend == 'fts5':
+            conn.execute(db.text(
+                f"INSERT INTO {TABLE} (rowid, code, name, extra) VALUES (:id, :code, :name, :extra)"
+            ), rows)
+        else:
+            conn.execute(db.text(
+                f"INSERT INTO {TABLE} (course_id, code, document) "
+                f"VALUES (:id, :code, :code || ' ' || :name || ' ' || :extra)"
+            ), rows)
+
+    def search(self, term: str, faculty: Optional[str] = None, limit: Optional[int] = None) -> List[int]:
+        """
+        Find active courses matching every token of a search term
+
+        Args:
+            term: Search text (course code, name, class, faculty or department)
+            faculty: Optional case-insensitive faculty substring filter
+            limit: Maximum results
+
+        Returns:
+            Matching course IDs, best match first
+        """
+        tokens = search_tokens(term)
+        if not tokens:
+            return []
+        backend = self.ensure()
+        if backend == 'fts5':
+            return self._search_fts5(tokens, faculty, limit)
+        if backend == 'trigram':
+            return self._search_trigram(tokens, faculty, limit)
+        return self._search_memory(tokens, faculty, limit)
+
+    def _search_fts5(self, tokens: List[str], faculty: Optional[str], limit: Optional[int]) -> List[int]:
+        from app import db
+        params = {
+            'match': ' '.join(f'"{token}"*' for token in tokens),
+            'code_prefix': f"{tokens[0]}%",
+            'faculty': f"%{faculty}%",
+            'limit': limit or -1
+        }
+        sql = (
+            f"SELECT c.id FROM {TABLE} s JOIN courses c ON c.id = s.rowid "
+            f"WHERE {TABLE} MATCH :match AND c.is_active = 1 "
+            + ("AND c.faculty LIKE :faculty " if faculty else "")
+            + f"ORDER BY (s.code LIKE :code_prefix) DESC, bm25({TABLE}, 10.0, 4.0, 1.0), c.course_code, c.class_type "
+            f"LIMIT :limit"
+        )
+        with db.engine.connect() as conn:
+            return [row[0] for row in conn.execute(db.text(sql), params)]
+
+    def _search_trigram(self, tokens: List[str], faculty: Optional[str], limit: Optional[int]) -> List[int]:
+        from app import db
+        params = {f"t{i}": f"%{token}%" for i, token in enumerate(tokens)}
+        params.update({
+            'query': ' '.join(tokens),
+            'code_prefix': f"{tokens[0]}%",
+            'faculty': f"%{faculty}%",
+            'limit': limit
+        })
+        conditions = ' AND '.join(f"s.document LIKE :t{i}" for i in range(len(tokens)))
+        sql = (
+            f"SELECT c.id FROM {TABLE} s JOIN courses c ON c.id = s.course_id "
+            f"WHERE {conditions} AND c.is_active "
+            + ("AND c.faculty ILIKE :faculty " if faculty else "")
+            + "ORDER BY (s.code LIKE :code_prefix) DESC, word_similarity(:query, s.document) DESC, "
+            "c.course_code, c.class_type LIMIT :limit"
+        )
+        with db.engine.connect() as conn:
+            return [row[0] for row in conn.execute(db.text(sql), params)]
+
+    def _search_memory(self, tokens: List[str], faculty: Optional[str], limit: Optional[int]) -> List[int]:
+        from .course_catalog import get_course_catalog
+        faculty = normalize_search_text(faculty)
+        matches = []
+        for row in get_course_catalog().get().rows:
+            code = normalize_search_text(f"{row['course_code']} {row['class_type']}")
+            document = ' '.join([code, normalize_search_text(row['course_name']),
+                                 normalize_search_text(f"{row['faculty']} {row['department']}")])
+            if faculty and faculty not in normalize_search_text(row['faculty']):
+                continue
+            if all(token in document for token in tokens):
+                matches.append((not code.startswith(tokens[0]), row['id']))
+        matches.sort(key=lambda match: match[0])  # Stable: keeps catalog order within each group
+        ids = [course_id for _, course_id in matches]
+        return ids[:limit] if limit else ids
+
+
+_default_search = CourseSearch()
+
+
+def get_course_search() -> CourseSearch:
+    """Get the process-wide course search index"""
+    return _default_search
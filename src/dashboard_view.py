@@ -0,0 +1,187 @@
+"""
+Dashboard View Provider
+Loads the per-user dashboard data in one query and caches it briefly
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_json_list(value: Optional[str]) -> List:
+    """Decode a JSON list column, treating missing or invalid values as empty"""
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+class DashboardProvider:
+    """
+    Builds the dashboard view of a user
+
+    The active WAR session and the latest activity logs come from a single
+    statement: the user row, outer-joined to the newest active session and
+    to the top-N log subquery (both served by their composite indexes).
+    Settings are taken from the already loaded user (load_user eager-loads
+    them). JSON columns are decoded once and the resulting plain view (no
+    ORM objects, so it outlives the request session) is cached per user for
+    `ttl` seconds. Live progress reaches the page through the status stream,
+    so a short TTL only delays the server-rendered summary. Routes that
+    change what the dashboard shows call `invalidate`.
+    """
+
+    def __init__(self, ttl: float = 5.0, log_limit: int = 10, max_entries: int = 1024):
+        """
+        Initialize provider
+
+        Args:
+            ttl: Seconds a user's view is served from the cache
+            log_limit: Number of recent activity logs shown
+            max_entries: Cached users before expired/oldest entries are evicted
+        """
+        self.ttl = ttl
+        self.log_limit = log_limit
+        self.max_entries = max_entries
+
+        self._cache: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+
+    def get(self, user) -> Dict[str, Any]:
+        """
+        Get the dashboard view of a user
+
+        Args:
+            user: Loaded User (its settings relationship should be eager-loaded)
+
+        Returns:
+            Dict with current_session, recent_logs, settings, target_courses and obtained_courses
+        """
+        now = time.monotonic()
+        cached = self._cache.get(user.id)
+        if cached is not None and cached[0] > now:
+            self.stats['hits'] += 1
+            return cached[1]
+
+        self.stats['misses'] += 1
+        view = self._load(user)
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._evict(now)
+            self._cache[user.id] = (now + self.ttl, view)
+        return view
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached view (after starting/stopping a run or saving settings)"""
+        with self._lock:
+            if self._cache.pop(user_id, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def _evict(self, now: float) -> None:
+        """Remove expired entries, then the oldest ones (called with the lock held)"""
+        for user_id in [user_id for user_id, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[user_id]
+        if len(self._cache) >= self.max_entries:
+            for user_id, _ in sorted(self._cache.items(), key=lambda item: item[1][0])[:len(self._cache) // 4 + 1]:
+                del self._cache[user_id]
+
+    def statement(self, user_id: int):
+        """
+        Build the dashboard query: one row per recent log, active session columns repeated
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            SQLAlchemy select statement
+        """
+        from app import db, User, WarSession, ActivityLog
+
+        active_session_id = (
+            db.select(WarSession.id)
+            .where(WarSession.user_id == user_id, WarSession.status == 'active')
+            .order_by(WarSession.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        latest_logs = (
+            db.select(ActivityLog)
+            .where(ActivityLog.user_id == user_id)
+            .order_by(ActivityLog.timestamp.desc())
+            .limit(self.log_limit)
+            .subquery()
+        )
+        recent = db.aliased(ActivityLog, latest_logs)
+
+        return (
+            db.select(
+                WarSession.id, WarSession.total_attempts, WarSession.successful_attempts,
+                WarSession.last_activity, WarSession.courses_obtained,
+                recent.level, recent.message, recent.timestamp
+            )
+            .select_from(User)
+            .outerjoin(WarSession, WarSession.id == active_session_id)
+            .outerjoin(recent, db.true())
+            .where(User.id == user_id)
+        )
+
+    def _load(self, user) -> Dict[str, Any]:
+        from app import db
+
+        rows = db.session.execute(self.statement(user.id)).all()
+
+        current_session = None
+        if rows and rows[0].id is not None:
+            first = rows[0]
+            current_session = {
+                'id': first.id,
+                'total_attempts': first.total_attempts or 0,
+                'successful_attempts': first.successful_attempts or 0,
+                'last_activity': first.last_activity
+            }
+        recent_logs = sorted(
+            ({'level': row.level, 'message': row.message, 'timestamp': row.timestamp}
+             for row in rows if row.timestamp is not None),
+            key=lambda log: log['timestamp'], reverse=True
+        )
+
+        settings = user.settings
+        return {
+            'current_session': current_session,
+            'recent_logs': recent_logs,
+            'settings': {
+                'ci_session': bool(settings and settings.ci_session),
+                'target_courses': bool(settings and settings.target_courses)
+            },
+            'target_courses': _parse_json_list(settings.target_courses if settings else None),
+            'obtained_courses': _parse_json_list(rows[0].courses_obtained if current_session else None)
+        }
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters and cached user count"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            'cached_users': len(self._cache)
+        }
+
+
+_default_provider = DashboardProvider()
+
+
+def get_dashboard_provider() -> DashboardProvider:
+    """Get the process-wide dashboard view provider"""
+    return _default_provider
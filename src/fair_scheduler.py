@@ -0,0 +1,285 @@
+"""
+Fair Scheduler
+Per-user token buckets and round-robin admission for WAR cycles
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'warkrs:fair:'
+
+# Atomic admission: refill bucket, prune stale waiters and expired leases,
+# then admit the user only if it is among the oldest waiters for a free slot
+# (any waiter when max_running is 0, i.e. no global cap).
+ADMIT_SCRIPT = """
+local waiting, seen, running = KEYS[1], KEYS[2], KEYS[3]
+local bucket, user_wait, all_wait = KEYS[4], KEYS[5], KEYS[6]
+local user, now = ARGV[1], tonumber(ARGV[2])
+local capacity, rate = tonumber(ARGV[3]), tonumber(ARGV[4])
+local max_running, lease, ttl = tonumber(ARGV[5]), ARGV[6], tonumber(ARGV[7])
+local stale_after = tonumber(ARGV[8])
+
+local tokens = tonumber(redis.call('HGET', bucket, 'tokens') or capacity)
+local ts = tonumber(redis.call('HGET', bucket, 'ts') or now)
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+redis.call('HSET', bucket, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', bucket, 86400)
+if tokens < 1 then
+    return {0, tostring((1 - tokens) / rate), '0'}
+end
+
+for _, gone in ipairs(redis.call('ZRANGEBYSCORE', seen, '-inf', now - stale_after)) do
+    redis.call('ZREM', waiting, gone)
+    redis.call('ZREM', seen, gone)
+end
+redis.call('ZADD', waiting, 'NX', now, user)
+redis.call('ZADD', seen, now, user)
+redis.call('ZREMRANGEBYSCORE', running, '-inf', now)
+
+local free = max_running - redis.call('ZCARD', running)
+if max_running > 0 and (free <= 0 or redis.call('ZRANK', waiting, user) >= free) then
+    return {0, '1', '0'}
+end
+
+local waited = now - tonumber(redis.call('ZSCORE', waiting, user))
+redis.call('ZREM', waiting, user)
+redis.call('ZREM', seen, user)
+redis.call('HSET', bucket, 'tokens', tostring(tokens - 1))
+redis.call('ZADD', running, now + ttl, lease)
+
+local waited_ms = waited * 1000
+for _, key in ipairs({user_wait, all_wait}) do
+    redis.call('HINCRBY', key, 'admissions', 1)
+    redis.call('HINCRBYFLOAT', key, 'total_wait_ms', waited_ms)
+    redis.call('HSET', key, 'last_wait_ms', tostring(waited_ms))
+    if waited_ms > tonumber(redis.call('HGET', key, 'max_wait_ms') or 0) then
+        redis.call('HSET', key, 'max_wait_ms', tostring(waited_ms))
+    end
+    redis.call('EXPIRE', key, 86400)
+end
+return {1, '0', tostring(waited_ms)}
+"""
+
+
+class FairScheduler:
+    """
+    Fairness layer in front of WAR cycles
+
+    Before running a cycle a task asks for admission. Each user has a token
+    bucket (`capacity` burst) refilled at the user's own cycle pace (one
+    token per `cycle_delay`, never faster than `cycles_per_minute`), so
+    retries, redeliveries and restarts cannot run a user's cycles faster
+    than configured and monopolize the workers. Optionally at most
+    `max_running` cycles run at once; this cap is opt-in (0 by default)
+    because it only takes effect below the total worker concurrency. When slots are capped and contended,
+    users waiting for a cycle are admitted oldest-waiter first, so every user gets a turn before anyone
+    gets a second one. Wait time from first request to admission is
+    recorded per user. State lives in Redis (one Lua call per admission)
+    with an in-process fallback for the threading mode.
+    """
+
+    def __init__(self, capacity: float = 3, cycles_per_minute: float = 6,
+                 max_running: int = 0, lease_ttl: int = 600, stale_after: float = 30.0):
+        """
+        Initialize scheduler
+
+        Args:
+            capacity: Token bucket size (burst of cycles per user)
+            cycles_per_minute: Maximum token refill rate per user
+            max_running: Cycles allowed to run concurrently across all users
+                (0 = no global cap, the worker concurrency is the limit)
+            lease_ttl: Seconds after which a running slot is reclaimed (crashed worker)
+            stale_after: Seconds after which a waiter that stopped asking is dropped
+        """
+        self.capacity = capacity
+        self.rate = cycles_per_minute / 60.0
+        self.max_running = max_running
+        self.lease_ttl = lease_ttl
+        self.stale_after = stale_after
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._waiting: Dict[int, float] = {}
+        self._seen: Dict[int, float] = {}
+        self._running: Dict[str, float] = {}
+        self._wait_stats: Dict[str, Dict[str, float]] = {}
+        self._script = None
+
+    def admit(self, user_id: int, cycle_delay: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Ask to run one cycle for a user
+
+        Args:
+            user_id: User ID
+            cycle_delay: Seconds between the user's cycles; refills the
+                bucket at one token per cycle_delay (capped at cycles_per_minute)
+
+        Returns:
+            Tuple of (lease, retry_after). A non-None lease means the cycle may
+            run now and must be given back with release(); otherwise ask again
+            after retry_after seconds.
+        """
+        lease = uuid.uuid4().hex
+        rate = min(self.rate, 1.0 / cycle_delay) if cycle_delay and cycle_delay > 0 else self.rate
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return self._admit_redis(client, user_id, lease, rate)
+            except Exception as e:
+                logger.warning(f"Fair scheduler Redis admission failed, using local state: {e}")
+        return self._admit_local(user_id, lease, rate)
+
+    def _admit_redis(self, client, user_id: int, lease: str, rate: float) -> Tuple[Optional[str], float]:
+        if self._script is None:
+            self._script = client.register_script(ADMIT_SCRIPT)
+        admitted, retry_after, _ = self._script(
+            keys=[
+                f"{KEY_PREFIX}waiting", f"{KEY_PREFIX}seen", f"{KEY_PREFIX}running",
+                f"{KEY_PREFIX}bucket:{user_id}", f"{KEY_PREFIX}wait:{user_id}", f"{KEY_PREFIX}wait:all"
+            ],
+            args=[user_id, time.time(), self.capacity, rate, self.max_running,
+                  lease, self.lease_ttl, self.stale_after]
+        )
+        if int(admitted):
+            return lease, 0.0
+        return None, float(retry_after)
+
+    def _admit_local(self, user_id: int, lease: str, rate: float) -> Tuple[Optional[str], float]:
+        now = time.time()
+        with self._lock:
+            tokens, ts = self._buckets.get(user_id, (self.capacity, now))
+            tokens = min(self.capacity, tokens + max(0.0, now - ts) * rate)
+            self._buckets[user_id] = (tokens, now)
+            if tokens < 1:
+                return None, (1 - tokens) / rate
+
+            for gone in [uid for uid, last in self._seen.items() if last < now - self.stale_after]:
+                self._waiting.pop(gone, None)
+                self._seen.pop(gone, None)
+            self._waiting.setdefault(user_id, now)
+            self._seen[user_id] = now
+            self._running = {key: expiry for key, expiry in self._running.items() if expiry > now}
+
+            free = self.max_running - len(self._running)
+            queue = sorted(self._waiting, key=self._waiting.get)
+            if self.max_running > 0 and (free <= 0 or queue.index(user_id) >= free):
+                return None, 1.0
+
+            waited_ms = (now - self._waiting.pop(user_id)) * 1000
+            self._seen.pop(user_id, None)
+            self._buckets[user_id] = (tokens - 1, now)
+            self._running[lease] = now + self.lease_ttl
+            for key in (str(user_id), 'all'):
+                stats = self._wait_stats.setdefault(
+                    key, {'admissions': 0, 'total_wait_ms': 0.0, 'max_wait_ms': 0.0, 'last_wait_ms': 0.0}
+                )
+                stats['admissions'] += 1
+                stats['total_wait_ms'] += waited_ms
+                stats['last_wait_ms'] = waited_ms
+                stats['max_wait_ms'] = max(stats['max_wait_ms'], waited_ms)
+            return lease, 0.0
+
+    def release(self, lease: Optional[str]) -> None:
+        """
+        Give back the running slot of an admitted cycle
+
+        Args:
+            lease: Lease returned by admit()
+        """
+        if not lease:
+            return
+        with self._lock:
+            self._running.pop(lease, None)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.zrem(f"{KEY_PREFIX}running", lease)
+            except Exception as e:
+                logger.debug(f"Fair scheduler lease release failed: {e}")
+
+    def wait_for_turn(self, user_id: int, session_id: int, cycle_delay: Optional[float] = None,
+                      max_wait: float = 300.0) -> Tuple[Optional[str], bool]:
+        """
+        Block until the user is admitted (long-running task mode)
+
+        Args:
+            user_id: User ID
+            session_id: WAR session ID (waiting ends early on a stop request)
+            cycle_delay: Seconds between the user's cycles (see admit)
+            max_wait: Give up waiting after this many seconds
+
+        Returns:
+            Tuple of (lease, stop_requested); lease is None when the wait timed
+            out or a stop was requested, and the cycle must not run then
+        """
+        from .stop_signal import get_stop_channel
+
+        deadline = time.monotonic() + max_wait
+        while True:
+            lease, retry_after = self.admit(user_id, cycle_delay)
+            if lease:
+                return lease, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"User {user_id}: fair scheduler wait exceeded {max_wait}s")
+                return None, False
+            if get_stop_channel().wait(session_id, min(retry_after, remaining)):
+                return None, True
+
+    def get_wait_metrics(self, user_id: Optional[int] = None) -> Dict:
+        """
+        Get wait-time metrics for one user or all users
+
+        Args:
+            user_id: User ID (None for the aggregate)
+
+        Returns:
+            Dict with admissions, avg_wait_ms, max_wait_ms and last_wait_ms
+        """
+        key = 'all' if user_id is None else str(user_id)
+        stats = None
+        client = get_redis_client()
+        if client is not None:
+            try:
+                stats = client.hgetall(f"{KEY_PREFIX}wait:{key}") or None
+            except Exception as e:
+                logger.debug(f"Fair scheduler metrics read failed: {e}")
+        if stats is None:
+            with self._lock:
+                stats = dict(self._wait_stats.get(key, {}))
+
+        admissions = int(stats.get('admissions', 0))
+        total = float(stats.get('total_wait_ms', 0.0))
+        return {
+            'admissions': admissions,
+            'avg_wait_ms': round(total / admissions, 1) if admissions else 0.0,
+            'max_wait_ms': round(float(stats.get('max_wait_ms', 0.0)), 1),
+            'last_wait_ms': round(float(stats.get('last_wait_ms', 0.0)), 1)
+        }
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_fair_scheduler() -> FairScheduler:
+    """Get the process-wide fair scheduler (configured from FAIR_* environment variables)"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = FairScheduler(
+                    capacity=float(os.getenv('FAIR_BUCKET_CAPACITY', 3)),
+                    cycles_per_minute=float(os.getenv('FAIR_CYCLES_PER_MINUTE', 6)),
+                    max_running=int(os.getenv('FAIR_MAX_RUNNING', 0)),
+                    lease_ttl=int(os.getenv('FAIR_LEASE_TTL', 600))
+                )
+    return _default_scheduler
@@ -0,0 +1,163 @@
+"""
+HTTP/2 Transport
+Optional multiplexed transport for SiakadSession built on httpx
+"""
+
+import ssl
+import threading
+from typing import Dict, Optional
+import logging
+
+import requests
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx needs the h2 package for HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class HTTP2Response:
+    """Read-only requests-like view over an httpx response"""
+
+    def __init__(self, response: 'httpx.Response'):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    @property
+    def wire_bytes(self) -> int:
+        """Body bytes received before content decoding"""
+        return self._response.num_bytes_downloaded
+
+    @property
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def raise_for_status(self) -> None:
+        """Raise requests.HTTPError so callers handle both transports the same way"""
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class HTTP2Transport:
+    """
+    HTTP/2 transport sharing cookies and fingerprint with a cloudscraper session
+
+    All requests of a cycle (enrollment fetch and registration POSTs) go over
+    one multiplexed connection per origin. The cookie jar and headers are the
+    scraper's own objects, so cf_clearance/ci_session behave exactly as with
+    the HTTP/1.1 path. When Cloudflare answers with a challenge the request is
+    replayed through the scraper, which knows how to solve it.
+    """
+
+    CHALLENGE_STATUS_CODES = (403, 429, 503)
+
+    def __init__(self, scraper: requests.Session, timeout: int = 20):
+        """
+        Initialize HTTP/2 transport
+
+        Args:
+            scraper: Cloudscraper session providing headers, cookies and challenge fallback
+            timeout: Request timeout in seconds
+        """
+        if not HTTP2_AVAILABLE:
+            raise RuntimeError("HTTP/2 transport requires httpx and h2 (pip install h2)")
+
+        self.scraper = scraper
+        self.timeout = timeout
+        self.client = httpx.Client(
+            http2=True,
+            headers=dict(scraper.headers),
+            cookies=scraper.cookies,  # Same jar object: Set-Cookie updates are shared
+            timeout=timeout,
+            follow_redirects=True,
+            verify=self._create_ssl_context()
+        )
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.challenge_fallbacks = 0
+
+    def _create_ssl_context(self) -> ssl.SSLContext:
+        """Build a dedicated SSL context using the scraper's cipher suite"""
+        context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+        cipher_suite = getattr(self.scraper, 'cipherSuite', None)
+        if cipher_suite:
+            try:
+                context.set_ciphers(cipher_suite)
+            except ssl.SSLError as e:
+                logger.debug(f"Could not apply scraper cipher suite to HTTP/2 context: {e}")
+        context.set_ecdh_curve(getattr(self.scraper, 'ecdhCurve', 'prime256v1'))
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        return context
+
+    @classmethod
+    def _is_challenge(cls, response: 'httpx.Response') -> bool:
+        """Detect a Cloudflare challenge/block page"""
+        if response.status_code not in cls.CHALLENGE_STATUS_CODES:
+            return False
+        if 'cf-mitigated' in response.headers:
+            return True
+        server = response.headers.get('server', '').lower()
+        return server.startswith('cloudflare') and (
+            '__cf_chl' in response.text or 'challenge-platform' in response.text
+        )
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None,
+                allow_redirects: bool = True, data: Optional[Dict] = None, **kwargs):
+        """
+        Send a request over HTTP/2, falling back to the scraper on challenges
+
+        Args:
+            method: HTTP method
+            url: Target URL
+            timeout: Request timeout in seconds
+            allow_redirects: Follow redirects
+            data: Form data
+            **kwargs: Additional request parameters (headers, params)
+
+        Returns:
+            HTTP2Response, or a requests Response when the scraper handled it
+        """
+        response = self.client.request(
+            method, url,
+            data=data,
+            headers=kwargs.get('headers'),
+            params=kwargs.get('params'),
+            timeout=timeout or self.timeout,
+            follow_redirects=allow_redirects
+        )
+        with self._lock:
+            self.requests_sent += 1
+
+        if self._is_challenge(response):
+            with self._lock:
+                self.challenge_fallbacks += 1
+            logger.info(f"Cloudflare challenge on HTTP/2 for {url}, retrying via cloudscraper")
+            return self.scraper.request(method, url, data=data, timeout=timeout or self.timeout,
+                                        allow_redirects=allow_redirects, **kwargs)
+
+        return HTTP2Response(response)
+
+    def get_stats(self) -> Dict:
+        """Get transport statistics"""
+        with self._lock:
+            return {
+                'requests_sent': self.requests_sent,
+                'challenge_fallbacks': self.challenge_fallbacks
+            }
+
+    def close(self) -> None:
+        """Close the multiplexed connections"""
+        self.client.close()
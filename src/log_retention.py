@@ -0,0 +1,283 @@
+"""
+Activity Log Retention
+Rolls up per-cycle log rows of finished sessions, expires old rows per level
+and archives everything it deletes to compressed JSONL files
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# INFO messages written once per WAR cycle (threaded, simplified and Celery runners)
+CYCLE_MESSAGE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'^Starting cycle \d+$',
+    r'^Cycle \d+ completed\. Valid: ',
+    r'^Cycle \d+ completed\. Total successful: ',
+    r'^Simplified cycle \d+ started$',
+    r'^Waiting \d+ seconds before next cycle$',
+    r'^Attempting to register course ',
+    r'^Telegram heartbeat notification sent for cycle \d+',
+)]
+CYCLE_NUMBER = re.compile(r'[Cc]ycle (\d+)')
+
+# Sessions whose run may still write logs are never rolled up
+UNFINISHED_STATUSES = ('active', 'stopping')
+
+DEFAULT_TTL_DAYS = {'INFO': 30, 'WARNING': 90, 'ERROR': 180, 'SUCCESS': 365}
+
+
+def is_cycle_message(message: Optional[str]) -> bool:
+    """True for the repetitive per-cycle INFO messages that a session summary replaces"""
+    return bool(message) and any(pattern.match(message) for pattern in CYCLE_MESSAGE_PATTERNS)
+
+
+class LogRetention:
+    """
+    Keeps the activity_logs table bounded
+
+    A run has two stages, both working in small batches with a commit per
+    batch so they never hold long locks next to the live log writers:
+
+    1. Rollup: once a WAR session has finished (and `rollup_after_hours` have
+       passed), its per-cycle INFO rows ("Starting cycle N", "Waiting 45
+       seconds ...") are replaced by a single summary row and the session is
+       marked with `logs_rolled_up_at` so it is not visited again. Rows are
+       read `batch_size` at a time in (timestamp, id) order.
+    2. Expiry: rows older than their level's TTL are deleted, oldest first,
+       through the (level, timestamp) index.
+
+    Every deleted row is first appended to a gzip JSONL file in `archive_dir`
+    (one gzip member per batch, so a partially written run still leaves
+    readable files). Without an archive directory rows are just deleted.
+    """
+
+    def __init__(self, ttl_days: Optional[Dict[str, int]] = None, rollup_after_hours: float = 1.0,
+                 archive_dir: Optional[str] = None, batch_size: int = 1000,
+                 max_seconds: float = 300.0):
+        """
+        Initialize retention job
+
+        Args:
+            ttl_days: Days rows of each level are kept (levels not listed are kept forever)
+            rollup_after_hours: Hours after a session finished before its cycle rows are rolled up
+            archive_dir: Directory for archived rows (None or empty disables archival)
+            batch_size: Rows (or sessions) handled per transaction
+            max_seconds: Time budget of one run; the rest is left for the next run
+        """
+        self.ttl_days = dict(ttl_days if ttl_days is not None else DEFAULT_TTL_DAYS)
+        self.rollup_after_hours = rollup_after_hours
+        self.archive_dir = archive_dir or None
+        self.batch_size = batch_size
+        self.max_seconds = max_seconds
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Run rollup then expiry (call inside an app context)
+
+        Args:
+            now: Reference time (UTC, defaults to now)
+
+        Returns:
+            Dict with sessions_rolled_up, rows_rolled_up, rows_expired (per level),
+            rows_archived, archive_file, complete and duration_ms
+        """
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        self._deadline = started + self.max_seconds
+        self._archive_path = None
+        self._stats = {
+            'sessions_rolled_up': 0,
+            'rows_rolled_up': 0,
+            'rows_expired': {},
+            'rows_archived': 0
+        }
+
+        complete = self.rollup_sessions(now) and self.expire_logs(now)
+
+        self._stats['archive_file'] = self._archive_path
+        self._stats['complete'] = complete
+        self._stats['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+        logger.info(f"Activity log retention: {self._stats}")
+        return self._stats
+
+    def _out_of_time(self) -> bool:
+        return time.monotonic() > self._deadline
+
+    def rollup_sessions(self, now: datetime) -> bool:
+        """
+        Replace the cycle rows of finished sessions by one summary row each
+
+        Returns:
+            False if the time budget ran out before every session was handled
+        """
+        from app import db, WarSession
+
+        cutoff = now - timedelta(hours=self.rollup_after_hours)
+        finished_at = db.func.coalesce(WarSession.stopped_at, WarSession.last_activity, WarSession.created_at)
+        while True:
+            sessions = db.session.execute(
+                db.select(WarSession.id, WarSession.user_id)
+                .where(WarSession.logs_rolled_up_at.is_(None),
+                       WarSession.status.notin_(UNFINISHED_STATUSES),
+                       finished_at < cutoff)
+                .order_by(WarSession.id)
+                .limit(self.batch_size)
+            ).all()
+            if not sessions:
+                return True
+            for session in sessions:
+                if self._out_of_time() or not self._rollup_session(session.id, session.user_id, now):
+                    return False
+
+    def _rollup_session(self, session_id: int, user_id: int, now: datetime) -> bool:
+        """
+        Summarize, archive and delete one session's cycle rows
+
+        Pages through the session's INFO rows by (timestamp, id) keyset (the
+        ix_activity_logs_user_session_ts index), archiving and deleting the
+        cycle rows of each page in its own transaction. The summary row and
+        logs_rolled_up_at are written after the last page. If the time budget
+        runs out first, the summary covers the rows removed so far and the
+        session is finished by a later run.
+
+        Returns:
+            False if the time budget ran out before the session was finished
+        """
+        from app import db, ActivityLog, WarSession
+
+        position = db.tuple_(ActivityLog.timestamp, ActivityLog.id)
+        after = None
+        rolled_up = max_cycle = 0
+        first_at = last_at = None
+        complete = True
+        try:
+            while True:
+                query = (
+                    db.select(ActivityLog)
+                    .where(ActivityLog.user_id == user_id, ActivityLog.session_id == session_id,
+                           ActivityLog.level == 'INFO')
+                    .order_by(ActivityLog.timestamp, ActivityLog.id)
+                    .limit(self.batch_size)
+                )
+                if after is not None:
+                    query = query.where(position > after)
+                page = db.session.execute(query).scalars().all()
+                if not page:
+                    break
+                after = (page[-1].timestamp, page[-1].id)
+
+                rows = [row for row in page if is_cycle_message(row.message)]
+                if rows:
+                    for row in rows:
+                        match = CYCLE_NUMBER.search(row.message)
+                        if match:
+                            max_cycle = max(max_cycle, int(match.group(1)))
+                    first_at = first_at or rows[0].timestamp
+                    last_at = rows[-1].timestamp
+                    rolled_up += len(rows)
+                    self._archive(rows, 'rollup')
+                    self._delete([row.id for row in rows])
+                    self._stats['rows_rolled_up'] += len(rows)
+                db.session.commit()
+
+                if len(page) < self.batch_size:
+                    break
+                if self._out_of_time():
+                    complete = False
+                    break
+
+            if rolled_up:
+                summary = (
+                    f"Session summary: {max_cycle} cycles between "
+                    f"{first_at.strftime('%d/%m/%Y %H:%M:%S')} and "
+                    f"{last_at.strftime('%d/%m/%Y %H:%M:%S')} UTC "
+                    f"({rolled_up} per-cycle log rows rolled up)"
+                )
+                db.session.add(ActivityLog(user_id=user_id, session_id=session_id, level='INFO',
+                                           message=summary, timestamp=last_at))
+            if complete:
+                db.session.execute(
+                    db.update(WarSession).where(WarSession.id == session_id).values(logs_rolled_up_at=now)
+                )
+            db.session.commit()
+            if complete:
+                self._stats['sessions_rolled_up'] += 1
+            return complete
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def expire_logs(self, now: datetime) -> bool:
+        """
+        Delete rows older than their level's TTL, oldest first
+
+        Returns:
+            False if the time budget ran out before every expired row was handled
+        """
+        from app import db, ActivityLog
+
+        for level, days in self.ttl_days.items():
+            if not days:
+                continue
+            cutoff = now - timedelta(days=days)
+            while True:
+                if self._out_of_time():
+                    return False
+                rows = db.session.execute(
+                    db.select(ActivityLog)
+                    .where(ActivityLog.level == level, ActivityLog.timestamp < cutoff)
+                    .order_by(ActivityLog.timestamp)
+                    .limit(self.batch_size)
+                ).scalars().all()
+                if not rows:
+                    break
+                try:
+                    self._archive(rows, 'expired')
+                    self._delete([row.id for row in rows])
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                self._stats['rows_expired'][level] = self._stats['rows_expired'].get(level, 0) + len(rows)
+        return True
+
+    def _delete(self, ids: List[int]) -> None:
+        from app import db, ActivityLog
+
+        for start in range(0, len(ids), 500):
+            db.session.execute(
+                db.delete(ActivityLog).where(ActivityLog.id.in_(ids[start:start + 500])),
+                execution_options={'synchronize_session': False}
+            )
+
+    def _archive(self, rows: List, reason: str) -> None:
+        """Append rows to this run's archive file before they are deleted (raises on failure)"""
+        if not self.archive_dir:
+            return
+        if self._archive_path is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            self._archive_path = os.path.join(
+                self.archive_dir, f"activity_logs-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+            )
+        lines = ''.join(
+            json.dumps({
+                'id': row.id,
+                'user_id': row.user_id,
+                'session_id': row.session_id,
+                'level': row.level,
+                'message': row.message,
+                'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+                'reason': reason
+            }) + '\n'
+            for row in rows
+        )
+        with gzip.open(self._archive_path, 'at', encoding='utf-8') as archive:
+            archive.write(lines)
+        self._stats['rows_archived'] += len(rows)
@@ -0,0 +1,220 @@
+"""
+Buffered Log Sink
+Queues log rows in memory and writes them in bulk from a background thread
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedLogSink:
+    """
+    Batching writer for activity log rows
+
+    Rows are queued in memory and handed to `flush_fn` as one list every
+    `batch_size` rows or every `flush_interval_ms`, whichever comes first.
+    Pending rows are flushed on interpreter shutdown. Under backpressure INFO
+    rows are sampled (1 in `sample_rate` kept) once the queue passes the
+    high-water mark and dropped when it is full; ERROR, WARNING and SUCCESS
+    rows are always accepted. When a bulk write fails, those priority rows
+    are put back at the head of the queue and retried on the next flush, up
+    to `max_retries` times and while the queue has room; INFO rows of the
+    failed batch are dropped.
+    """
+
+    PRIORITY_LEVELS = ('ERROR', 'WARNING', 'SUCCESS')
+
+    def __init__(self, flush_fn: Callable[[List[Dict]], int], batch_size: int = 50,
+                 flush_interval_ms: int = 500, max_queue: int = 5000, sample_rate: int = 10,
+                 max_retries: int = 3, name: str = 'log-sink'):
+        """
+        Initialize sink
+
+        Args:
+            flush_fn: Callable writing a list of rows (one bulk insert)
+            batch_size: Flush as soon as this many rows are queued (<= 1 writes synchronously)
+            flush_interval_ms: Maximum time a row waits in the queue
+            max_queue: Queue capacity before low-priority rows are dropped
+            sample_rate: Keep 1 in N INFO rows above the high-water mark
+            max_retries: Times a priority row is requeued after failed writes
+            name: Name of the background thread
+        """
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self.high_water = int(max_queue * 0.8)
+        self.sample_rate = max(1, sample_rate)
+        self.max_retries = max_retries
+        self.name = name
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._sample_counter = 0
+        self._attempts: Dict[int, int] = {}  # id(row) -> failed writes, for requeued rows
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'batches': 0,
+            'sampled_out': 0,
+            'dropped': 0,
+            'requeued': 0,
+            'flush_errors': 0
+        }
+
+        atexit.register(self.close)
+
+    def submit(self, row: Dict) -> bool:
+        """
+        Queue a row for writing
+
+        Args:
+            row: Column values for one log row
+
+        Returns:
+            True if the row was queued (or written), False if dropped
+        """
+        if self.batch_size <= 1 or self._closed:
+            self.stats['submitted'] += 1
+            self._write([row], requeue=False)
+            return True
+
+        with self._condition:
+            self.stats['submitted'] += 1
+            if not self._accept(row):
+                return False
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+        self._ensure_thread()
+        return True
+
+    def _accept(self, row: Dict) -> bool:
+        """Apply backpressure policy (called with the condition held)"""
+        if row.get('level') in self.PRIORITY_LEVELS:
+            return True
+
+        depth = len(self._queue)
+        if depth >= self.max_queue:
+            self.stats['dropped'] += 1
+            return False
+        if depth >= self.high_water:
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_rate:
+                self.stats['sampled_out'] += 1
+                return False
+        return True
+
+    def _ensure_thread(self) -> None:
+        """Start the writer thread (again after a fork)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._condition:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Writer loop: wait for a full batch or the flush interval"""
+        while not self._closed:
+            with self._condition:
+                if len(self._queue) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+            errors = self.stats['flush_errors']
+            self.flush()
+            if self.stats['flush_errors'] != errors:
+                time.sleep(self.flush_interval)  # Back off instead of retrying requeued rows at once
+
+    def _drain(self) -> List[Dict]:
+        with self._condition:
+            rows = list(self._queue)
+            self._queue.clear()
+        return rows
+
+    def _write(self, rows: List[Dict], requeue: bool = True, untried: List[Dict] = ()) -> int:
+        try:
+            written = self.flush_fn(rows)
+            self.stats['written'] += written if written is not None else len(rows)
+            self.stats['batches'] += 1
+            if self._attempts:
+                for row in rows:
+                    self._attempts.pop(id(row), None)
+            return len(rows)
+        except Exception as e:
+            self.stats['flush_errors'] += 1
+            kept = self._requeue(rows, untried) if requeue else 0
+            self.stats['dropped'] += len(rows) - kept
+            logger.error(f"{self.name}: failed to write {len(rows)} log rows "
+                         f"({kept} priority rows requeued): {e}")
+            return 0
+
+    def _requeue(self, rows: List[Dict], untried: List[Dict]) -> int:
+        """Put the priority rows of a failed batch, then the rows not tried yet, back at the head of the queue"""
+        retry = []
+        for row in rows:
+            attempts = self._attempts.pop(id(row), 0) + 1
+            if row.get('level') in self.PRIORITY_LEVELS and attempts <= self.max_retries:
+                retry.append((row, attempts))
+        with self._condition:
+            self._queue.extendleft(reversed(untried))
+            retry = retry[:max(0, self.max_queue - len(self._queue))]
+            for row, attempts in reversed(retry):
+                self._attempts[id(row)] = attempts
+                self._queue.appendleft(row)
+        self.stats['requeued'] += len(retry)
+        return len(retry)
+
+    def flush(self) -> int:
+        """
+        Write the rows queued now (requeued rows wait for the next flush)
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            written = 0
+            rows = self._drain()
+            size = max(self.batch_size, 1)
+            for start in range(0, len(rows), size):
+                batch_written = self._write(rows[start:start + size], untried=rows[start + size:])
+                if not batch_written:
+                    break  # The rest was requeued untried
+                written += batch_written
+            return written
+
+    def pending(self) -> int:
+        """Number of rows waiting to be written"""
+        return len(self._queue)
+
+    def close(self) -> None:
+        """Flush remaining rows and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._condition:
+            self._condition.notify_all()
+        # Requeued rows get their remaining attempts now
+        for _ in range(self.max_retries + 1):
+            self.flush()
+            if not self._queue:
+                break
+
+    def get_stats(self) -> Dict:
+        """Get sink counters"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._queue)
+        return stats
@@ -0,0 +1,197 @@
+"""
+Progress Publisher
+Throttled, delta-based WAR progress updates with a compact per-user status snapshot
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from .status_events import get_status_events
+from .status_store import get_status_store
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value: Any) -> Any:
+    """Normalize values so snapshots compare and serialize consistently"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class ProgressPublisher:
+    """
+    Publishes WAR progress for one session
+
+    Every call to `publish` merges the given fields into the session snapshot
+    and computes the delta against what was last emitted. Unchanged fields are
+    never re-sent and calls arriving within `min_interval` are coalesced into
+    the next emission (or `flush`). Each emission writes only the changed
+    fields to the user's status snapshot (src.status_store) and pushes them as a 'progress' event
+    to the user's open status streams. The Celery result backend
+    (`state_fn`) and the database (`db_fn`) are far more expensive, so they
+    are only written when a significant field changes or their own interval
+    has elapsed.
+    """
+
+    # Fields whose change is pushed to every sink immediately
+    SIGNIFICANT_FIELDS = ('status', 'successful_courses', 'remaining_targets', 'session_valid')
+
+    def __init__(self, session_id: int, user_id: int,
+                 state_fn: Optional[Callable[[Dict], None]] = None,
+                 db_fn: Optional[Callable[[Dict], None]] = None,
+                 min_interval: float = 1.0, state_interval: float = 60.0,
+                 db_interval: float = 120.0, emitted: Optional[Dict[str, Any]] = None):
+        """
+        Initialize publisher
+
+        Args:
+            session_id: WAR session ID
+            user_id: User ID
+            state_fn: Called with the full snapshot (e.g. Celery update_state)
+            db_fn: Called with the full snapshot to persist progress
+            min_interval: Minimum seconds between emissions
+            state_interval: Maximum seconds between state_fn calls while progressing
+            db_interval: Maximum seconds between db_fn calls while progressing
+            emitted: Fields already published for this session (e.g. by the
+                previous cycle task); only changes against them are emitted
+        """
+        self.session_id = session_id
+        self.user_id = user_id
+        self.state_fn = state_fn
+        self.db_fn = db_fn
+        self.min_interval = min_interval
+        self.state_interval = state_interval
+        self.db_interval = db_interval
+
+        self._snapshot: Dict[str, Any] = {'user_id': user_id, 'session_id': session_id}
+        self._emitted: Dict[str, Any] = {name: _encode(value) for name, value in (emitted or {}).items()}
+        self._snapshot.update(self._emitted)
+        self._pending: Dict[str, Any] = {}
+        self._last_emit = 0.0
+        self._last_state = 0.0
+        self._last_db = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            'publish_calls': 0,
+            'emissions': 0,
+            'coalesced': 0,
+            'fields_sent': 0,
+            'state_writes': 0,
+            'db_writes': 0
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current full snapshot"""
+        with self._lock:
+            return dict(self._snapshot)
+
+    def publish(self, force: bool = False, **fields) -> bool:
+        """
+        Merge fields into the snapshot and emit the changes if allowed
+
+        Args:
+            force: Emit immediately and write every sink (final status)
+            **fields: Progress fields (cycle, status, successful_courses, ...)
+
+        Returns:
+            True if an emission happened
+        """
+        with self._lock:
+            self.stats['publish_calls'] += 1
+            for name, value in fields.items():
+                value = _encode(value)
+                self._snapshot[name] = value
+                if self._emitted.get(name, object()) != value:
+                    self._pending[name] = value
+                else:
+                    self._pending.pop(name, None)
+
+            if not self._pending and not force:
+                return False
+            now = time.monotonic()
+            if not force and now - self._last_emit < self.min_interval:
+                self.stats['coalesced'] += 1
+                return False
+
+            delta = self._pending
+            self._pending = {}
+            self._emitted.update(delta)
+            self._last_emit = now
+            snapshot = dict(self._snapshot)
+
+        self._emit(delta, snapshot, now, force)
+        return True
+
+    def flush(self) -> bool:
+        """Emit coalesced changes now"""
+        with self._lock:
+            self._last_emit = 0.0
+        return self.publish()
+
+    def close(self, **fields) -> None:
+        """
+        Record final fields in the snapshot only
+
+        The caller writes the final result backend state and database row
+        itself, so no other sink is touched.
+
+        Args:
+            **fields: Final progress fields
+        """
+        with self._lock:
+            delta = dict(self._pending)
+            self._pending = {}
+            for name, value in fields.items():
+                value = _encode(value)
+                self._snapshot[name] = value
+                if self._emitted.get(name, object()) != value:
+                    delta[name] = value
+            self._emitted.update(delta)
+        if delta:
+            self._write_snapshot(delta)
+            self._publish_event(delta)
+
+    def _emit(self, delta: Dict, snapshot: Dict, now: float, force: bool) -> None:
+        self.stats['emissions'] += 1
+        self.stats['fields_sent'] += len(delta)
+        significant = force or any(name in delta for name in self.SIGNIFICANT_FIELDS)
+
+        if delta:
+            self._write_snapshot(delta)
+            self._publish_event(delta)
+
+        if self.state_fn and (significant or now - self._last_state >= self.state_interval):
+            try:
+                self.state_fn(snapshot)
+                self._last_state = now
+                self.stats['state_writes'] += 1
+            except Exception as e:
+                logger.warning(f"Progress state update failed: {e}")
+
+        if self.db_fn and (significant or now - self._last_db >= self.db_interval):
+            try:
+                self.db_fn(snapshot)
+                self._last_db = now
+                self.stats['db_writes'] += 1
+            except Exception as e:
+                logger.warning(f"Progress database update failed: {e}")
+
+    def _write_snapshot(self, delta: Dict) -> None:
+        """Merge changed fields into the user's shared status snapshot"""
+        get_status_store().update(self.user_id, self.session_id, **delta)
+
+    def _publish_event(self, delta: Dict) -> None:
+        """Push changed fields to the user's status streams"""
+        get_status_events().publish(self.user_id, 'progress', {'session_id': self.session_id, **delta})
+
+    def get_stats(self) -> Dict:
+        """Get publisher counters"""
+        return dict(self.stats)
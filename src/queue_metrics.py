@@ -0,0 +1,404 @@
+"""
+Queue Metrics
+Start delay, cycle lag and worker utilization for Celery autoscaling
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'warkrs:queue:'
+MAX_SAMPLES = 500
+SESSION_LAG_TTL = 6 * 3600
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def _summarize(values: List[float]) -> Dict:
+    return {
+        'samples': len(values),
+        'p50_ms': round(_percentile(values, 50), 1),
+        'p95_ms': round(_percentile(values, 95), 1),
+        'max_ms': round(max(values), 1) if values else 0.0
+    }
+
+
+class QueueMetrics:
+    """
+    Worker-side timing and utilization metrics shared across processes
+
+    Samples are recorded by Celery signal handlers (tasks.queue_monitor) and by
+    the long-running WAR loop:
+
+    - start delay: how long a task sat in the queue after it was due
+      (enqueue time, or its ETA for countdown tasks) before a worker ran it
+    - cycle lag: how late each WAR cycle started compared with its schedule
+    - utilization: tasks running now versus the concurrency of live workers
+
+    Recent samples are kept in capped Redis lists (one LPUSH per sample) with an
+    in-process fallback, and summarized over a sliding `window` on read.
+    """
+
+    def __init__(self, window: float = 900.0, worker_ttl: float = 600.0,
+                 max_task_age: float = 7200.0):
+        """
+        Initialize metrics
+
+        Args:
+            window: Seconds of samples included in summaries
+            worker_ttl: Seconds after its last registration (startup, task event or
+                heartbeat) a worker counts as gone
+            max_task_age: Running-task entries older than this are treated as lost
+        """
+        self.window = window
+        self.worker_ttl = worker_ttl
+        self.max_task_age = max_task_age
+
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._session_lag: Dict[int, Dict[str, float]] = {}
+        self._workers: Dict[str, Dict] = {}
+        self._running: Dict[str, Dict] = {}
+
+    def _add_sample(self, name: str, value_ms: float) -> None:
+        now = time.time()
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.lpush(f"{KEY_PREFIX}samples:{name}", f"{now:.3f}:{value_ms:.1f}")
+                pipe.ltrim(f"{KEY_PREFIX}samples:{name}", 0, MAX_SAMPLES - 1)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.debug(f"Queue metrics sample write failed: {e}")
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=MAX_SAMPLES)).appendleft((now, value_ms))
+
+    def _read_samples(self, name: str) -> List[float]:
+        cutoff = time.time() - self.window
+        client = get_redis_client()
+        if client is not None:
+            try:
+                raw = client.lrange(f"{KEY_PREFIX}samples:{name}", 0, MAX_SAMPLES - 1)
+                pairs = [tuple(map(float, item.split(':', 1))) for item in raw]
+                return [value for ts, value in pairs if ts >= cutoff]
+            except Exception as e:
+                logger.debug(f"Queue metrics sample read failed: {e}")
+        with self._lock:
+            return [value for ts, value in self._samples.get(name, ()) if ts >= cutoff]
+
+    def record_start_delay(self, queue: str, delay_ms: float) -> None:
+        """
+        Record the time a task waited in a queue after it was due
+
+        Args:
+            queue: Queue name
+            delay_ms: Milliseconds from due time to start
+        """
+        self._add_sample(f"start:{queue}", max(0.0, delay_ms))
+
+    def record_cycle_lag(self, session_id: int, lag_ms: float) -> None:
+        """
+        Record how late a WAR cycle started compared with its schedule
+
+        Args:
+            session_id: WAR session ID
+            lag_ms: Milliseconds between scheduled and actual cycle start
+        """
+        lag_ms = max(0.0, lag_ms)
+        self._add_sample('cycle_lag', lag_ms)
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                key = f"{KEY_PREFIX}lag:{session_id}"
+                previous_max = float(client.hget(key, 'max_ms') or 0)
+                pipe = client.pipeline(transaction=False)
+                pipe.hincrby(key, 'cycles', 1)
+                pipe.hincrbyfloat(key, 'total_ms', lag_ms)
+                pipe.hset(key, mapping={'last_ms': lag_ms, 'max_ms': max(previous_max, lag_ms)})
+                pipe.expire(key, SESSION_LAG_TTL)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.debug(f"Session lag write failed: {e}")
+        with self._lock:
+            stats = self._session_lag.setdefault(
+                session_id, {'cycles': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+            )
+            stats['cycles'] += 1
+            stats['total_ms'] += lag_ms
+            stats['last_ms'] = lag_ms
+            stats['max_ms'] = max(stats['max_ms'], lag_ms)
+
+    def get_session_lag(self, session_id: int) -> Dict:
+        """
+        Get cycle lag statistics for one WAR session
+
+        Args:
+            session_id: WAR session ID
+
+        Returns:
+            Dict with cycles, avg_ms, max_ms and last_ms
+        """
+        stats = None
+        client = get_redis_client()
+        if client is not None:
+            try:
+                stats = client.hgetall(f"{KEY_PREFIX}lag:{session_id}") or None
+            except Exception as e:
+                logger.debug(f"Session lag read failed: {e}")
+        if stats is None:
+            with self._lock:
+                stats = dict(self._session_lag.get(session_id, {}))
+
+        cycles = int(stats.get('cycles', 0))
+        total = float(stats.get('total_ms', 0.0))
+        return {
+            'cycles': cycles,
+            'avg_ms': round(total / cycles, 1) if cycles else 0.0,
+            'max_ms': round(float(stats.get('max_ms', 0.0)), 1),
+            'last_ms': round(float(stats.get('last_ms', 0.0)), 1)
+        }
+
+    def worker_seen(self, hostname: str, concurrency: Optional[int] = None) -> None:
+        """
+        Register a worker as alive (called on startup and on every task event)
+
+        Args:
+            hostname: Celery worker hostname
+            concurrency: Pool size, when known (kept from the last registration otherwise)
+        """
+        now = time.time()
+        client = get_redis_client()
+        if client is not None:
+            try:
+                key = f"{KEY_PREFIX}workers"
+                if concurrency is None:
+                    previous = client.hget(key, hostname)
+                    concurrency = json.loads(previous)['concurrency'] if previous else 1
+                client.hset(key, hostname, json.dumps({'concurrency': concurrency, 'seen_at': now}))
+                return
+            except Exception as e:
+                logger.debug(f"Worker registration failed: {e}")
+        with self._lock:
+            if concurrency is None:
+                concurrency = self._workers.get(hostname, {}).get('concurrency', 1)
+            self._workers[hostname] = {'concurrency': concurrency, 'seen_at': now}
+
+    def start_heartbeat(self, hostname: str, concurrency: int,
+                        interval: Optional[float] = None) -> threading.Event:
+        """
+        Keep a worker registered while its tasks run
+
+        A worker busy with long-running WAR tasks emits no task events for
+        hours, so liveness is refreshed from a daemon thread (a greenlet under
+        gevent/eventlet) every `interval` seconds (default worker_ttl / 3).
+
+        Args:
+            hostname: Celery worker hostname
+            concurrency: Pool size
+            interval: Seconds between registrations
+
+        Returns:
+            Event that stops the heartbeat when set
+        """
+        stopped = threading.Event()
+        interval = interval or self.worker_ttl / 3
+
+        def beat():
+            while not stopped.wait(interval):
+                try:
+                    self.worker_seen(hostname, concurrency)
+                except Exception as e:
+                    logger.debug(f"Worker heartbeat failed: {e}")
+
+        self.worker_seen(hostname, concurrency)
+        threading.Thread(target=beat, name=f"queue-metrics-heartbeat-{hostname}", daemon=True).start()
+        return stopped
+
+    def task_started(self, task_id: str, hostname: str, queue: str) -> None:
+        """Mark a task as running on a worker"""
+        entry = {'worker': hostname, 'queue': queue, 'started_at': time.time()}
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.hset(f"{KEY_PREFIX}running", task_id, json.dumps(entry))
+                return
+            except Exception as e:
+                logger.debug(f"Running task write failed: {e}")
+        with self._lock:
+            self._running[task_id] = entry
+
+    def task_finished(self, task_id: str) -> None:
+        """Mark a task as no longer running"""
+        with self._lock:
+            self._running.pop(task_id, None)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.hdel(f"{KEY_PREFIX}running", task_id)
+            except Exception as e:
+                logger.debug(f"Running task delete failed: {e}")
+
+    def get_utilization(self) -> Dict:
+        """
+        Get running tasks versus live worker capacity
+
+        Returns:
+            Dict with workers, capacity, running, running_by_queue and utilization
+        """
+        now = time.time()
+        workers, running = None, None
+        client = get_redis_client()
+        if client is not None:
+            try:
+                workers = {name: json.loads(value)
+                           for name, value in client.hgetall(f"{KEY_PREFIX}workers").items()}
+                running = {task_id: json.loads(value)
+                           for task_id, value in client.hgetall(f"{KEY_PREFIX}running").items()}
+                lost = [task_id for task_id, entry in running.items()
+                        if entry['started_at'] < now - self.max_task_age]
+                if lost:
+                    client.hdel(f"{KEY_PREFIX}running", *lost)
+            except Exception as e:
+                logger.debug(f"Utilization read failed: {e}")
+                workers, running = None, None
+        if workers is None:
+            with self._lock:
+                workers = dict(self._workers)
+                running = dict(self._running)
+
+        live = {name: info for name, info in workers.items() if info['seen_at'] >= now - self.worker_ttl}
+        # Running tasks count on their own: a worker busy for hours may have missed
+        # heartbeats, and entries of crashed workers age out after max_task_age
+        active = [entry for entry in running.values() if entry['started_at'] >= now - self.max_task_age]
+        capacity = sum(int(info['concurrency']) for info in live.values())
+
+        by_queue: Dict[str, int] = {}
+        for entry in active:
+            by_queue[entry['queue']] = by_queue.get(entry['queue'], 0) + 1
+
+        return {
+            'workers': len(live),
+            'capacity': capacity,
+            'running': len(active),
+            'running_by_queue': by_queue,
+            'utilization': round(len(active) / capacity, 3) if capacity else 0.0
+        }
+
+    def get_report(self, depths: Dict[str, Optional[int]]) -> Dict:
+        """
+        Build the full metrics report with a scaling recommendation
+
+        Args:
+            depths: Messages waiting per queue (None when the broker was unreachable)
+
+        Returns:
+            Dict with queues, cycle_lag, utilization and recommendation
+        """
+        queues = {}
+        for queue, depth in depths.items():
+            queues[queue] = {'depth': depth, 'start_delay': _summarize(self._read_samples(f"start:{queue}"))}
+        cycle_lag = _summarize(self._read_samples('cycle_lag'))
+        utilization = self.get_utilization()
+        return {
+            'generated_at': time.time(),
+            'window_seconds': self.window,
+            'queues': queues,
+            'cycle_lag': cycle_lag,
+            'utilization': utilization,
+            'recommendation': recommend_scaling(
+                sum(depth or 0 for depth in depths.values()),
+                max([q['start_delay']['p95_ms'] for q in queues.values()] or [0.0]),
+                cycle_lag['p95_ms'],
+                utilization
+            )
+        }
+
+
+def recommend_scaling(depth: int, start_delay_p95_ms: float, cycle_lag_p95_ms: float,
+                      utilization: Dict) -> Dict:
+    """
+    Turn queue metrics into a scaling signal
+
+    Thresholds come from QUEUE_TARGET_UTILIZATION (default 0.7),
+    QUEUE_MAX_START_DELAY_MS (default 5000) and QUEUE_MAX_CYCLE_LAG_MS
+    (default 10000).
+
+    Args:
+        depth: Messages waiting across the monitored queues
+        start_delay_p95_ms: Worst queue's p95 start delay
+        cycle_lag_p95_ms: p95 WAR cycle lag
+        utilization: Result of QueueMetrics.get_utilization()
+
+    Returns:
+        Dict with action ('scale_up', 'scale_down' or 'hold'), current_slots,
+        desired_slots and reasons
+    """
+    target = float(os.getenv('QUEUE_TARGET_UTILIZATION', 0.7))
+    max_start_delay = float(os.getenv('QUEUE_MAX_START_DELAY_MS', 5000))
+    max_cycle_lag = float(os.getenv('QUEUE_MAX_CYCLE_LAG_MS', 10000))
+
+    capacity = utilization['capacity']
+    load = utilization['utilization']
+    demand = utilization['running'] + depth
+    desired = max(1, math.ceil(demand / target)) if demand else 1
+    reasons = []
+
+    if depth and not capacity:
+        reasons.append(f"{depth} queued tasks and no live workers")
+    if load >= min(0.95, target + 0.15):
+        reasons.append(f"utilization {load:.0%} above target {target:.0%}")
+    if start_delay_p95_ms > max_start_delay:
+        reasons.append(f"p95 start delay {start_delay_p95_ms:.0f}ms over {max_start_delay:.0f}ms")
+    if cycle_lag_p95_ms > max_cycle_lag:
+        if load < target and not depth:
+            # Workers are idle, so the lag comes from the fair scheduler, not capacity
+            reasons.append(f"p95 cycle lag {cycle_lag_p95_ms:.0f}ms with idle workers: "
+                           f"raise FAIR_MAX_RUNNING instead of adding workers")
+        else:
+            reasons.append(f"p95 cycle lag {cycle_lag_p95_ms:.0f}ms over {max_cycle_lag:.0f}ms")
+
+    capacity_bound = [reason for reason in reasons if 'FAIR_MAX_RUNNING' not in reason]
+    if capacity_bound:
+        action = 'scale_up'
+        desired = max(desired, capacity + 1)
+    elif not reasons and not depth and capacity and load < target / 2 and desired < capacity:
+        action = 'scale_down'
+        reasons.append(f"utilization {load:.0%} below {target / 2:.0%} with empty queues")
+    else:
+        action = 'hold'
+        desired = capacity or desired
+
+    return {
+        'action': action,
+        'current_slots': capacity,
+        'desired_slots': desired,
+        'reasons': reasons
+    }
+
+
+_default_metrics = QueueMetrics(window=float(os.getenv('QUEUE_METRICS_WINDOW', 900)))
+
+
+def get_queue_metrics() -> QueueMetrics:
+    """Get the process-wide queue metrics recorder"""
+    return _default_metrics
@@ -0,0 +1,85 @@
+"""
+Redis Client Helper
+Shared, optional Redis connection for cross-process coordination
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+import logging
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before retrying after Redis was found unreachable
+RETRY_AFTER_SECONDS = 30
+
+_client = None
+_client_pid = None
+_last_failure = 0.0
+_lock = threading.Lock()
+
+
+def get_redis_url() -> str:
+    """Get Redis URL (REDIS_URL, falling back to the Celery broker URL)"""
+    return os.getenv('REDIS_URL') or os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+
+
+def get_redis_client() -> Optional['redis.Redis']:
+    """
+    Get the process-wide Redis client
+
+    Returns:
+        Connected Redis client, or None when Redis is not installed or unreachable
+        (callers fall back to in-process or database implementations)
+    """
+    global _client, _client_pid, _last_failure
+
+    if not REDIS_AVAILABLE:
+        return None
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    if time.monotonic() - _last_failure < RETRY_AFTER_SECONDS and _last_failure:
+        return None
+
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            return _client
+        try:
+            client = redis.Redis.from_url(
+                get_redis_url(),
+                socket_connect_timeout=0.5,
+                socket_timeout=2,
+                health_check_interval=30,
+                decode_responses=True
+            )
+            client.ping()
+            _client, _client_pid = client, os.getpid()
+            return _client
+        except Exception as e:
+            _last_failure = time.monotonic()
+            logger.info(f"Redis not reachable ({e}); using fallback implementations")
+            return None
+
+
+def create_pubsub_client() -> Optional['redis.Redis']:
+    """
+    Create a dedicated client for blocking pub/sub listeners
+
+    Returns:
+        Redis client without a socket read timeout, or None when Redis is unavailable
+    """
+    if get_redis_client() is None:
+        return None
+    return redis.Redis.from_url(
+        get_redis_url(),
+        socket_connect_timeout=0.5,
+        health_check_interval=30,
+        decode_responses=True
+    )
@@ -0,0 +1,260 @@
+"""
+Run Lock
+Distributed single-run lease per user for WAR processes
+"""
+
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'warkrs:runlock:'
+
+# Extend the lease if we own it, claim it if it expired, fail if someone else holds it
+RENEW_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RunLock:
+    """
+    Per-user run lease shared by all web and worker processes
+
+    A WAR process may only run while it holds its user's lease. The lease is
+    acquired atomically when a run starts, renewed by the running task from a
+    background heartbeat (see heartbeat()) and released when the run ends. If
+    the holder dies the lease expires after `ttl` seconds. Backed by Redis when reachable,
+    otherwise by the run_leases table (conditional UPDATE/INSERT, so the
+    primary key does the locking).
+    """
+
+    def __init__(self, ttl: int = 180):
+        """
+        Initialize run lock
+
+        Args:
+            ttl: Lease lifetime in seconds without a heartbeat
+        """
+        self.ttl = ttl
+        self._renew_script = None
+        self._release_script = None
+
+    def acquire(self, user_id: int) -> Optional[str]:
+        """
+        Try to start a run for a user
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Lease token to pass to the run, or None if a run is already active
+        """
+        token = uuid.uuid4().hex
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if client.set(f"{KEY_PREFIX}{user_id}", token, nx=True, px=self.ttl * 1000):
+                    return token
+                return None
+            except Exception as e:
+                logger.warning(f"Run lock Redis acquire failed, using database: {e}")
+        return token if self._claim_db(user_id, token) else None
+
+    def renew(self, user_id: int, token: Optional[str], ttl: Optional[float] = None) -> bool:
+        """
+        Heartbeat: extend the lease (or re-claim it after an expiry)
+
+        Args:
+            user_id: User ID
+            token: Lease token from acquire()
+            ttl: Lease lifetime from now in seconds (defaults to self.ttl); pass
+                a longer one to cover a known gap without heartbeats
+
+        Returns:
+            False if another run now holds the lease (this run must stop)
+        """
+        if not token:
+            return True
+        ttl = max(ttl or 0, self.ttl)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._renew_script is None:
+                    self._renew_script = client.register_script(RENEW_SCRIPT)
+                return bool(self._renew_script(keys=[f"{KEY_PREFIX}{user_id}"], args=[token, int(ttl * 1000)]))
+            except Exception as e:
+                logger.warning(f"Run lock Redis renew failed, using database: {e}")
+        return self._claim_db(user_id, token, ttl)
+
+    def heartbeat(self, user_id: int, token: Optional[str]) -> 'LeaseHeartbeat':
+        """
+        Start renewing a lease in the background every ttl/3 seconds
+
+        Args:
+            user_id: User ID
+            token: Lease token from acquire()
+
+        Returns:
+            Running LeaseHeartbeat; call stop() when the run ends or hands off
+        """
+        return LeaseHeartbeat(self, user_id, token, self.ttl / 3)
+
+    def release(self, user_id: int, token: Optional[str]) -> None:
+        """
+        End the run and free the lease (only if still owned by this token)
+
+        Args:
+            user_id: User ID
+            token: Lease token from acquire()
+        """
+        if not token:
+            return
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._release_script is None:
+                    self._release_script = client.register_script(RELEASE_SCRIPT)
+                self._release_script(keys=[f"{KEY_PREFIX}{user_id}"], args=[token])
+                return
+            except Exception as e:
+                logger.warning(f"Run lock Redis release failed, using database: {e}")
+        try:
+            from app import app as flask_app, db, RunLease
+            with flask_app.app_context(), db.engine.begin() as conn:
+                conn.execute(
+                    db.delete(RunLease).where(RunLease.user_id == user_id, RunLease.owner == token)
+                )
+        except Exception as e:
+            logger.error(f"Run lock release failed for user {user_id}: {e}")
+
+    def is_held(self, user_id: int) -> bool:
+        """
+        Check whether a run is active for a user (not atomic; use acquire to start)
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            True if an unexpired lease exists
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return bool(client.exists(f"{KEY_PREFIX}{user_id}"))
+            except Exception as e:
+                logger.warning(f"Run lock Redis check failed, using database: {e}")
+        try:
+            from app import app as flask_app, db, RunLease
+            with flask_app.app_context(), db.engine.connect() as conn:
+                owner = conn.execute(
+                    db.select(RunLease.owner)
+                    .where(RunLease.user_id == user_id, RunLease.expires_at > datetime.utcnow())
+                ).scalar()
+            return owner is not None
+        except Exception as e:
+            logger.error(f"Run lock check failed for user {user_id}: {e}")
+            return False
+
+    def _claim_db(self, user_id: int, token: str, ttl: Optional[float] = None) -> bool:
+        """Take over an expired/own lease row, or insert a new one"""
+        from sqlalchemy.exc import IntegrityError
+        from app import app as flask_app, db, RunLease
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl or self.ttl)
+        with flask_app.app_context():
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    db.update(RunLease)
+                    .where(RunLease.user_id == user_id,
+                           db.or_(RunLease.owner == token, RunLease.expires_at <= now))
+                    .values(owner=token, expires_at=expires_at)
+                )
+                if result.rowcount == 1:
+                    return True
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(db.insert(RunLease).values(
+                        user_id=user_id, owner=token, expires_at=expires_at
+                    ))
+                return True
+            except IntegrityError:
+                return False
+
+
+
+class LeaseHeartbeat:
+    """
+    Background renewal of a run lease
+
+    A loop iteration can block far longer than one renewal interval (fair
+    scheduler wait, request timeouts of every target course, the delay
+    between cycles), so renewing once per iteration lets the lease expire in
+    the middle of a cycle. The heartbeat renews from a daemon thread (a
+    greenlet under gevent/eventlet pools) and sets `lost` as soon as another
+    run owns the lease; the run checks it before each blocking step.
+    """
+
+    def __init__(self, lock: RunLock, user_id: int, token: Optional[str], interval: float):
+        """
+        Initialize and start the heartbeat
+
+        Args:
+            lock: Run lock the lease belongs to
+            user_id: User ID
+            token: Lease token (None: nothing to renew, never lost)
+            interval: Seconds between renewals
+        """
+        self.lock = lock
+        self.user_id = user_id
+        self.token = token
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+        if token:
+            threading.Thread(target=self._run, name=f"lease-heartbeat-{user_id}", daemon=True).start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.lock.renew(self.user_id, self.token):
+                    logger.warning(f"User {self.user_id}: Run lease lost to another WAR process")
+                    self.lost.set()
+                    return
+            except Exception as e:
+                # Keep beating: the lease survives ttl, i.e. two more attempts
+                logger.warning(f"Run lease heartbeat failed for user {self.user_id}: {e}")
+
+    def stop(self) -> None:
+        """Stop renewing (the lease itself is released or handed off by the caller)"""
+        self._stopped.set()
+
+
+_default_lock = RunLock(ttl=int(os.getenv('WAR_LEASE_TTL', 180)))
+
+
+def get_run_lock() -> RunLock:
+    """Get the process-wide run lock"""
+    return _default_lock
@@ -0,0 +1,167 @@
+"""
+Cloudscraper Factory
+Builds a few cloudscraper templates once per process and hands out cheap clones
+"""
+
+import copy
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import logging
+
+import cloudscraper
+from cloudscraper import CipherSuiteAdapter
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from requests.cookies import cookiejar_from_dict
+
+logger = logging.getLogger(__name__)
+
+
+def mount_adapters(scraper: cloudscraper.CloudScraper, tls_adapter: CipherSuiteAdapter,
+                   pool_maxsize: int = DEFAULT_POOLSIZE) -> None:
+    """
+    Mount new adapters (empty connection pools) on a scraper
+
+    The HTTPS adapter reuses the cipher suite and built SSL context of
+    `tls_adapter`, so the TLS fingerprint is unchanged.
+
+    Args:
+        scraper: Scraper to mount the adapters on
+        tls_adapter: Adapter whose TLS settings are copied
+        pool_maxsize: Connections kept per host
+    """
+    scraper.mount('https://', CipherSuiteAdapter(
+        cipherSuite=tls_adapter.cipherSuite,
+        ecdhCurve=tls_adapter.ecdhCurve,
+        server_hostname=tls_adapter.server_hostname,
+        source_address=tls_adapter.source_address,
+        ssl_context=tls_adapter.ssl_context,
+        pool_maxsize=pool_maxsize
+    ))
+    scraper.mount('http://', HTTPAdapter(pool_maxsize=pool_maxsize))
+
+
+# Browser profiles of the templates (cloudscraper still picks a random user agent within each)
+DEFAULT_PROFILES = (
+    {'browser': 'chrome', 'platform': 'windows', 'mobile': False},
+    {'browser': 'chrome', 'platform': 'darwin', 'mobile': False},
+    {'browser': 'chrome', 'platform': 'linux', 'mobile': False},
+    {'browser': 'firefox', 'platform': 'windows', 'mobile': False},
+    {'browser': 'firefox', 'platform': 'darwin', 'mobile': False},
+    {'browser': 'firefox', 'platform': 'linux', 'mobile': False},
+)
+
+
+class ScraperFactory:
+    """
+    Process-wide cloudscraper factory
+
+    `cloudscraper.create_scraper()` loads the browser fingerprint database and
+    builds a TLS context every time it is called. The factory pays that cost
+    once per browser profile and clones a randomly chosen template per user:
+    each clone shares its template's fingerprint headers, cipher suite and SSL
+    context, but gets its own cookie jar and connection pools. Users are
+    spread over len(profiles) fingerprints instead of each getting a fully
+    random one, which is the trade-off for not building a scraper per session.
+    """
+
+    def __init__(self, profiles=DEFAULT_PROFILES, **scraper_kwargs):
+        """
+        Initialize factory
+
+        Args:
+            profiles: cloudscraper `browser` settings, one template each
+                (ignored when scraper_kwargs sets `browser`)
+            **scraper_kwargs: Arguments forwarded to cloudscraper.create_scraper
+        """
+        self.scraper_kwargs = scraper_kwargs
+        self.profiles = [None] if 'browser' in scraper_kwargs else list(profiles)
+        self._templates: List[Optional[cloudscraper.CloudScraper]] = [None] * len(self.profiles)
+        self._lock = threading.Lock()
+        self._random = random.SystemRandom()
+        self.template_build_ms = 0.0
+        self.clones_created = 0
+        self.clone_ms_total = 0.0
+
+    def _get_template(self, index: int) -> cloudscraper.CloudScraper:
+        """Build the template of a profile on first use"""
+        if self._templates[index] is None:
+            with self._lock:
+                if self._templates[index] is None:
+                    profile = self.profiles[index]
+                    kwargs = dict(self.scraper_kwargs, browser=profile) if profile else self.scraper_kwargs
+                    started = time.perf_counter()
+                    self._templates[index] = cloudscraper.create_scraper(**kwargs)
+                    build_ms = (time.perf_counter() - started) * 1000
+                    self.template_build_ms = round(self.template_build_ms + build_ms, 1)
+                    logger.info(f"Cloudscraper template {profile or 'default'} built in {build_ms:.1f}ms")
+        return self._templates[index]
+
+    def prepare(self) -> float:
+        """
+        Build every template eagerly (e.g. at worker start-up)
+
+        Returns:
+            Total template construction time in milliseconds
+        """
+        for index in range(len(self.profiles)):
+            self._get_template(index)
+        return self.template_build_ms
+
+    def create(self, cookies: Optional[Dict[str, str]] = None) -> cloudscraper.CloudScraper:
+        """
+        Create a per-user scraper cloned from the template
+
+        Args:
+            cookies: Cookies to load into the clone's own cookie jar
+
+        Returns:
+            Independent CloudScraper instance
+        """
+        template = self._get_template(self._random.randrange(len(self.profiles)))
+        started = time.perf_counter()
+
+        scraper = copy.copy(template)
+        scraper.headers = template.headers.copy()
+        scraper.cookies = cookiejar_from_dict(dict(cookies or {}))
+        scraper.hooks = {event: list(hooks) for event, hooks in template.hooks.items()}
+        scraper.proxies = dict(template.proxies)
+        scraper.params = dict(template.params)
+        scraper._solveDepthCnt = 0
+
+        # Fresh connection pools, sharing the template's (already built) SSL context
+        scraper.adapters = OrderedDict()
+        mount_adapters(scraper, template.get_adapter('https://'))
+
+        with self._lock:
+            self.clones_created += 1
+            self.clone_ms_total += (time.perf_counter() - started) * 1000
+        return scraper
+
+    def get_stats(self) -> Dict:
+        """
+        Get factory construction statistics
+
+        Returns:
+            Dictionary with template build time and clone counts/timings
+        """
+        with self._lock:
+            clones = self.clones_created
+            clone_ms_total = self.clone_ms_total
+        return {
+            'templates_built': sum(template is not None for template in self._templates),
+            'template_profiles': len(self.profiles),
+            'template_build_ms': self.template_build_ms,
+            'clones_created': clones,
+            'clone_avg_ms': round(clone_ms_total / clones, 3) if clones else 0.0
+        }
+
+
+_default_factory = ScraperFactory()
+
+
+def get_scraper_factory() -> ScraperFactory:
+    """Get the process-wide scraper factory"""
+    return _default_factory
@@ -4,32 +4,71 @@ Handles authentication and session management
 """
 
 import cloudscraper
-from typing import Dict, Optional
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
 import logging
 
+from requests.exceptions import ContentDecodingError
+
+from requests.adapters import DEFAULT_POOLSIZE
+
+from .scraper_factory import get_scraper_factory, mount_adapters
+from .http2_transport import HTTP2Response, HTTP2Transport, HTTP2_AVAILABLE
+from .transfer_stats import ACCEPT_ENCODING, TransferStats, decode_body
+
 logger = logging.getLogger(__name__)
 
+def resolve_host(host: str, port: int = 443) -> List[str]:
+    """
+    Resolve a host through the system resolver
+    
+    Only used to measure DNS time during warm-up: urllib3 resolves the host
+    again for every new connection, so the addresses are reported, not reused.
+    
+    Args:
+        host: Hostname to resolve
+        port: Port used for the lookup
+        
+    Returns:
+        Sorted list of addresses
+    """
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return sorted({info[4][0] for info in infos})
+
 
 class SiakadSession:
     """Manages SIAKAD ITERA session with proper authentication"""
     
-    def __init__(self, cookies: Dict[str, str], timeout: int = 20):
+    def __init__(self, cookies: Dict[str, str], timeout: int = 20, http2: bool = False):
         """
         Initialize SIAKAD session
         
         Args:
             cookies: Dictionary containing authentication cookies
             timeout: Request timeout in seconds
+            http2: Use the multiplexed HTTP/2 transport when available
         """
         self.cookies = cookies
         self.timeout = timeout
+        self.transfer_stats = TransferStats()
         self.session = self._create_session()
+        self.pool_size = DEFAULT_POOLSIZE
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.session.hooks['response'].append(self._account_response)
+        self.http2 = None
+        
+        if http2:
+            if HTTP2_AVAILABLE:
+                self.http2 = HTTP2Transport(self.session, timeout)
+            else:
+                logger.warning("HTTP/2 requested but httpx/h2 not installed. Using HTTP/1.1.")
     
     def _create_session(self) -> cloudscraper.CloudScraper:
-        """Create and configure cloudscraper session"""
-        scraper = cloudscraper.create_scraper()
-        scraper.cookies.update(self.cookies)
-        return scraper
+        """Create and configure cloudscraper session (cloned from the process-wide template)"""
+        return get_scraper_factory().create(self.cookies)
     
     def get(self, url: str, **kwargs) -> cloudscraper.requests.Response:
         """
@@ -43,7 +82,10 @@ class SiakadSession:
             Response object
         """
         kwargs.setdefault('timeout', self.timeout)
-        response = self.session.get(url, **kwargs)
+        if self.http2:
+            response = self._account_http2(self.http2.request('GET', url, **kwargs))
+        else:
+            response = self.session.get(url, **kwargs)
         response.raise_for_status()
         return response
     
@@ -61,8 +103,52 @@ class SiakadSession:
         """
         kwargs.setdefault('timeout', self.timeout)
         kwargs.setdefault('allow_redirects', True)
+        if self.http2:
+            return self._account_http2(self.http2.request('POST', url, data=data, **kwargs))
         return self.session.post(url, data=data, **kwargs)
     
+    def _account_response(self, response, *args, **kwargs):
+        """
+        Response hook: read the body undecoded, decode it ourselves and record sizes
+        
+        Runs before requests consumes the body, so the compressed size is the
+        exact number of body bytes received and the decode time is isolated.
+        """
+        if kwargs.get('stream') or response._content_consumed:
+            return response
+        
+        raw = response.raw.read(decode_content=False) or b''
+        started = time.perf_counter()
+        try:
+            body = decode_body(raw, response.headers.get('Content-Encoding', ''))
+        except Exception as e:
+            raise ContentDecodingError(f"Failed to decode response content: {e}", response=response)
+        decompress_ms = (time.perf_counter() - started) * 1000
+        
+        response._content = body
+        response._content_consumed = True
+        self.transfer_stats.record(urlparse(response.url).path or '/', len(raw), len(body), decompress_ms)
+        return response
+    
+    def _account_http2(self, response):
+        """Record sizes for responses served by the HTTP/2 transport"""
+        if isinstance(response, HTTP2Response):
+            self.transfer_stats.record(
+                urlparse(response.url).path or '/',
+                response.wire_bytes,
+                len(response.content)
+            )
+        return response
+    
+    def get_transfer_stats(self) -> Dict:
+        """
+        Get byte accounting for this session
+        
+        Returns:
+            Dictionary with session totals and per-endpoint breakdown
+        """
+        return self.transfer_stats.snapshot()
+    
     def is_authenticated(self, test_url: str) -> bool:
         """
         Test if session is properly authenticated
@@ -80,3 +166,88 @@ class SiakadSession:
         except Exception as e:
             logger.error(f"Authentication test failed: {e}")
             return False
+    
+    def warm_up(self, test_url: str, connections: int = 2) -> Dict:
+        """
+        Prepare the session before the first WAR cycle
+        
+        Times the DNS lookup of the SIAKAD host, fills the connection pool with N open
+        TLS connections and runs one authenticated probe, so the first
+        real attempt does not pay the cold-connection cost.
+        
+        Args:
+            test_url: Authenticated URL used for the probe (pilihmk page)
+            connections: Number of pooled connections to open
+            
+        Returns:
+            Dictionary with warm-up results and timings in milliseconds
+        """
+        started = time.perf_counter()
+        parsed = urlparse(test_url)
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        connections = max(1, int(connections))
+        
+        report = {
+            'host': parsed.hostname,
+            'addresses': [],
+            'dns_ms': 0.0,
+            'connections_requested': connections,
+            'connections_opened': 0,
+            'connect_ms': 0.0,
+            'authenticated': False,
+            'probe_ms': 0.0,
+            'total_ms': 0.0
+        }
+        
+        # 1. Resolve the host (timing only; connections resolve it themselves)
+        step = time.perf_counter()
+        try:
+            report['addresses'] = resolve_host(parsed.hostname, port)
+        except OSError as e:
+            logger.warning(f"DNS pre-resolution failed for {parsed.hostname}: {e}")
+        report['dns_ms'] = round((time.perf_counter() - step) * 1000, 1)
+        
+        # 2. Open and keep N pooled connections
+        step = time.perf_counter()
+        if self.http2:
+            connections = 1  # One multiplexed connection carries every stream
+            report['connections_requested'] = connections
+        else:
+            self._ensure_pool_size(connections)
+        origin = f"{parsed.scheme}://{parsed.netloc}/"
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            opened = list(executor.map(lambda _: self._open_connection(origin), range(connections)))
+        report['connections_opened'] = sum(opened)
+        report['connect_ms'] = round((time.perf_counter() - step) * 1000, 1)
+        
+        # 3. Authenticated probe over the warmed connections
+        step = time.perf_counter()
+        report['authenticated'] = self.is_authenticated(test_url)
+        report['probe_ms'] = round((time.perf_counter() - step) * 1000, 1)
+        
+        report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"Session warm-up for {report['host']}: dns={report['dns_ms']}ms "
+            f"connect={report['connect_ms']}ms ({report['connections_opened']}/{connections}) "
+            f"probe={report['probe_ms']}ms authenticated={report['authenticated']}"
+        )
+        return report
+    
+    def _ensure_pool_size(self, size: int) -> None:
+        """Remount larger adapters so the pool can keep `size` idle connections per host"""
+        if size <= self.pool_size:
+            return
+        mount_adapters(self.session, self.session.get_adapter('https://'), pool_maxsize=size)
+        self.pool_size = size
+    
+    def _open_connection(self, origin: str) -> bool:
+        """Open one keep-alive connection with a lightweight HEAD request"""
+        try:
+            if self.http2:
+                self.http2.request('HEAD', origin, allow_redirects=False)
+            else:
+                self.session.head(origin, timeout=self.timeout, allow_redirects=False)
+            return True
+        except Exception as e:
+            logger.debug(f"Connection pre-warm failed for {origin}: {e}")
+            return False
@@ -0,0 +1,247 @@
+"""
+Status Event Hub
+Per-user fan-out of WAR progress, activity logs and obtained courses to open event streams
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+import logging
+
+from .redis_client import create_pubsub_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'warkrs:events:'
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize datetimes as ISO 8601 and sets as sorted lists"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+class StatusSubscription:
+    """
+    One open event stream (a browser tab)
+
+    Events are buffered in a bounded queue. When a slow client lets it fill
+    up, further events are dropped and `overflowed` is set so the stream can
+    send a fresh full status instead of a gap.
+    """
+
+    def __init__(self, user_id: int, max_events: int = 256):
+        self.user_id = user_id
+        self.overflowed = False
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_events)
+
+    def put(self, event: str, data: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait((event, data))
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[tuple]:
+        """
+        Wait for the next event
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            (event, data) tuple, or None on timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class StatusEventHub:
+    """
+    Fan-out of status events keyed by user ID
+
+    Producers (the threaded WAR loop, Celery tasks, the progress publisher and
+    the activity log writers) call `publish`. Events are delivered directly to
+    the user's subscriptions in this process and published once on the
+    user's Redis channel. Every web process runs a single Redis listener
+    (pattern subscription, started with the first local subscription) that
+    hands messages from other processes to its local subscriptions, so any
+    number of open tabs costs one Redis subscription per process and no
+    database or result backend reads. Messages carry the publishing process
+    tag so a process never delivers its own events twice.
+
+    Without Redis only events produced in the same process are delivered;
+    `is_live` tells streams whether cross-process events can arrive.
+    """
+
+    def __init__(self, max_events: int = 256):
+        """
+        Initialize hub
+
+        Args:
+            max_events: Events buffered per subscription before it is marked overflowed
+        """
+        self.max_events = max_events
+        self._origin_base = uuid.uuid4().hex[:12]
+        self._subscriptions: Dict[int, Set[StatusSubscription]] = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+        self.stats = {
+            'published': 0,
+            'delivered': 0,
+            'remote_received': 0,
+            'publish_errors': 0
+        }
+
+    @property
+    def origin(self) -> str:
+        """Tag of this process (forked workers must not share it)"""
+        return f"{self._origin_base}:{os.getpid()}"
+
+    def subscribe(self, user_id: int) -> StatusSubscription:
+        """
+        Open a subscription for one event stream
+
+        Args:
+            user_id: User whose events are wanted
+
+        Returns:
+            StatusSubscription (pass to `unsubscribe` when the stream closes)
+        """
+        subscription = StatusSubscription(user_id, self.max_events)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription) -> None:
+        """Close a subscription"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        """Number of open subscriptions in this process (for one user or all)"""
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def is_live(self) -> bool:
+        """True when events from other processes (Celery workers) can reach this one"""
+        return get_redis_client() is not None
+
+    def publish(self, user_id: int, event: str, data: Dict[str, Any]) -> None:
+        """
+        Publish an event to every open stream of a user
+
+        Never raises: status events are best effort and must not break the
+        WAR loop or log writes.
+
+        Args:
+            user_id: User ID
+            event: Event name ('progress', 'log', ...)
+            data: JSON-serializable payload
+        """
+        self.stats['published'] += 1
+        self._deliver(user_id, event, data)
+
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            message = json.dumps({'origin': self.origin, 'event': event, 'data': data}, default=_json_default)
+            client.publish(f"{CHANNEL_PREFIX}{user_id}", message)
+        except Exception as e:
+            self.stats['publish_errors'] += 1
+            logger.debug(f"Status event publish failed for user {user_id}: {e}")
+
+    def _deliver(self, user_id: int, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event, data)
+        self.stats['delivered'] += len(subscriptions)
+
+    def _ensure_listener(self) -> None:
+        """Start the per-process Redis listener (again after a fork)"""
+        if self._listener is not None and self._listener_pid == os.getpid() and self._listener.is_alive():
+            return
+        if get_redis_client() is None:
+            return
+        with self._lock:
+            if self._listener is None or self._listener_pid != os.getpid() or not self._listener.is_alive():
+                self._listener_pid = os.getpid()
+                self._listener = threading.Thread(target=self._listen, name='status-events', daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        """Deliver events published by other processes to local subscriptions"""
+        while True:
+            client = create_pubsub_client()
+            if client is None:
+                time.sleep(5)
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                for message in pubsub.listen():
+                    if message.get('type') != 'pmessage':
+                        continue
+                    try:
+                        user_id = int(message['channel'][len(CHANNEL_PREFIX):])
+                        payload = json.loads(message['data'])
+                    except (TypeError, ValueError):
+                        continue
+                    if payload.get('origin') == self.origin:
+                        continue
+                    self.stats['remote_received'] += 1
+                    self._deliver(user_id, payload.get('event', 'message'), payload.get('data') or {})
+            except Exception as e:
+                logger.warning(f"Status event listener disconnected: {e}")
+                time.sleep(1)
+
+    def get_stats(self) -> Dict:
+        """Get hub counters and open subscription count"""
+        return {**self.stats, 'subscriptions': self.subscriber_count()}
+
+
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """
+    Encode one Server-Sent Events message
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        event_id: Optional event ID
+
+    Returns:
+        Message text terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=_json_default)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+_default_hub = StatusEventHub()
+
+
+def get_status_events() -> StatusEventHub:
+    """Get the process-wide status event hub"""
+    return _default_hub
@@ -0,0 +1,178 @@
+"""
+Status Store
+Latest WAR run status per user, shared by every web and worker process
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'warkrs:status:'
+
+# Merge fields into the snapshot unless it already belongs to another session
+UPDATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'session_id')
+if current and current ~= ARGV[1] then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Statuses of a run that has not finished yet
+RUNNING_STATUSES = ('queued', 'initializing', 'running', 'stopping')
+
+
+def _encode(value: Any) -> Any:
+    """Normalize values to JSON types (sets become sorted lists)"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class StatusStore:
+    """
+    One status snapshot per user: the run currently (or last) started
+
+    `start` replaces the snapshot when a run is submitted (session, task and
+    runner type), and the runners merge progress into it through `update`
+    (the progress publisher does this on every emission). Any web worker can
+    then answer a status request with one `get`: a single HGETALL in Redis
+    or, without Redis, a primary-key read of the run_status table. Updates
+    carrying a different session ID than the stored one are ignored, so a
+    late write of a finished run cannot overwrite the next run.
+    """
+
+    def __init__(self, ttl: int = 6 * 3600):
+        """
+        Initialize store
+
+        Args:
+            ttl: Seconds a Redis snapshot lives after its last update
+        """
+        self.ttl = ttl
+        self._update_script = None
+
+    def start(self, user_id: int, session_id: int, **fields) -> None:
+        """
+        Replace the user's snapshot with a new run
+
+        Args:
+            user_id: User ID
+            session_id: WAR session ID of the new run
+            **fields: Initial fields (status, task_type, task_id, started_at, ...)
+        """
+        snapshot = {name: _encode(value) for name, value in fields.items()}
+        snapshot['session_id'] = session_id
+        snapshot['updated_at'] = time.time()
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                key = f"{KEY_PREFIX}{user_id}"
+                pipe = client.pipeline(transaction=True)
+                pipe.delete(key)
+                pipe.hset(key, mapping={name: json.dumps(value) for name, value in snapshot.items()})
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Status store Redis write failed, using database: {e}")
+        self._write_db(user_id, session_id, snapshot, replace=True)
+
+    def update(self, user_id: int, session_id: int, **fields) -> bool:
+        """
+        Merge fields into the snapshot of a run
+
+        Args:
+            user_id: User ID
+            session_id: WAR session ID the fields belong to
+            **fields: Changed fields
+
+        Returns:
+            False if the snapshot belongs to another session (nothing written)
+        """
+        fields = {name: _encode(value) for name, value in fields.items()}
+        fields['session_id'] = session_id
+        fields['updated_at'] = time.time()
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._update_script is None:
+                    self._update_script = client.register_script(UPDATE_SCRIPT)
+                args = [json.dumps(session_id), self.ttl]
+                for name, value in fields.items():
+                    args.extend([name, json.dumps(value)])
+                return bool(self._update_script(keys=[f"{KEY_PREFIX}{user_id}"], args=args))
+            except Exception as e:
+                logger.warning(f"Status store Redis update failed, using database: {e}")
+        return self._write_db(user_id, session_id, fields, replace=False)
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read the user's snapshot (one round trip)
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Snapshot dict, or None if the user has no recorded run
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                raw = client.hgetall(f"{KEY_PREFIX}{user_id}")
+                return {name: json.loads(value) for name, value in raw.items()} if raw else None
+            except Exception as e:
+                logger.warning(f"Status store Redis read failed, using database: {e}")
+        try:
+            from app import app as flask_app, db, RunStatus
+            with flask_app.app_context(), db.engine.connect() as conn:
+                data = conn.execute(db.select(RunStatus.data).where(RunStatus.user_id == user_id)).scalar()
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.error(f"Status store read failed for user {user_id}: {e}")
+            return None
+
+    def _write_db(self, user_id: int, session_id: int, fields: Dict, replace: bool) -> bool:
+        """Replace or merge the run_status row (read-modify-write; one runner per user)"""
+        try:
+            from app import app as flask_app, db, RunStatus
+            with flask_app.app_context(), db.engine.begin() as conn:
+                row = conn.execute(
+                    db.select(RunStatus.session_id, RunStatus.data).where(RunStatus.user_id == user_id)
+                ).first()
+                if row is not None and not replace and row.session_id != session_id:
+                    return False
+                snapshot = fields if replace or row is None else {**json.loads(row.data), **fields}
+                values = {'session_id': session_id, 'data': json.dumps(snapshot), 'updated_at': datetime.utcnow()}
+                if row is None:
+                    conn.execute(db.insert(RunStatus).values(user_id=user_id, **values))
+                else:
+                    conn.execute(db.update(RunStatus).where(RunStatus.user_id == user_id).values(**values))
+            return True
+        except Exception as e:
+            logger.error(f"Status store write failed for user {user_id}: {e}")
+            return False
+
+
+_default_store = StatusStore()
+
+
+def get_status_store() -> StatusStore:
+    """Get the process-wide status store"""
+    return _default_store
@@ -0,0 +1,187 @@
+"""
+Stop Signal Channel
+Cheap cross-process stop requests for running WAR sessions
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+import logging
+
+from .redis_client import create_pubsub_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class StopChannel:
+    """
+    Stop channel keyed by WAR session ID
+
+    A stop request sets an in-process event, a Redis key and publishes a
+    Redis message. Waiting loops block on the in-process event, which a
+    single per-process Redis subscriber sets as soon as the message arrives,
+    so a stop takes effect within milliseconds instead of after the next
+    sleep. As a safety net the Redis key (and, without Redis, a cached
+    database check supplied by the caller) is re-checked every
+    `check_interval` seconds.
+    """
+
+    KEY_PREFIX = 'warkrs:stop:'
+    CHANNEL = 'warkrs:stop-events'
+    KEY_TTL = 86400
+
+    def __init__(self, check_interval: float = 1.0, db_check_interval: float = 5.0):
+        """
+        Initialize stop channel
+
+        Args:
+            check_interval: Seconds between Redis key re-checks while waiting
+            db_check_interval: Minimum seconds between database fallback checks
+        """
+        self.check_interval = check_interval
+        self.db_check_interval = db_check_interval
+        self._events: Dict[int, threading.Event] = {}
+        self._db_checked_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+
+    def _event(self, session_id: int) -> threading.Event:
+        with self._lock:
+            event = self._events.get(session_id)
+            if event is None:
+                event = self._events[session_id] = threading.Event()
+            return event
+
+    def _ensure_listener(self) -> None:
+        """Start the per-process Redis subscriber (again after a fork)"""
+        if self._listener is not None and self._listener_pid == os.getpid() and self._listener.is_alive():
+            return
+        if get_redis_client() is None:
+            return
+        with self._lock:
+            if self._listener is None or self._listener_pid != os.getpid() or not self._listener.is_alive():
+                self._listener_pid = os.getpid()
+                self._listener = threading.Thread(target=self._listen, name='stop-channel', daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        """Set local events for stop messages published by any process"""
+        while True:
+            client = create_pubsub_client()
+            if client is None:
+                time.sleep(5)
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        try:
+                            self._event(int(message['data'])).set()
+                        except (TypeError, ValueError):
+                            continue
+            except Exception as e:
+                logger.warning(f"Stop channel subscriber disconnected: {e}")
+                time.sleep(1)
+
+    def request_stop(self, session_id: int) -> bool:
+        """
+        Request a WAR session to stop
+
+        Args:
+            session_id: WAR session ID
+
+        Returns:
+            True if the request reached Redis (other processes), False if local only
+        """
+        self._event(session_id).set()
+        client = get_redis_client()
+        if client is None:
+            return False
+        try:
+            client.set(f"{self.KEY_PREFIX}{session_id}", '1', ex=self.KEY_TTL)
+            client.publish(self.CHANNEL, str(session_id))
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to publish stop request for session {session_id}: {e}")
+            return False
+
+    def is_stop_requested(self, session_id: int,
+                          fallback_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Check whether a stop was requested
+
+        Args:
+            session_id: WAR session ID
+            fallback_check: Database check used when Redis is unavailable (cached)
+
+        Returns:
+            True if the session should stop
+        """
+        event = self._event(session_id)
+        if event.is_set():
+            return True
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if client.exists(f"{self.KEY_PREFIX}{session_id}"):
+                    event.set()
+                    return True
+                return False
+            except Exception as e:
+                logger.debug(f"Stop key check failed: {e}")
+
+        if fallback_check is not None:
+            now = time.monotonic()
+            if now - self._db_checked_at.get(session_id, 0.0) >= self.db_check_interval:
+                self._db_checked_at[session_id] = now
+                try:
+                    if fallback_check():
+                        event.set()
+                        return True
+                except Exception as e:
+                    logger.debug(f"Stop fallback check failed: {e}")
+        return False
+
+    def wait(self, session_id: int, timeout: float,
+             fallback_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Sleep up to `timeout` seconds, returning early when a stop is requested
+
+        Args:
+            session_id: WAR session ID
+            timeout: Maximum seconds to wait
+            fallback_check: Database check used when Redis is unavailable
+
+        Returns:
+            True if a stop was requested, False if the timeout elapsed
+        """
+        self._ensure_listener()
+        event = self._event(session_id)
+        deadline = time.monotonic() + max(0.0, timeout)
+
+        while True:
+            if self.is_stop_requested(session_id, fallback_check):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if event.wait(min(remaining, self.check_interval)):
+                return True
+
+    def clear(self, session_id: int) -> None:
+        """Forget local state for a finished session"""
+        with self._lock:
+            self._events.pop(session_id, None)
+            self._db_checked_at.pop(session_id, None)
+
+
+_default_channel = StopChannel()
+
+
+def get_stop_channel() -> StopChannel:
+    """Get the process-wide stop channel"""
+    return _default_channel
@@ -0,0 +1,108 @@
+"""
+Transfer Statistics
+Byte accounting and content decoding for SIAKAD traffic
+"""
+
+import gzip
+import threading
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi as brotli
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+# Encodings we can decode ourselves (and therefore measure)
+ACCEPT_ENCODING = 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+
+
+def decode_body(raw: bytes, encoding: str) -> bytes:
+    """
+    Decode a response body according to its Content-Encoding
+
+    Args:
+        raw: Body bytes as received on the wire
+        encoding: Content-Encoding header value
+
+    Returns:
+        Decoded body (unchanged for identity or unknown encodings)
+    """
+    encoding = (encoding or '').strip().lower()
+    if not raw or encoding in ('', 'identity'):
+        return raw
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(raw)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(raw)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            return zlib.decompress(raw, -zlib.MAX_WBITS)
+    if encoding == 'br' and BROTLI_AVAILABLE:
+        return brotli.decompress(raw)
+    return raw
+
+
+class TransferStats:
+    """Thread-safe per-endpoint and per-session byte counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict] = {}
+        self._totals = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {
+            'requests': 0,
+            'bytes_compressed': 0,
+            'bytes_decompressed': 0,
+            'decompress_ms': 0.0
+        }
+
+    def record(self, endpoint: str, compressed: int, decompressed: int,
+               decompress_ms: Optional[float] = None) -> None:
+        """
+        Record one response
+
+        Args:
+            endpoint: Endpoint key (URL path)
+            compressed: Bytes received on the wire (body only)
+            decompressed: Bytes after content decoding
+            decompress_ms: Time spent decoding, if measured
+        """
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, self._empty())
+            for bucket in (entry, self._totals):
+                bucket['requests'] += 1
+                bucket['bytes_compressed'] += compressed
+                bucket['bytes_decompressed'] += decompressed
+                if decompress_ms:
+                    bucket['decompress_ms'] += decompress_ms
+
+    def totals(self) -> Dict:
+        """Get session-wide totals"""
+        with self._lock:
+            totals = dict(self._totals)
+        totals['decompress_ms'] = round(totals['decompress_ms'], 3)
+        return totals
+
+    def snapshot(self) -> Dict:
+        """
+        Get totals plus per-endpoint breakdown
+
+        Returns:
+            Dictionary with 'totals' and 'endpoints' keys
+        """
+        with self._lock:
+            endpoints = {
+                path: dict(entry, decompress_ms=round(entry['decompress_ms'], 3))
+                for path, entry in self._endpoints.items()
+            }
+        return {'totals': self.totals(), 'endpoints': endpoints}
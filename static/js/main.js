@@ -18,13 +18,14 @@ $(document).ready(function() {
         }
     }
 
-    // Status update functionality
+    // Status update functionality (polling fallback when the event stream is unavailable)
     function updateStatus() {
         if (window.location.pathname === '/') {
             $.get('/api/status')
                 .done(function(data) {
                     // Update status indicators
                     updateStatusIndicators(data);
+                    announceStatus(data);
                     
                     // Setup auto-refresh if needed
                     if (data.status === 'active') {
@@ -37,6 +38,157 @@ $(document).ready(function() {
         }
     }
 
+    var statusPolling = null;
+
+    function startStatusPolling() {
+        if (statusPolling === null) {
+            updateStatus();
+            statusPolling = setInterval(updateStatus, 5000); // Every 5 seconds
+        }
+    }
+
+    // Live status updates: progress, new log lines and obtained courses are
+    // pushed over one EventSource per tab; falls back to polling when the
+    // browser or server cannot stream
+    var ACTIVE_STATUSES = ['queued', 'initializing', 'running', 'active', 'stopping'];
+    var liveStatus = {};
+    var pageActive = null;
+
+    function setupStatusStream() {
+        if (window.location.pathname !== '/') {
+            return;
+        }
+        if (!window.EventSource) {
+            startStatusPolling();
+            return;
+        }
+
+        var source = new EventSource('/api/status/stream');
+        var failures = 0;
+
+        source.addEventListener('status', function(e) {
+            failures = 0;
+            var data = JSON.parse(e.data);
+            liveStatus = {
+                status: data.session_active ? 'active' : data.status,
+                started_at: data.started_at,
+                last_activity: data.last_activity
+            };
+            var active = ACTIVE_STATUSES.indexOf(liveStatus.status) !== -1;
+            if (pageActive === null) {
+                pageActive = active;
+            } else if (active !== pageActive) {
+                // Changed while reconnecting
+                location.reload();
+                return;
+            }
+            updateStatusIndicators(data);
+            announceStatus(liveStatus);
+            if (!data.live) {
+                // Progress from other processes cannot reach this stream
+                source.close();
+                startStatusPolling();
+            }
+        });
+
+        source.addEventListener('progress', function(e) {
+            applyProgress(JSON.parse(e.data));
+        });
+
+        source.addEventListener('log', function(e) {
+            prependLog(JSON.parse(e.data));
+        });
+
+        source.onerror = function() {
+            // The server ends streams periodically and the browser reconnects;
+            // repeated failures without a status event mean streaming is broken
+            failures++;
+            if (failures >= 3 || source.readyState === EventSource.CLOSED) {
+                source.close();
+                startStatusPolling();
+            }
+        };
+    }
+
+    function applyProgress(delta) {
+        if (delta.cycle !== undefined) {
+            $('.total-attempts').text(delta.cycle);
+        }
+        if (delta.successful_courses !== undefined) {
+            markObtainedCourses(delta.successful_courses);
+        }
+        if (delta.last_activity !== undefined) {
+            liveStatus.last_activity = delta.last_activity;
+        }
+        if (delta.status !== undefined) {
+            liveStatus.status = ACTIVE_STATUSES.indexOf(delta.status) !== -1 ? 'active' : delta.status;
+            var active = ACTIVE_STATUSES.indexOf(delta.status) !== -1;
+            if (pageActive !== null && active !== pageActive) {
+                // Started or finished elsewhere: re-render the controls and summary
+                location.reload();
+                return;
+            }
+        }
+        announceStatus(liveStatus);
+    }
+
+    function markObtainedCourses(obtained) {
+        $('.courses-obtained').text(obtained.length);
+        var targets = $('[data-target-course]');
+        if (targets.length === 0) {
+            return;
+        }
+        var done = 0;
+        targets.each(function() {
+            var badge = $(this);
+            if (obtained.indexOf(badge.attr('data-target-course')) !== -1) {
+                badge.removeClass('bg-secondary').addClass('bg-success');
+                badge.find('i').removeClass('bi-circle').addClass('bi-check-circle');
+                done++;
+            }
+        });
+        var percent = Math.round(done / targets.length * 100);
+        $('.progress-count').text(done + ' / ' + targets.length);
+        $('.progress-percent').text(percent + '%');
+        $('.progress-bar').css('width', percent + '%').attr('aria-valuenow', percent);
+    }
+
+    function prependLog(log) {
+        var container = $('#recent-logs');
+        if (container.length === 0) {
+            return;
+        }
+        var badge = log.level === 'SUCCESS' ? 'success' : log.level === 'ERROR' ? 'danger' :
+            log.level === 'WARNING' ? 'warning' : 'info';
+        var entry = $('<div class="d-flex align-items-start mb-2"></div>');
+        entry.append($('<span class="me-2"></span>').addClass('badge bg-' + badge).text(log.level));
+        var body = $('<div class="flex-grow-1"></div>');
+        body.append($('<div></div>').addClass('log-' + String(log.level).toLowerCase()).text(log.message));
+        body.append($('<small class="text-muted"></small>').text(formatLogTimestamp(log.timestamp)));
+        entry.append(body);
+        container.prepend('<hr class="my-2">');
+        container.prepend(entry);
+
+        // Keep the same number of entries as the server-rendered list
+        var entries = container.children('div');
+        if (entries.length > 10) {
+            entries.slice(10).each(function() {
+                $(this).prev('hr').remove();
+                $(this).remove();
+            });
+        }
+    }
+
+    function formatLogTimestamp(iso) {
+        // Same format and (UTC) clock as the server-rendered timestamps
+        var m = /^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})/.exec(iso || '');
+        return m ? m[3] + '/' + m[2] + '/' + m[1] + ' ' + m[4] + ':' + m[5] + ':' + m[6] : '';
+    }
+
+    function announceStatus(data) {
+        document.dispatchEvent(new CustomEvent('warkrs:status', { detail: data }));
+    }
+
     function updateStatusIndicators(data) {
         // Update status badge
         var statusElement = $('.status-indicator');
@@ -60,6 +212,8 @@ $(document).ready(function() {
         }
         if (data.courses_obtained !== undefined) {
             $('.courses-obtained').text(data.courses_obtained.length);
+        } else if (data.obtained_courses !== undefined) {
+            markObtainedCourses(data.obtained_courses);
         }
     }
 
@@ -125,7 +279,7 @@ $(document).ready(function() {
         if (window.location.pathname === '/logs') {
             // Auto-scroll to bottom of logs if on first page
             var urlParams = new URLSearchParams(window.location.search);
-            if (!urlParams.has('page') || urlParams.get('page') === '1') {
+            if (!urlParams.has('before') && !urlParams.has('after')) {
                 $('html, body').animate({
                     scrollTop: $(document).height()
                 }, 1000);
@@ -195,8 +349,7 @@ $(document).ready(function() {
     setupCourseFilter();
     
     // Start status updates
-    updateStatus();
-    setInterval(updateStatus, 5000); // Every 5 seconds
+    setupStatusStream();
 
     // Page-specific initializations
     var currentPage = window.location.pathname;
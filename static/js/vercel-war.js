@@ -1,43 +1,46 @@
 // Vercel-compatible WAR KRS functionality
 // This replaces background threads with API calls
 
-// Auto-refresh dashboard status
+// Render the WAR status box
+function renderWarStatus(data) {
+    const statusElement = document.getElementById('war-status');
+    if (statusElement) {
+        if (data.status === 'active') {
+            statusElement.innerHTML = `
+                <div class="alert alert-info">
+                    <strong>Status:</strong> WAR process sedang berjalan...
+                    <br><small>Started: ${new Date(data.started_at).toLocaleString()}</small>
+                </div>
+            `;
+        } else if (data.status === 'completed') {
+            statusElement.innerHTML = `
+                <div class="alert alert-success">
+                    <strong>Status:</strong> WAR process selesai
+                    <br><small>Completed: ${new Date(data.last_activity).toLocaleString()}</small>
+                </div>
+            `;
+        } else if (data.status === 'failed') {
+            statusElement.innerHTML = `
+                <div class="alert alert-danger">
+                    <strong>Status:</strong> WAR process gagal
+                    <br><small>Failed: ${new Date(data.last_activity).toLocaleString()}</small>
+                </div>
+            `;
+        } else {
+            statusElement.innerHTML = `
+                <div class="alert alert-secondary">
+                    <strong>Status:</strong> Tidak ada WAR process yang berjalan
+                </div>
+            `;
+        }
+    }
+}
+
+// Fetch dashboard status once (after starting a serverless run)
 function refreshWarStatus() {
     fetch('/api/war/status')
         .then(response => response.json())
-        .then(data => {
-            const statusElement = document.getElementById('war-status');
-            if (statusElement) {
-                if (data.status === 'active') {
-                    statusElement.innerHTML = `
-                        <div class="alert alert-info">
-                            <strong>Status:</strong> WAR process sedang berjalan...
-                            <br><small>Started: ${new Date(data.started_at).toLocaleString()}</small>
-                        </div>
-                    `;
-                } else if (data.status === 'completed') {
-                    statusElement.innerHTML = `
-                        <div class="alert alert-success">
-                            <strong>Status:</strong> WAR process selesai
-                            <br><small>Completed: ${new Date(data.last_activity).toLocaleString()}</small>
-                        </div>
-                    `;
-                } else if (data.status === 'failed') {
-                    statusElement.innerHTML = `
-                        <div class="alert alert-danger">
-                            <strong>Status:</strong> WAR process gagal
-                            <br><small>Failed: ${new Date(data.last_activity).toLocaleString()}</small>
-                        </div>
-                    `;
-                } else {
-                    statusElement.innerHTML = `
-                        <div class="alert alert-secondary">
-                            <strong>Status:</strong> Tidak ada WAR process yang berjalan
-                        </div>
-                    `;
-                }
-            }
-        })
+        .then(renderWarStatus)
         .catch(error => {
             console.error('Error checking WAR status:', error);
         });
@@ -115,13 +118,15 @@ document.addEventListener('DOMContentLoaded', function() {
     // Refresh status on page load
     refreshWarStatus();
     
-    // Auto-refresh every 10 seconds (only for active processes)
-    setInterval(() => {
-        const statusElement = document.getElementById('war-status');
-        if (statusElement && statusElement.innerHTML.includes('sedang berjalan')) {
-            refreshWarStatus();
-        }
-    }, 10000);
+    // Follow live status pushed by main.js (event stream, or its polling fallback)
+    document.addEventListener('warkrs:status', function(e) {
+        const data = e.detail;
+        renderWarStatus({
+            status: String(data.status).startsWith('error') ? 'failed' : data.status,
+            started_at: data.started_at,
+            last_activity: data.last_activity
+        });
+    });
     
     // Override the form submission if this is Vercel environment
     const warForm = document.querySelector('form[action="/war/start"]');
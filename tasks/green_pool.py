@@ -0,0 +1,83 @@
+"""
+Green Pool Support
+Keeps WAR tasks cooperative under Celery's gevent/eventlet worker pools
+"""
+
+import logging
+from typing import Optional
+
+from celery.signals import worker_init
+
+logger = logging.getLogger(__name__)
+
+
+def get_green_pool() -> Optional[str]:
+    """
+    Detect whether this process runs on a monkey-patched green-thread pool
+
+    Returns:
+        'gevent', 'eventlet' or None (prefork/solo/threads)
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('socket'):
+            return 'gevent'
+    except ImportError:
+        pass
+    try:
+        from eventlet import patcher
+        if patcher.is_monkey_patched('socket'):
+            return 'eventlet'
+    except ImportError:
+        pass
+    return None
+
+
+def patch_database_driver(pool: str) -> bool:
+    """
+    Make psycopg2 yield to the hub while waiting on PostgreSQL
+
+    psycopg2 is a C extension and is not covered by monkey patching; without
+    psycogreen every database write would block all WAR sessions of the worker.
+
+    Args:
+        pool: 'gevent' or 'eventlet'
+
+    Returns:
+        True if the driver was patched
+    """
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return False
+
+    try:
+        if pool == 'gevent':
+            from psycogreen.gevent import patch_psycopg
+        else:
+            from psycogreen.eventlet import patch_psycopg
+    except ImportError:
+        logger.warning(f"psycogreen not installed: PostgreSQL queries will block the {pool} hub "
+                       f"(pip install psycogreen)")
+        return False
+
+    patch_psycopg()
+    return True
+
+
+@worker_init.connect
+def init_green_worker(**kwargs):
+    """Prepare a gevent/eventlet worker (worker_process_init only fires for prefork)"""
+    pool = get_green_pool()
+    if pool is None:
+        return
+
+    if patch_database_driver(pool):
+        logger.info(f"psycopg2 patched for the {pool} pool")
+
+    try:
+        from src.scraper_factory import get_scraper_factory
+        build_ms = get_scraper_factory().prepare()
+        logger.info(f"Worker cloudscraper template ready for {pool} pool ({build_ms}ms)")
+    except Exception as e:
+        logger.warning(f"Failed to prebuild cloudscraper template: {e}")
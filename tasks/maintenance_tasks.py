@@ -0,0 +1,49 @@
+"""
+Maintenance Tasks
+Periodic housekeeping run by Celery beat
+"""
+
+import logging
+from typing import Dict
+
+from celery_app import celery_app
+from tasks.repository import get_worker_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='tasks.maintenance_tasks.prune_activity_logs')
+def prune_activity_logs() -> Dict:
+    """
+    Roll up, expire and archive activity logs (see src.log_retention)
+    
+    Returns:
+        Retention run statistics
+    """
+    flask_app = get_worker_app()
+    from app import activity_log_retention
+    
+    with flask_app.app_context():
+        try:
+            return activity_log_retention.run()
+        except Exception as e:
+            logger.error(f"Activity log retention failed: {e}")
+            raise
+
+
+@celery_app.task(name='tasks.maintenance_tasks.refresh_course_catalog')
+def refresh_course_catalog() -> Dict:
+    """
+    Import courses added to the remote COURSE_LIST.md (optional, needs network)
+    
+    Scheduled only when COURSE_REMOTE_REFRESH_HOURS is set; startup always
+    uses the bundled catalog.
+    
+    Returns:
+        Import statistics (empty if the download or import failed)
+    """
+    flask_app = get_worker_app()
+    from app import refresh_courses_from_remote
+    
+    with flask_app.app_context():
+        return refresh_courses_from_remote() or {}
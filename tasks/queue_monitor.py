@@ -0,0 +1,146 @@
+"""
+Queue Monitor
+Celery signal hooks and broker queue depth for src.queue_metrics
+"""
+
+import json
+import socket
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import logging
+
+from celery.signals import before_task_publish, task_prerun, task_postrun, worker_init, worker_shutdown
+
+from celery_app import celery_app
+from src.queue_metrics import get_queue_metrics
+
+logger = logging.getLogger(__name__)
+
+MONITORED_QUEUES = ('war_queue', 'control_queue')
+ENQUEUED_AT_HEADER = 'warkrs_enqueued_at'
+
+# Stop event of this worker process's liveness heartbeat
+_heartbeat_stop = None
+
+
+def _due_time(request) -> Optional[float]:
+    """Epoch time a task became runnable: its ETA, else when it was published"""
+    eta = getattr(request, 'eta', None)
+    if eta:
+        try:
+            return datetime.fromisoformat(eta).timestamp() if isinstance(eta, str) else eta.timestamp()
+        except (TypeError, ValueError):
+            pass
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None)
+    return float(enqueued_at) if enqueued_at else None
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """Carry the publish time in the message so workers can measure queue wait"""
+    if headers is not None:
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+@worker_init.connect
+def register_worker(sender=None, **kwargs):
+    """Record the worker's pool size and keep it registered while long tasks run"""
+    global _heartbeat_stop
+    try:
+        hostname = getattr(sender, 'hostname', None) or socket.gethostname()
+        concurrency = getattr(sender, 'concurrency', None) or celery_app.conf.worker_concurrency
+        _heartbeat_stop = get_queue_metrics().start_heartbeat(hostname, int(concurrency))
+    except Exception as e:
+        logger.warning(f"Queue monitor worker registration failed: {e}")
+
+
+@worker_shutdown.connect
+def unregister_worker(**kwargs):
+    """Stop the liveness heartbeat (the worker then ages out after worker_ttl)"""
+    if _heartbeat_stop is not None:
+        _heartbeat_stop.set()
+
+
+@task_prerun.connect
+def on_task_start(task_id=None, task=None, kwargs=None, **extra):
+    """Record start delay (and cycle lag for cycle tasks) when a worker picks up a task"""
+    try:
+        request = task.request
+        if request.called_directly or request.is_eager:
+            return
+        metrics = get_queue_metrics()
+        queue = (request.delivery_info or {}).get('routing_key') or 'default'
+        hostname = request.hostname or socket.gethostname()
+
+        metrics.worker_seen(hostname)
+        metrics.task_started(task_id, hostname, queue)
+
+        due = _due_time(request)
+        if due is None:
+            return
+        delay_ms = (time.time() - due) * 1000
+        metrics.record_start_delay(queue, delay_ms)
+
+        # Each cycle task is one scheduled cycle: its start delay is the cycle lag
+        kwargs = kwargs or {}
+        if task.name == 'tasks.war_tasks.run_war_cycle_task' and kwargs.get('cycle') and kwargs.get('session_id'):
+            metrics.record_cycle_lag(kwargs['session_id'], delay_ms)
+    except Exception as e:
+        logger.debug(f"Queue monitor prerun failed: {e}")
+
+
+@task_postrun.connect
+def on_task_finish(task_id=None, task=None, **extra):
+    """Mark the task's worker slot as free"""
+    try:
+        if task.request.called_directly or task.request.is_eager:
+            return
+        get_queue_metrics().task_finished(task_id)
+    except Exception as e:
+        logger.debug(f"Queue monitor postrun failed: {e}")
+
+
+def get_queue_depths(queues: Iterable[str] = MONITORED_QUEUES) -> Dict[str, Optional[int]]:
+    """
+    Count messages waiting in broker queues
+
+    Countdown/ETA tasks are held by workers until due, so they are not part of
+    the depth; their wait shows up as start delay instead.
+
+    Args:
+        queues: Queue names
+
+    Returns:
+        Dict of queue name to depth (None when the broker is unreachable)
+    """
+    depths = {queue: None for queue in queues}
+    try:
+        with celery_app.connection_for_read() as conn:
+            conn.ensure_connection(max_retries=1, interval_start=0, interval_step=0.2)
+            for queue in depths:
+                # A fresh channel per queue: a failed passive declare closes the channel on AMQP
+                with conn.channel() as channel:
+                    try:
+                        depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                    except conn.channel_errors:
+                        depths[queue] = 0  # Not declared yet, so nothing was ever queued
+    except Exception as e:
+        logger.warning(f"Queue depth check failed: {e}")
+    return depths
+
+
+def collect_queue_report() -> Dict:
+    """
+    Build the queue metrics report used for autoscaling
+
+    Returns:
+        Dict with per-queue depth and start delay, cycle lag, worker
+        utilization and a scaling recommendation
+    """
+    return get_queue_metrics().get_report(get_queue_depths())
+
+
+if __name__ == '__main__':
+    # For cron-driven scaling scripts: python -m tasks.queue_monitor
+    print(json.dumps(collect_queue_report(), indent=2))
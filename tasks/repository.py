@@ -0,0 +1,307 @@
+"""
+Task Repository
+Worker-level Flask app and lightweight database write API for Celery tasks
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from src.log_sink import BufferedLogSink
+
+logger = logging.getLogger(__name__)
+
+_worker_app = None
+_worker_app_lock = threading.Lock()
+
+
+def get_worker_app():
+    """
+    Get the Flask app used for database access in this process
+
+    The web app module is imported once per process and its app (with the
+    configured, pooled SQLAlchemy engine) is reused for every task write
+    instead of building a new Flask app and engine per call.
+    """
+    global _worker_app
+    if _worker_app is None:
+        with _worker_app_lock:
+            if _worker_app is None:
+                from app import app as flask_app
+                _worker_app = flask_app
+    return _worker_app
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create the app and a fresh connection pool in each forked worker process"""
+    try:
+        from app import db
+        flask_app = get_worker_app()
+        with flask_app.app_context():
+            # Connections inherited from the parent process must not be shared
+            db.engine.dispose()
+        logger.info("Worker database engine initialized")
+    except Exception as e:
+        logger.error(f"Failed to initialize worker database engine: {e}")
+
+    try:
+        from src.scraper_factory import get_scraper_factory
+        build_ms = get_scraper_factory().prepare()
+        logger.info(f"Worker cloudscraper template ready ({build_ms}ms)")
+    except Exception as e:
+        logger.warning(f"Failed to prebuild cloudscraper template: {e}")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """Flush buffered activity logs before the worker process exits"""
+    _repository.log_sink.close()
+
+
+class TaskRepository:
+    """
+    Lightweight repository for the writes issued by WAR tasks
+    Each method is a single pooled-connection statement plus commit
+    """
+
+    def __init__(self):
+        self.log_sink = BufferedLogSink(
+            self.add_activity_logs,
+            batch_size=int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 50)),
+            flush_interval_ms=int(os.getenv('ACTIVITY_LOG_FLUSH_MS', 500)),
+            max_queue=int(os.getenv('ACTIVITY_LOG_MAX_QUEUE', 5000)),
+            name='task-activity-log-sink'
+        )
+
+    @contextmanager
+    def session_scope(self):
+        """Provide a database session inside the worker app context"""
+        from app import db
+        with get_worker_app().app_context():
+            try:
+                yield db.session
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def update_session_status(self, user_id: int, session_id: int, status: str,
+                              started_at: Optional[datetime] = None) -> bool:
+        """
+        Update WAR session status
+
+        Args:
+            user_id: User ID
+            session_id: Session ID
+            status: New status
+            started_at: Start time (only applied for 'active')
+
+        Returns:
+            True if the session row was updated
+        """
+        from app import db, WarSession
+
+        now = datetime.utcnow()
+        values = {'status': status, 'last_activity': now}
+        if status == 'active' and started_at:
+            values['started_at'] = started_at
+        elif status in ['completed', 'stopped', 'error']:
+            values['stopped_at'] = now
+
+        with self.session_scope() as session:
+            result = session.execute(
+                db.update(WarSession)
+                .where(WarSession.id == session_id, WarSession.user_id == user_id)
+                .values(**values)
+            )
+            return result.rowcount > 0
+
+    def update_session_progress(self, user_id: int, session_id: int, cycle: int,
+                                successful_courses: List[str], final_status: Optional[str] = None,
+                                transfer_totals: Optional[Dict] = None) -> bool:
+        """
+        Update WAR session progress counters
+
+        Args:
+            user_id: User ID
+            session_id: Session ID
+            cycle: Current cycle number
+            successful_courses: Courses obtained so far
+            final_status: Final status if task is completing (optional)
+            transfer_totals: Bandwidth totals from SiakadSession (optional)
+
+        Returns:
+            True if the session row was updated
+        """
+        from app import db, WarSession
+
+        now = datetime.utcnow()
+        values = self._progress_values(cycle, successful_courses, transfer_totals)
+        values['last_activity'] = now
+        if final_status:
+            values['status'] = final_status
+            values['stopped_at'] = now
+
+        with self.session_scope() as session:
+            result = session.execute(
+                db.update(WarSession)
+                .where(WarSession.id == session_id, WarSession.user_id == user_id)
+                .values(**values)
+            )
+            return result.rowcount > 0
+
+    def mark_active_session_stopping(self, user_id: int) -> bool:
+        """
+        Mark the user's active WAR session as stopping
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            True if an active session was marked
+        """
+        from app import db, WarSession
+
+        with self.session_scope() as session:
+            result = session.execute(
+                db.update(WarSession)
+                .where(WarSession.user_id == user_id, WarSession.status == 'active')
+                .values(status='stopping')
+            )
+            return result.rowcount > 0
+
+    def is_session_stopping(self, session_id: int) -> bool:
+        """
+        Check whether a WAR session was marked as stopping
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if the session status is 'stopping'
+        """
+        from app import db, WarSession
+
+        with self.session_scope() as session:
+            status = session.execute(
+                db.select(WarSession.status).where(WarSession.id == session_id)
+            ).scalar()
+            return status == 'stopping'
+
+    def save_checkpoint(self, user_id: int, session_id: int, state: Dict,
+                        transfer_totals: Optional[Dict] = None) -> bool:
+        """
+        Persist controller state for the next cycle task
+
+        The progress counters (cycle, courses obtained, bandwidth totals) are
+        written by the same UPDATE, so a cycle costs one statement.
+
+        Args:
+            user_id: User ID
+            session_id: Session ID
+            state: State from WARKRSController.export_state()
+            transfer_totals: Bandwidth totals from SiakadSession (optional)
+
+        Returns:
+            True if the session row was updated
+        """
+        from app import db, WarSession
+
+        values = self._progress_values(state.get('cycle_count', 0),
+                                       state.get('successful_courses', []), transfer_totals)
+        with self.session_scope() as session:
+            result = session.execute(
+                db.update(WarSession)
+                .where(WarSession.id == session_id, WarSession.user_id == user_id)
+                .values(checkpoint=json.dumps(state), last_activity=datetime.utcnow(), **values)
+            )
+            return result.rowcount > 0
+
+    @staticmethod
+    def _progress_values(cycle: int, successful_courses: List[str],
+                         transfer_totals: Optional[Dict] = None) -> Dict:
+        """WarSession column values for the progress counters"""
+        values = {
+            'total_attempts': cycle,
+            'successful_attempts': len(successful_courses),
+            'courses_obtained': json.dumps(successful_courses)
+        }
+        if transfer_totals:
+            values.update({
+                'http_requests': transfer_totals.get('requests', 0),
+                'bytes_compressed': transfer_totals.get('bytes_compressed', 0),
+                'bytes_decompressed': transfer_totals.get('bytes_decompressed', 0),
+                'decompress_ms': transfer_totals.get('decompress_ms', 0.0)
+            })
+        return values
+
+    def load_checkpoint(self, session_id: int) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Load session status and the last saved controller state
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Tuple of (status, state); (None, None) if the session does not exist
+        """
+        from app import db, WarSession
+
+        with self.session_scope() as session:
+            row = session.execute(
+                db.select(WarSession.status, WarSession.checkpoint).where(WarSession.id == session_id)
+            ).first()
+        if row is None:
+            return None, None
+        try:
+            state = json.loads(row.checkpoint) if row.checkpoint else None
+        except ValueError:
+            logger.warning(f"Ignoring unreadable checkpoint for session {session_id}")
+            state = None
+        return row.status, state
+
+    def queue_activity_log(self, row: Dict) -> bool:
+        """
+        Queue an activity log row for the next bulk insert
+
+        Args:
+            row: Dict with user_id, session_id, level, message and timestamp
+
+        Returns:
+            False if the row was dropped under backpressure
+        """
+        return self.log_sink.submit(row)
+
+    def add_activity_logs(self, rows: Iterable[Dict]) -> int:
+        """
+        Insert activity log rows in one statement
+
+        Args:
+            rows: Dicts with user_id, session_id, level, message and timestamp
+
+        Returns:
+            Number of rows inserted
+        """
+        from app import db, ActivityLog
+
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.session_scope() as session:
+            session.execute(db.insert(ActivityLog), rows)
+        return len(rows)
+
+
+_repository = TaskRepository()
+
+
+def get_repository() -> TaskRepository:
+    """Get the process-wide task repository"""
+    return _repository
@@ -12,12 +12,22 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 from celery import current_task
-from celery.exceptions import Retry
+from celery.exceptions import Retry, SoftTimeLimitExceeded
 from celery_app import celery_app
 
 # Add parent directory to path for imports (fix for Celery worker)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from tasks.repository import get_repository
+from tasks import green_pool  # noqa: F401 - registers the gevent/eventlet worker_init hook
+from tasks import queue_monitor  # noqa: F401 - registers the queue metrics signal hooks
+from src.stop_signal import get_stop_channel
+from src.progress_publisher import ProgressPublisher
+from src.fair_scheduler import get_fair_scheduler
+from src.run_lock import get_run_lock
+from src.queue_metrics import get_queue_metrics
+from src.status_events import get_status_events
+
 # Import existing business logic
 try:
     from src.controller import WARKRSController
@@ -30,11 +40,15 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Seconds before a cycle that got no fair-scheduler turn is retried
+FAIR_REQUEUE_DELAY = 5
+
 
 @celery_app.task(bind=True, name='tasks.war_tasks.run_war_task')
 def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str], 
                  urls: Dict[str, str], target_courses: Dict[str, str], 
-                 settings: Dict, telegram_config: Optional[Dict] = None):
+                 settings: Dict, telegram_config: Optional[Dict] = None,
+                 lease_token: Optional[str] = None):
     """
     Main WAR KRS background task using Celery
     Follows existing controller pattern with enhanced monitoring
@@ -47,6 +61,7 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
         target_courses: Target courses mapping (code -> class_id)
         settings: WAR settings configuration
         telegram_config: Telegram notification configuration
+        lease_token: Per-user run lease acquired by the caller (renewed by a heartbeat)
     
     Returns:
         Dict with task results and statistics
@@ -56,12 +71,47 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
         logger.error("Controller not available - cannot run WAR task")
         return {'status': 'error', 'message': 'Controller not available'}
     
+    controller = None
+    heartbeat = None
     try:
+        # Resume from the last checkpoint on redelivery or soft-time-limit handoff
+        session_status_db, checkpoint = get_repository().load_checkpoint(session_id)
+        # ('error' is not final: the task retries after a fatal error and resumes)
+        if session_status_db in ['completed', 'stopped', 'error_session_failed', 'error_cycle_failed'] and checkpoint:
+            logger.info(f"User {user_id}: WAR session {session_id} already finished ({session_status_db}), not resuming")
+            get_run_lock().release(user_id, lease_token)
+            return {'status': 'skipped', 'user_id': user_id, 'session_id': session_id}
+        # (a checkpoint without cycles is left by a requeue before the first cycle)
+        resumed = bool(checkpoint)
+        
+        # A redelivered copy of a task that is still running (same task id,
+        # checkpoint fresher than the run lease) must not start a second loop:
+        # look again once the checkpoint would have gone stale
+        if resumed and checkpoint.get('task_id') == self.request.id:
+            checkpoint_age = time.time() - checkpoint.get('saved_at', 0)
+            if checkpoint_age < get_run_lock().ttl:
+                self.apply_async(kwargs={
+                    'user_id': user_id,
+                    'session_id': session_id,
+                    'cookies': cookies,
+                    'urls': urls,
+                    'target_courses': target_courses,
+                    'settings': settings,
+                    'telegram_config': telegram_config,
+                    'lease_token': lease_token
+                }, task_id=self.request.id, countdown=get_run_lock().ttl - checkpoint_age)
+                logger.warning(f"User {user_id}: WAR task {self.request.id} is still running, "
+                               f"deferring duplicate delivery")
+                return {'status': 'duplicate', 'user_id': user_id, 'session_id': session_id}
+        
+        # Renew the run lease in the background for as long as this task runs
+        heartbeat = get_run_lock().heartbeat(user_id, lease_token)
+        
         # Update task state to PROGRESS
         self.update_state(
             state='PROGRESS',
             meta={
-                'status': 'initializing',
+                'status': 'resuming' if resumed else 'initializing',
                 'user_id': user_id,
                 'session_id': session_id,
                 'cycle': 0,
@@ -83,87 +133,131 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
             debug_mode=False
         )
         
+        if resumed:
+            controller.restore_state(checkpoint)
+            log_activity_celery(user_id,
+                f"Resumed from checkpoint at cycle {controller.cycle_count} "
+                f"({len(controller.remaining_targets)} targets remaining)", "INFO", session_id)
+        
         # Log initial state
         logger.info(f"Controller initialized. Remaining targets: {len(controller.remaining_targets)}")
         
+        # Per-cycle progress goes through the publisher: only changed fields are
+        # sent, and the result backend / database are written on significant changes
+        progress = ProgressPublisher(
+            session_id, user_id,
+            state_fn=lambda snapshot: self.update_state(state='PROGRESS', meta=snapshot),
+            db_fn=lambda snapshot: update_task_progress(
+                user_id, session_id, snapshot['cycle'], snapshot['successful_courses'],
+                set(snapshot['remaining_targets']),
+                transfer_totals=controller.session.transfer_stats.totals()),
+            min_interval=settings.get('progress_min_interval', 1.0),
+            state_interval=settings.get('progress_state_interval', 60.0),
+            db_interval=settings.get('progress_db_interval', 120.0)
+        )
+        
+        # Warm up DNS, pooled connections and cookies before the first cycle
+        if settings.get('warmup_enabled', True) and not resumed:
+            try:
+                warmup_report = controller.warm_up()
+                log_activity_celery(user_id,
+                    f"Session warm-up completed in {warmup_report['total_ms']}ms "
+                    f"(authenticated: {warmup_report['authenticated']})",
+                    "INFO" if warmup_report['authenticated'] else "WARNING",
+                    session_id, warmup_report)
+            except Exception as warmup_error:
+                logger.warning(f"User {user_id}: Session warm-up failed: {warmup_error}")
+        
         # Update database status (import here to avoid circular imports)
-        update_task_status(user_id, session_id, 'active', {
-            'worker_id': self.request.id,
-            'started_at': datetime.utcnow(),
-            'target_count': len(controller.remaining_targets)
-        })
+        if not resumed:
+            update_task_status(user_id, session_id, 'active', {
+                'worker_id': self.request.id,
+                'started_at': datetime.utcnow(),
+                'target_count': len(controller.remaining_targets)
+            })
         
-        # Send start notification dengan enhanced debugging
-        telegram_notification_sent = False
-        telegram_debug_info = {}
+        # Send start notification (skipped when resuming: the user already got it)
+        if not resumed:
+            # Enhanced debugging
+            telegram_notification_sent = False
+            telegram_debug_info = {}
         
-        if telegram_config:
-            telegram_debug_info['config_provided'] = True
-            telegram_debug_info['bot_token_provided'] = bool(telegram_config.get('bot_token'))
-            telegram_debug_info['chat_id_provided'] = bool(telegram_config.get('chat_id'))
+            if telegram_config:
+                telegram_debug_info['config_provided'] = True
+                telegram_debug_info['bot_token_provided'] = bool(telegram_config.get('bot_token'))
+                telegram_debug_info['chat_id_provided'] = bool(telegram_config.get('chat_id'))
             
-            if telegram_config.get('bot_token') and telegram_config.get('chat_id'):
-                try:
-                    # Create direct TelegramNotifier instance for testing
-                    direct_notifier = TelegramNotifier(
-                        bot_token=telegram_config['bot_token'],
-                        chat_id=telegram_config['chat_id']
-                    )
+                if telegram_config.get('bot_token') and telegram_config.get('chat_id'):
+                    try:
+                        # Create direct TelegramNotifier instance for testing
+                        direct_notifier = TelegramNotifier(
+                            bot_token=telegram_config['bot_token'],
+                            chat_id=telegram_config['chat_id']
+                        )
                     
-                    if direct_notifier.is_enabled():
-                        # Send start notification directly
-                        success = direct_notifier.notify_start(list(controller.remaining_targets))
-                        telegram_notification_sent = success
-                        telegram_debug_info['direct_notification_success'] = success
+                        if direct_notifier.is_enabled():
+                            # Send start notification directly
+                            success = direct_notifier.notify_start(list(controller.remaining_targets))
+                            telegram_notification_sent = success
+                            telegram_debug_info['direct_notification_success'] = success
                         
-                        if success:
-                            logger.info(f"✅ Direct Telegram start notification sent for user {user_id}")
+                            if success:
+                                logger.info(f"✅ Direct Telegram start notification sent for user {user_id}")
+                            else:
+                                logger.warning(f"❌ Direct Telegram start notification failed for user {user_id}")
                         else:
-                            logger.warning(f"❌ Direct Telegram start notification failed for user {user_id}")
-                    else:
-                        telegram_debug_info['notifier_enabled'] = False
-                        logger.warning(f"📱 Direct TelegramNotifier not enabled for user {user_id}")
+                            telegram_debug_info['notifier_enabled'] = False
+                            logger.warning(f"📱 Direct TelegramNotifier not enabled for user {user_id}")
                         
-                except Exception as direct_error:
-                    telegram_debug_info['direct_error'] = str(direct_error)
-                    logger.error(f"❌ Direct Telegram notification error: {direct_error}")
+                    except Exception as direct_error:
+                        telegram_debug_info['direct_error'] = str(direct_error)
+                        logger.error(f"❌ Direct Telegram notification error: {direct_error}")
             
-            # Also try via controller (original method)
-            if controller.telegram and controller.telegram.is_enabled():
-                try:
-                    controller.telegram.notify_start(list(controller.remaining_targets))
-                    telegram_debug_info['controller_notification_success'] = True
-                    if not telegram_notification_sent:
-                        telegram_notification_sent = True
-                    logger.info(f"✅ Controller Telegram start notification sent for user {user_id}")
-                except Exception as controller_error:
-                    telegram_debug_info['controller_error'] = str(controller_error)
-                    logger.warning(f"❌ Controller Telegram start notification failed: {controller_error}")
+                # Also try via controller (original method)
+                if controller.telegram and controller.telegram.is_enabled():
+                    try:
+                        controller.telegram.notify_start(list(controller.remaining_targets))
+                        telegram_debug_info['controller_notification_success'] = True
+                        if not telegram_notification_sent:
+                            telegram_notification_sent = True
+                        logger.info(f"✅ Controller Telegram start notification sent for user {user_id}")
+                    except Exception as controller_error:
+                        telegram_debug_info['controller_error'] = str(controller_error)
+                        logger.warning(f"❌ Controller Telegram start notification failed: {controller_error}")
+                else:
+                    telegram_debug_info['controller_telegram_enabled'] = False
+                    logger.info(f"📱 Controller Telegram not enabled for user {user_id}")
             else:
-                telegram_debug_info['controller_telegram_enabled'] = False
-                logger.info(f"📱 Controller Telegram not enabled for user {user_id}")
-        else:
-            telegram_debug_info['config_provided'] = False
-            logger.info(f"📱 No Telegram config provided for user {user_id}")
+                telegram_debug_info['config_provided'] = False
+                logger.info(f"📱 No Telegram config provided for user {user_id}")
         
-        # Log comprehensive telegram debug info
-        log_activity_celery(user_id, 
-            f"Telegram start notification attempt: {'SUCCESS' if telegram_notification_sent else 'FAILED'}", 
-            "INFO" if telegram_notification_sent else "WARNING", 
-            session_id, telegram_debug_info)
+            # Log comprehensive telegram debug info
+            log_activity_celery(user_id, 
+                f"Telegram start notification attempt: {'SUCCESS' if telegram_notification_sent else 'FAILED'}", 
+                "INFO" if telegram_notification_sent else "WARNING", 
+                session_id, telegram_debug_info)
         
         # Main WAR loop with enhanced monitoring
         cycle_delay = settings.get('cycle_delay', 45)  # Default 45 seconds as per requirement
         max_cycles = settings.get('max_cycles', 200)   # Safety limit
         
-        successful_courses = []
-        total_cycles = 0
+        successful_courses = list(controller.successful_courses) if resumed else []
+        total_cycles = controller.cycle_count if resumed else 0
         
         logger.info(f"Starting WAR loop for user {user_id} with cycle delay {cycle_delay}s")
         
+        # Epoch time the next cycle is due, for cycle lag metrics
+        cycle_due_at = checkpoint.get('next_cycle_at') if resumed else None
+        
+        # Keep the original pacing: only wait what was left of the interrupted delay
+        if resumed and checkpoint.get('next_cycle_at'):
+            remaining_delay = checkpoint['next_cycle_at'] - time.time()
+            if remaining_delay > 0 and wait_or_stop(session_id, min(remaining_delay, cycle_delay)):
+                logger.info(f"User {user_id}: Stop requested before resumed cycle")
+        
         while (controller.remaining_targets and 
                total_cycles < max_cycles and 
-               not task_should_stop(self.request.id)):
+               not task_should_stop(session_id)):
             
             try:
                 # Check if task was revoked
@@ -171,10 +265,50 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
                     # This is running in worker, check for revocation
                     pass
                 
+                # Losing the run lease means another run took over (and owns the session row)
+                if heartbeat.lost.is_set():
+                    return lease_lost_result(user_id, session_id, total_cycles)
+                
+                # Wait for this user's fair turn on the shared workers
+                lease, stop_requested = get_fair_scheduler().wait_for_turn(user_id, session_id, cycle_delay)
+                if stop_requested:
+                    logger.info(f"User {user_id}: Stop requested while waiting for a cycle slot")
+                    break
+                if lease is None:
+                    # No turn in time: requeue this cycle (keeping the run lease) rather
+                    # than running it past the scheduler
+                    save_task_checkpoint(user_id, session_id, controller, total_cycles,
+                                         successful_courses, next_cycle_at=time.time(),
+                                         task_id=self.request.id)
+                    next_task = self.apply_async(kwargs={
+                        'user_id': user_id,
+                        'session_id': session_id,
+                        'cookies': controller.get_cookies() or cookies,
+                        'urls': urls,
+                        'target_courses': target_courses,
+                        'settings': settings,
+                        'telegram_config': telegram_config,
+                        'lease_token': lease_token
+                    }, countdown=FAIR_REQUEUE_DELAY)
+                    get_run_lock().renew(user_id, lease_token, ttl=FAIR_REQUEUE_DELAY + get_run_lock().ttl)
+                    logger.info(f"User {user_id}: No cycle slot, requeued as {next_task.id}")
+                    return {'status': 'requeued', 'user_id': user_id, 'session_id': session_id,
+                            'cycle': total_cycles, 'next_task_id': next_task.id}
+                
+                if heartbeat.lost.is_set():
+                    get_fair_scheduler().release(lease)
+                    return lease_lost_result(user_id, session_id, total_cycles)
+                
+                if cycle_due_at:
+                    get_queue_metrics().record_cycle_lag(session_id, (time.time() - cycle_due_at) * 1000)
+                
                 # Run single cycle using existing controller logic
                 logger.info(f"User {user_id}: Starting cycle {total_cycles + 1}")
                 
-                session_valid, session_status, successful_this_cycle, failed_this_cycle = controller.run_single_cycle()
+                try:
+                    session_valid, session_status, successful_this_cycle, failed_this_cycle = controller.run_single_cycle()
+                finally:
+                    get_fair_scheduler().release(lease)
                 
                 total_cycles += 1
                 
@@ -190,25 +324,22 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
                 if hasattr(controller, 'consecutive_cycle_errors'):
                     controller.consecutive_cycle_errors = 0
                 
-                # Update task progress
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'status': 'running',
-                        'user_id': user_id,
-                        'session_id': session_id,
-                        'cycle': total_cycles,
-                        'successful_courses': successful_courses,
-                        'successful_this_cycle': successful_this_cycle or [],
-                        'failed_this_cycle': failed_this_cycle or [],
-                        'remaining_targets': list(controller.remaining_targets),
-                        'session_valid': session_valid,
-                        'last_activity': datetime.utcnow().isoformat()
-                    }
+                # Publish task and database progress (throttled, changed fields only)
+                progress.publish(
+                    status='running',
+                    cycle=total_cycles,
+                    successful_courses=list(successful_courses),
+                    successful_this_cycle=successful_this_cycle or [],
+                    failed_this_cycle=failed_this_cycle or [],
+                    remaining_targets=controller.remaining_targets,
+                    session_valid=session_valid,
+                    last_activity=datetime.utcnow()
                 )
                 
-                # Update database progress
-                update_task_progress(user_id, session_id, total_cycles, successful_courses, controller.remaining_targets)
+                # Checkpoint so a redelivered task continues from here
+                save_task_checkpoint(user_id, session_id, controller, total_cycles,
+                                     successful_courses, next_cycle_at=time.time() + cycle_delay,
+                                     task_id=self.request.id)
                 
                 # Handle session errors - CRITICAL: Stop task immediately on session failure
                 if not session_valid:
@@ -359,11 +490,16 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
                     else:
                         log_activity_celery(user_id, f"Telegram cycle notification failed for cycle {total_cycles}", "WARNING", session_id)
                 
-                # Sleep between cycles (non-blocking)
+                # Wait between cycles, waking up immediately on a stop request
                 if controller.remaining_targets and total_cycles < max_cycles:
                     logger.info(f"User {user_id}: Cycle {total_cycles} completed. Waiting {cycle_delay}s before next cycle")
-                    time.sleep(cycle_delay)
+                    cycle_due_at = time.time() + cycle_delay
+                    if wait_or_stop(session_id, cycle_delay):
+                        logger.info(f"User {user_id}: Stop requested during cycle delay")
+                        break
                 
+            except SoftTimeLimitExceeded:
+                raise
             except Exception as cycle_error:
                 logger.error(f"User {user_id}: Error in cycle {total_cycles + 1}: {cycle_error}")
                 
@@ -405,7 +541,9 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
                     break
                 
                 # Wait before retrying
-                time.sleep(min(cycle_delay, 60))
+                cycle_due_at = time.time() + min(cycle_delay, 60)
+                if wait_or_stop(session_id, min(cycle_delay, 60)):
+                    break
         
         # Task completion - determine final status with clear error indication
         if hasattr(controller, 'consecutive_session_failures') and controller.consecutive_session_failures >= 3:
@@ -427,6 +565,17 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
         minutes, seconds = divmod(remainder, 60)
         time_str = f"{hours}h {minutes}m {seconds}s" if hours > 0 else f"{minutes}m {seconds}s"
         
+        # Final snapshot; result backend and database are updated below
+        progress.close(
+            status=final_status,
+            cycle=total_cycles,
+            successful_courses=list(successful_courses),
+            remaining_targets=controller.remaining_targets,
+            status_message=status_message,
+            last_activity=datetime.utcnow()
+        )
+        logger.info(f"User {user_id}: Progress publisher stats: {progress.get_stats()}")
+        
         # Update final task state for user visibility
         self.update_state(
             state='SUCCESS' if final_status == 'completed' else 'FAILURE' if 'error' in final_status else 'SUCCESS',
@@ -453,7 +602,8 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
             'remaining_targets': list(controller.remaining_targets),
             'elapsed_time': time_str,
             'completed_at': datetime.utcnow().isoformat(),
-            'status_message': status_message
+            'status_message': status_message,
+            'bandwidth': controller.session.get_transfer_stats()
         }
         
         logger.info(f"User {user_id}: {status_message} - {time_str}")
@@ -461,12 +611,15 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
         # Update database with final status
         try:
             update_task_progress(user_id, session_id, total_cycles, successful_courses, 
-                               controller.remaining_targets, final_status, status_message)
+                               controller.remaining_targets, final_status, status_message,
+                               transfer_totals=controller.session.transfer_stats.totals())
         except Exception as db_error:
             logger.error(f"Failed to update final task status in database: {db_error}")
         
         # Update database final status
         update_task_status(user_id, session_id, final_status, result)
+        get_stop_channel().clear(session_id)
+        get_run_lock().release(user_id, lease_token)
         
         # Send completion notification dengan enhanced debugging
         completion_notification_sent = False
@@ -526,6 +679,22 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
             })
         
         return result
+    
+    except SoftTimeLimitExceeded:
+        # Hand off to a fresh task that resumes from the last checkpoint
+        logger.info(f"User {user_id}: Soft time limit reached, handing off WAR session {session_id}")
+        next_task = self.apply_async(kwargs={
+            'user_id': user_id,
+            'session_id': session_id,
+            'cookies': (controller.get_cookies() if controller else None) or cookies,
+            'urls': urls,
+            'target_courses': target_courses,
+            'settings': settings,
+            'telegram_config': telegram_config,
+            'lease_token': lease_token
+        })
+        log_activity_celery(user_id, f"WAR task handed off to {next_task.id} (time limit)", "INFO", session_id)
+        return {'status': 'handoff', 'user_id': user_id, 'session_id': session_id, 'next_task_id': next_task.id}
         
     except Exception as e:
         logger.error(f"Fatal error in WAR task for user {user_id}: {e}")
@@ -540,6 +709,8 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
         }
         
         update_task_status(user_id, session_id, 'error', error_result)
+        ProgressPublisher(session_id, user_id).close(status='error', status_message=str(e),
+                                                     last_activity=datetime.utcnow())
         
         # Send error notification
         if telegram_config:
@@ -553,30 +724,351 @@ def run_war_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
             except Exception as tg_error:
                 logger.warning(f"Telegram error notification failed: {tg_error}")
         
-        # Re-raise for Celery retry mechanism
+        # Re-raise for Celery retry mechanism (the lease must outlive the countdown)
+        get_run_lock().renew(user_id, lease_token, ttl=300 + get_run_lock().ttl)
         raise self.retry(countdown=300, max_retries=3, exc=e)  # Retry after 5 minutes
+    
+    finally:
+        if heartbeat:
+            heartbeat.stop()
+
+
+@celery_app.task(bind=True, name='tasks.war_tasks.run_war_cycle_task')
+def run_war_cycle_task(self, user_id: int, session_id: int, cookies: Dict[str, str],
+                       urls: Dict[str, str], target_courses: Dict[str, str],
+                       settings: Dict, telegram_config: Optional[Dict] = None,
+                       cycle: int = 0, lease_token: Optional[str] = None):
+    """
+    Run ONE WAR cycle, then re-enqueue the next one with countdown=cycle_delay
+    
+    Unlike run_war_task the worker slot is only held while a cycle runs, so a
+    worker can interleave the cycles of many users. Controller state is
+    checkpointed in the database after every cycle and reloaded at the start
+    of the next one, so a restarted worker continues where it left off.
+    
+    Args:
+        user_id: User ID from database
+        session_id: WAR session ID from database
+        cookies: SIAKAD authentication cookies (latest values from the previous cycle)
+        urls: SIAKAD URLs configuration
+        target_courses: Target courses mapping (code -> class_id)
+        settings: WAR settings configuration
+        telegram_config: Telegram notification configuration
+        cycle: Number of cycles completed before this task
+        lease_token: Per-user run lease acquired by the caller (renewed by a heartbeat)
+    
+    Returns:
+        Dict with cycle result
+    """
+    if not CONTROLLER_AVAILABLE:
+        logger.error("Controller not available - cannot run WAR cycle task")
+        return {'status': 'error', 'message': 'Controller not available'}
+    
+    repository = get_repository()
+    status, state = repository.load_checkpoint(session_id)
+    
+    if status is None:
+        logger.warning(f"User {user_id}: WAR session {session_id} no longer exists")
+        return {'status': 'missing', 'user_id': user_id, 'session_id': session_id}
+    
+    # Duplicate delivery (e.g. redelivered after a worker restart): the checkpoint
+    # is the source of truth, only the task for the next cycle may run
+    checkpoint_cycle = state.get('cycle_count', 0) if state else 0
+    if checkpoint_cycle != cycle:
+        logger.info(f"User {user_id}: Skipping stale cycle task (expected {checkpoint_cycle}, got {cycle})")
+        return {'status': 'skipped', 'user_id': user_id, 'session_id': session_id, 'cycle': cycle}
+    
+    controller = WARKRSController(
+        cookies=cookies,
+        urls=urls,
+        target_courses=target_courses,
+        settings=settings,
+        telegram_config=telegram_config,
+        debug_mode=False
+    )
+    controller.restore_state(state)
+    
+    # After the first cycle the session must still be active (it is created as 'stopped')
+    if cycle > 0 and status not in ['active', 'stopping']:
+        logger.info(f"User {user_id}: WAR session {session_id} already finished ({status})")
+        return {'status': 'skipped', 'user_id': user_id, 'session_id': session_id, 'cycle': cycle}
+    
+    if status == 'stopping' or task_should_stop(session_id):
+        return finish_war_cycles(user_id, session_id, controller, 'stopped',
+                                 f"Task stopped after {controller.cycle_count} cycles", lease_token)
+    
+    if not get_run_lock().renew(user_id, lease_token):
+        return lease_lost_result(user_id, session_id, cycle)
+    
+    # Fair admission: without a token or a free slot, retry this same cycle later
+    lease, retry_after = get_fair_scheduler().admit(user_id, settings.get('cycle_delay', 45))
+    if lease is None:
+        get_run_lock().renew(user_id, lease_token, ttl=retry_after + get_run_lock().ttl)
+        self.apply_async(
+            kwargs={
+                'user_id': user_id,
+                'session_id': session_id,
+                'cookies': cookies,
+                'urls': urls,
+                'target_courses': target_courses,
+                'settings': settings,
+                'telegram_config': telegram_config,
+                'cycle': cycle,
+                'lease_token': lease_token
+            },
+            countdown=max(retry_after, 0.5)
+        )
+        return {'status': 'deferred', 'user_id': user_id, 'session_id': session_id,
+                'cycle': cycle, 'retry_after': retry_after}
+    
+    # A cycle (one request timeout per target course) can outlast the lease
+    heartbeat = get_run_lock().heartbeat(user_id, lease_token)
+    try:
+        return _run_admitted_cycle(self, user_id, session_id, cookies, urls, target_courses,
+                                   settings, telegram_config, cycle, controller, lease,
+                                   lease_token, heartbeat)
+    finally:
+        heartbeat.stop()
+        get_fair_scheduler().release(lease)
+
+
+def _run_admitted_cycle(task, user_id: int, session_id: int, cookies: Dict[str, str],
+                        urls: Dict[str, str], target_courses: Dict[str, str], settings: Dict,
+                        telegram_config: Optional[Dict], cycle: int, controller,
+                        lease: str, lease_token: Optional[str] = None, heartbeat=None) -> Dict:
+    """Run the cycle admitted by run_war_cycle_task and schedule the next one"""
+    repository = get_repository()
+    cycle_delay = settings.get('cycle_delay', 45)
+    max_cycles = settings.get('max_cycles', 200)
+    
+    # What the previous cycle task published, as restored from its checkpoint
+    published = {
+        'status': 'running',
+        'cycle': controller.cycle_count,
+        'successful_courses': list(controller.successful_courses),
+        'remaining_targets': set(controller.remaining_targets)
+    } if cycle > 0 else None
+    
+    if cycle == 0:
+        if settings.get('warmup_enabled', True):
+            try:
+                warmup_report = controller.warm_up()
+                log_activity_celery(user_id,
+                    f"Session warm-up completed in {warmup_report['total_ms']}ms "
+                    f"(authenticated: {warmup_report['authenticated']})",
+                    "INFO" if warmup_report['authenticated'] else "WARNING",
+                    session_id, warmup_report)
+            except Exception as warmup_error:
+                logger.warning(f"User {user_id}: Session warm-up failed: {warmup_error}")
+        
+        update_task_status(user_id, session_id, 'active', {
+            'worker_id': task.request.id,
+            'started_at': datetime.utcnow(),
+            'target_count': len(controller.remaining_targets),
+            'execution_mode': 'cycle'
+        })
+        
+        if controller.telegram and controller.telegram.is_enabled():
+            try:
+                controller.telegram.notify_start(list(controller.remaining_targets))
+            except Exception as tg_error:
+                logger.warning(f"❌ Telegram start notification failed: {tg_error}")
+    
+    next_delay = cycle_delay
+    try:
+        logger.info(f"User {user_id}: Starting cycle {controller.cycle_count + 1} (cycle task)")
+        session_valid, session_status, successful_this_cycle, failed_this_cycle = controller.run_single_cycle()
+        controller.consecutive_cycle_errors = 0
+        
+        if successful_this_cycle:
+            for course_code in successful_this_cycle:
+                if course_code not in controller.successful_courses:
+                    controller.successful_courses.append(course_code)
+            log_activity_celery(user_id, f"Cycle {controller.cycle_count} - Success: {', '.join(successful_this_cycle)}",
+                                "SUCCESS", session_id)
+        
+        if not session_valid:
+            action = session_status.get('recommended_action', 'stop_and_reauth')
+            controller.consecutive_session_failures += 1
+            if action == 'stop_and_reauth' or controller.consecutive_session_failures >= 3:
+                repository.save_checkpoint(user_id, session_id, controller.export_state())
+                return finish_war_cycles(user_id, session_id, controller, 'error_session_failed',
+                                         "Task stopped: SIAKAD session expired, please login again", lease_token)
+        else:
+            controller.consecutive_session_failures = 0
+        
+        if (controller.telegram and controller.telegram.is_enabled() and
+                (successful_this_cycle or controller.cycle_count % 5 == 0)):
+            try:
+                elapsed_str = str(datetime.utcnow() - controller.start_time).split('.')[0]
+                controller.telegram.notify_cycle_summary(
+                    cycle_number=controller.cycle_count,
+                    attempted_courses=(successful_this_cycle or []) + (failed_this_cycle or []),
+                    successful_courses=successful_this_cycle or [],
+                    failed_courses=failed_this_cycle or [],
+                    elapsed_time=elapsed_str,
+                    next_attempt_in=cycle_delay if controller.remaining_targets else None
+                )
+            except Exception as tg_error:
+                logger.warning(f"❌ Telegram cycle notification failed: {tg_error}")
+    
+    except Exception as cycle_error:
+        logger.error(f"User {user_id}: Error in cycle {controller.cycle_count}: {cycle_error}")
+        # run_single_cycle may have failed before counting the cycle
+        controller.cycle_count = max(controller.cycle_count, cycle + 1)
+        controller.consecutive_cycle_errors += 1
+        if controller.consecutive_cycle_errors >= 3:
+            repository.save_checkpoint(user_id, session_id, controller.export_state())
+            return finish_war_cycles(user_id, session_id, controller, 'error_cycle_failed',
+                                     f"Task stopped: Too many cycle errors ({controller.consecutive_cycle_errors})", lease_token)
+        next_delay = min(cycle_delay, 60)
+    
+    if heartbeat and heartbeat.lost.is_set():
+        return lease_lost_result(user_id, session_id, controller.cycle_count)
+    
+    repository.save_checkpoint(user_id, session_id, controller.export_state(),
+                               transfer_totals=controller.session.transfer_stats.totals())
+    ProgressPublisher(session_id, user_id, emitted=published).publish(
+        status='running',
+        cycle=controller.cycle_count,
+        successful_courses=controller.successful_courses,
+        remaining_targets=controller.remaining_targets,
+        last_activity=datetime.utcnow()
+    )
+    
+    if not controller.remaining_targets:
+        return finish_war_cycles(user_id, session_id, controller, 'completed',
+                                 "Task completed: All courses enrolled successfully", lease_token)
+    if controller.cycle_count >= max_cycles or task_should_stop(session_id):
+        return finish_war_cycles(user_id, session_id, controller, 'stopped',
+                                 f"Task stopped after {controller.cycle_count} cycles", lease_token)
+    
+    # Free the slot before queueing so the next turn goes to whoever waited longest,
+    # and keep the lease alive until the next cycle task is due
+    get_fair_scheduler().release(lease)
+    get_run_lock().renew(user_id, lease_token, ttl=next_delay + get_run_lock().ttl)
+    next_task = task.apply_async(
+        kwargs={
+            'user_id': user_id,
+            'session_id': session_id,
+            'cookies': controller.get_cookies() or cookies,
+            'urls': urls,
+            'target_courses': target_courses,
+            'settings': settings,
+            'telegram_config': telegram_config,
+            'cycle': controller.cycle_count,
+            'lease_token': lease_token
+        },
+        countdown=next_delay
+    )
+    
+    return {
+        'status': 'scheduled',
+        'user_id': user_id,
+        'session_id': session_id,
+        'cycle': controller.cycle_count,
+        'successful_courses': controller.successful_courses,
+        'remaining_targets': sorted(controller.remaining_targets),
+        'next_task_id': next_task.id,
+        'next_cycle_in': next_delay
+    }
+
+
+def lease_lost_result(user_id: int, session_id: int, cycle: int) -> Dict:
+    """
+    Result of a run that lost its lease: the session row now belongs to the
+    run holding the lease, so nothing is finalized or released
+    """
+    logger.warning(f"User {user_id}: Run lease lost, another WAR process owns session {session_id}")
+    return {'status': 'lease_lost', 'user_id': user_id, 'session_id': session_id, 'cycle': cycle}
+
+
+def finish_war_cycles(user_id: int, session_id: int, controller, final_status: str,
+                      status_message: str, lease_token: Optional[str] = None) -> Dict:
+    """
+    Record the final status of a cycle-per-task WAR session and notify the user
+    
+    Args:
+        user_id: User ID
+        session_id: Session ID
+        controller: Controller restored from the last checkpoint
+        final_status: Final session status
+        status_message: Status message for user
+        lease_token: Run lease to release (None when this run does not own it)
+        
+    Returns:
+        Dict with final task result
+    """
+    elapsed_time = datetime.utcnow() - controller.start_time
+    hours, remainder = divmod(int(elapsed_time.total_seconds()), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    time_str = f"{hours}h {minutes}m {seconds}s" if hours > 0 else f"{minutes}m {seconds}s"
+    
+    result = {
+        'status': final_status,
+        'user_id': user_id,
+        'session_id': session_id,
+        'total_cycles': controller.cycle_count,
+        'successful_courses': controller.successful_courses,
+        'remaining_targets': sorted(controller.remaining_targets),
+        'elapsed_time': time_str,
+        'completed_at': datetime.utcnow().isoformat(),
+        'status_message': status_message
+    }
+    
+    update_task_progress(user_id, session_id, controller.cycle_count, controller.successful_courses,
+                         controller.remaining_targets, final_status, status_message)
+    update_task_status(user_id, session_id, final_status, result)
+    ProgressPublisher(session_id, user_id).close(
+        status=final_status,
+        cycle=controller.cycle_count,
+        successful_courses=controller.successful_courses,
+        remaining_targets=controller.remaining_targets,
+        status_message=status_message,
+        last_activity=datetime.utcnow()
+    )
+    get_stop_channel().clear(session_id)
+    get_run_lock().release(user_id, lease_token)
+    
+    if controller.telegram and controller.telegram.is_enabled():
+        try:
+            if final_status == 'completed':
+                controller.telegram.notify_all_completed(controller.successful_courses, time_str)
+            else:
+                controller.telegram.notify_error(status_message)
+        except Exception as tg_error:
+            logger.warning(f"❌ Telegram completion notification failed: {tg_error}")
+    
+    logger.info(f"User {user_id}: {status_message} - {time_str}")
+    return result
 
 
 @celery_app.task(name='tasks.war_tasks.stop_war_task')
-def stop_war_task(user_id: int) -> Dict:
+def stop_war_task(user_id: int, session_id: int = None) -> Dict:
     """
     Stop WAR task for specific user
     
     Args:
         user_id: User ID to stop task for
+        session_id: WAR session ID to signal (optional)
         
     Returns:
         Dict with stop result
     """
     try:
-        # Mark task for stopping in database
+        # Mark task for stopping in database (fallback when Redis is down)
         result = mark_task_for_stop(user_id)
         
+        # Wake up the running task immediately
+        if session_id is not None:
+            get_stop_channel().request_stop(session_id)
+        
         logger.info(f"Stop signal sent for user {user_id}")
         
         return {
             'status': 'stop_signal_sent',
             'user_id': user_id,
+            'session_id': session_id,
             'timestamp': datetime.utcnow().isoformat(),
             'result': result
         }
@@ -590,24 +1082,76 @@ def stop_war_task(user_id: int) -> Dict:
         }
 
 
-def task_should_stop(task_id: str) -> bool:
+def task_should_stop(session_id: int) -> bool:
     """
-    Check if task should stop based on database flag
+    Check if task should stop (stop channel, then cached database flag)
     
     Args:
-        task_id: Celery task ID
+        session_id: WAR session ID
         
     Returns:
         True if task should stop
     """
     try:
-        # This will be implemented to check database for stop signals
-        # For now, return False to continue
-        return False
+        return get_stop_channel().is_stop_requested(
+            session_id,
+            fallback_check=lambda: get_repository().is_session_stopping(session_id)
+        )
     except Exception:
         return False
 
 
+def wait_or_stop(session_id: int, delay: float) -> bool:
+    """
+    Sleep between cycles, returning as soon as a stop is requested
+    
+    Args:
+        session_id: WAR session ID
+        delay: Seconds to wait
+        
+    Returns:
+        True if the task should stop
+    """
+    try:
+        return get_stop_channel().wait(
+            session_id, delay,
+            fallback_check=lambda: get_repository().is_session_stopping(session_id)
+        )
+    except Exception as e:
+        logger.warning(f"Stop channel wait failed, sleeping instead: {e}")
+        time.sleep(delay)
+        return False
+
+
+def save_task_checkpoint(user_id: int, session_id: int, controller, total_cycles: int,
+                         successful_courses: List[str], next_cycle_at: float = None,
+                         task_id: str = None):
+    """
+    Save a compact checkpoint of a running WAR task
+    
+    Args:
+        user_id: User ID
+        session_id: Session ID
+        controller: WAR controller
+        total_cycles: Cycles completed by the task
+        successful_courses: Courses obtained so far
+        next_cycle_at: Epoch time the next cycle is due (pacing)
+        task_id: Celery task id of the run writing the checkpoint
+    """
+    try:
+        state = controller.export_state()
+        state.update({
+            'cycle_count': total_cycles,
+            'successful_courses': list(successful_courses),
+            'next_cycle_at': next_cycle_at,
+            'task_id': task_id,
+            'saved_at': time.time()
+        })
+        get_repository().save_checkpoint(user_id, session_id, state)
+    except Exception as e:
+        logger.error(f"Error saving task checkpoint: {e}")
+
+
 def update_task_status(user_id: int, session_id: int, status: str, metadata: Dict):
     """
     Update task status in database
@@ -619,38 +1163,13 @@ def update_task_status(user_id: int, session_id: int, status: str, metadata: Dic
         metadata: Additional metadata
     """
     try:
-        # Import here to avoid circular imports
-        import sys
-        import os
-        
-        # Add parent directory to path for imports
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        from app import db, WarSession, ActivityLog
-        from flask import Flask
-        
-        # Create minimal app context for database operations
-        app = Flask(__name__)
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///warkrs.db')
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        
-        db.init_app(app)
-        
-        with app.app_context():
-            # Update WAR session
-            war_session = WarSession.query.filter_by(user_id=user_id, id=session_id).first()
-            if war_session:
-                war_session.status = status
-                war_session.last_activity = datetime.utcnow()
-                if status == 'active' and 'started_at' in metadata:
-                    war_session.started_at = metadata['started_at']
-                elif status in ['completed', 'stopped', 'error']:
-                    war_session.stopped_at = datetime.utcnow()
-                    
-                db.session.commit()
-                
-            # Log activity
-            log_activity_celery(user_id, f"Task status updated to {status}", "INFO", session_id, metadata)
+        get_repository().update_session_status(
+            user_id, session_id, status,
+            started_at=metadata.get('started_at') if metadata else None
+        )
+        
+        # Log activity
+        log_activity_celery(user_id, f"Task status updated to {status}", "INFO", session_id, metadata)
             
     except Exception as e:
         logger.error(f"Error updating task status: {e}")
@@ -658,7 +1177,8 @@ def update_task_status(user_id: int, session_id: int, status: str, metadata: Dic
 
 def update_task_progress(user_id: int, session_id: int, cycle: int, 
                         successful_courses: List[str], remaining_targets: set,
-                        final_status: str = None, status_message: str = None):
+                        final_status: str = None, status_message: str = None,
+                        transfer_totals: Dict = None):
     """
     Update task progress in database
     
@@ -670,46 +1190,20 @@ def update_task_progress(user_id: int, session_id: int, cycle: int,
         remaining_targets: Set of remaining target courses
         final_status: Final status if task is completing (optional)
         status_message: Status message for user (optional)
+        transfer_totals: Bandwidth totals from SiakadSession (optional)
     """
     try:
-        # Import here to avoid circular imports
-        import sys
-        import os
-        
-        # Add parent directory to path for imports
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        from app import db, WarSession
-        from flask import Flask
-        
-        # Create minimal app context for database operations
-        app = Flask(__name__)
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///warkrs.db')
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        
-        db.init_app(app)
-        
-        with app.app_context():
-            # Update WAR session progress
-            war_session = WarSession.query.filter_by(user_id=user_id, id=session_id).first()
-            if war_session:
-                war_session.total_attempts = cycle
-                war_session.successful_attempts = len(successful_courses)
-                war_session.courses_obtained = json.dumps(successful_courses)
-                war_session.last_activity = datetime.utcnow()
-                
-                # Update final status if provided
-                if final_status:
-                    war_session.status = final_status
-                    war_session.stopped_at = datetime.utcnow()
-                    
-                    # Log final status message
-                    if status_message:
-                        log_activity_celery(user_id, status_message, 
-                                          "SUCCESS" if final_status == 'completed' else "ERROR", 
-                                          session_id)
-                
-                db.session.commit()
+        updated = get_repository().update_session_progress(
+            user_id, session_id, cycle, successful_courses,
+            final_status=final_status,
+            transfer_totals=transfer_totals
+        )
+        
+        # Log final status message
+        if updated and final_status and status_message:
+            log_activity_celery(user_id, status_message, 
+                              "SUCCESS" if final_status == 'completed' else "ERROR", 
+                              session_id)
                 
     except Exception as e:
         logger.error(f"Error updating task progress: {e}")
@@ -726,32 +1220,7 @@ def mark_task_for_stop(user_id: int) -> bool:
         True if marked successfully
     """
     try:
-        # Import here to avoid circular imports
-        import sys
-        import os
-        
-        # Add parent directory to path for imports
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        from app import db, WarSession
-        from flask import Flask
-        
-        # Create minimal app context for database operations
-        app = Flask(__name__)
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///warkrs.db')
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        
-        db.init_app(app)
-        
-        with app.app_context():
-            # Find active session for user
-            war_session = WarSession.query.filter_by(user_id=user_id, status='active').first()
-            if war_session:
-                war_session.status = 'stopping'
-                db.session.commit()
-                return True
-                
-        return False
+        return get_repository().mark_active_session_stopping(user_id)
         
     except Exception as e:
         logger.error(f"Error marking task for stop: {e}")
@@ -771,49 +1240,29 @@ def log_activity_celery(user_id: int, message: str, level: str,
         details: Additional details (optional)
     """
     try:
-        # Import here to avoid circular imports
-        import sys
-        import os
-        
-        # Add parent directory to path for imports
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        from app import db, ActivityLog
-        from flask import Flask
-        
-        # Create minimal app context for database operations
-        app = Flask(__name__)
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///warkrs.db')
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        
-        db.init_app(app)
-        
-        with app.app_context():
-            # Create log entry with correct field names
-            log_entry = ActivityLog(
-                user_id=user_id,
-                session_id=session_id,
-                level=level,  # Use 'level' instead of 'activity_type'
-                message=message,
-                timestamp=datetime.utcnow()
-            )
-            
-            # Add details to message if provided
-            if details:
-                try:
-                    # Handle datetime objects in details
-                    serializable_details = {}
-                    for k, v in details.items():
-                        if isinstance(v, datetime):
-                            serializable_details[k] = v.isoformat()
-                        else:
-                            serializable_details[k] = v
-                    log_entry.message += f" | Details: {json.dumps(serializable_details)}"
-                except (TypeError, AttributeError):
-                    log_entry.message += f" | Details: {str(details)}"
-            
-            db.session.add(log_entry)
-            db.session.commit()
+        # Add details to message if provided
+        if details:
+            try:
+                # Handle datetime objects in details
+                serializable_details = {}
+                for k, v in details.items():
+                    if isinstance(v, datetime):
+                        serializable_details[k] = v.isoformat()
+                    else:
+                        serializable_details[k] = v
+                message += f" | Details: {json.dumps(serializable_details)}"
+            except (TypeError, AttributeError):
+                message += f" | Details: {str(details)}"
+        
+        row = {
+            'user_id': user_id,
+            'session_id': session_id,
+            'level': level,
+            'message': message,
+            'timestamp': datetime.utcnow()
+        }
+        if get_repository().queue_activity_log(row):
+            get_status_events().publish(user_id, 'log', row)
             
     except Exception as e:
         logger.error(f"Error logging activity: {e}")
@@ -15,7 +15,7 @@ def run_war_process_serverless(user_id, session_id, app, db):
     
     with app.app_context():
         try:
-            from app import User, WarSession, log_activity, load_course_list
+            from app import User, WarSession, log_activity, resolve_target_courses
             
             # Get user settings
             user = User.query.get(user_id)
@@ -60,17 +60,7 @@ def run_war_process_serverless(user_id, session_id, app, db):
                 urls = default_settings.get('siakad_urls', {})
                 
                 # Convert target courses
-                target_courses_dict = {}
-                available_courses = load_course_list()
-                course_id_to_info = {class_id: label for class_id, label in available_courses}
-                
-                for class_id in target_courses_list:
-                    if class_id in course_id_to_info:
-                        course_info = course_id_to_info[class_id]
-                        course_code = course_info.split(' ')[0]
-                        target_courses_dict[course_code] = class_id
-                    else:
-                        target_courses_dict[class_id] = class_id
+                target_courses_dict = resolve_target_courses(target_courses_list)
                 
                 log_activity(user_id, f"Target courses configured: {list(target_courses_dict.keys())}", "INFO", session_id)
                 
@@ -98,6 +88,8 @@ def run_war_process_serverless(user_id, session_id, app, db):
                 if war_session:
                     war_session.status = 'completed'
                     war_session.last_activity = datetime.utcnow()
+                    if hasattr(controller, 'session') and hasattr(controller.session, 'transfer_stats'):
+                        war_session.set_transfer_totals(controller.session.transfer_stats.totals())
                     db.session.commit()
                 
                 return {